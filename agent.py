@@ -0,0 +1,62 @@
+"""Collector-only edge agent.
+
+Runs the node and service collectors without Flask or a database, spools
+samples to disk and ships them in compressed batches to a central instance's
+/api/ingest endpoint.
+"""
+import os
+import signal
+import threading
+from dotenv import load_dotenv
+from src.agent.spool import Spool
+from src.agent.shipper import Shipper
+from src.collectors.collection_manager import CollectionManager
+from src.collectors.hot_window import HotWindow
+from src.collectors.sampling_policy import SamplingPolicy, parse_deadbands
+
+# Load environment variables
+load_dotenv()
+
+service_names = [name for name in os.getenv('SERVICE_NAMES', '').split(',') if name]
+collection_interval = int(os.getenv('COLLECTION_INTERVAL', '60'))
+ingest_url = os.getenv('INGEST_URL', 'http://localhost:5000/api/ingest')
+
+spool = Spool(
+    os.getenv('SPOOL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'spool.ndjson')),
+    max_bytes=int(os.getenv('SPOOL_MAX_BYTES', str(50 * 1024 * 1024)))
+)
+collection_manager = CollectionManager(
+    service_names,
+    collection_interval,
+    max_workers=int(os.getenv('COLLECTION_WORKERS', '2')),
+    write_buffer=spool,
+    # Nothing queries the agent, so it keeps no samples in memory
+    hot_window=HotWindow(0),
+    # Suppressing unchanged samples at the edge also saves shipping them
+    sampling_policy=SamplingPolicy(
+        parse_deadbands(os.getenv('DEADBANDS', '')),
+        heartbeat=float(os.getenv('HEARTBEAT_INTERVAL', '600')),
+        adaptive=os.getenv('ADAPTIVE_SAMPLING', 'false').lower() in ('1', 'true', 'yes'),
+        speedup=float(os.getenv('ADAPTIVE_SPEEDUP', '4')),
+        backoff=float(os.getenv('ADAPTIVE_BACKOFF', '4'))
+    )
+)
+shipper = Shipper(
+    spool,
+    ingest_url,
+    batch_size=int(os.getenv('SHIP_BATCH_SIZE', '1000')),
+    interval=float(os.getenv('SHIP_INTERVAL', '10')),
+    max_backoff=float(os.getenv('SHIP_MAX_BACKOFF', '300'))
+)
+
+if __name__ == '__main__':
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+    print(f"Collecting every {collection_interval}s and shipping to {ingest_url}")
+    collection_manager.start()
+    shipper.start()
+    stopped.wait()
+    collection_manager.stop()
+    shipper.stop()
@@ -1,10 +1,20 @@
-from flask import Flask, jsonify
+import time
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-from src.api import api
-from src.utils.database import Base, engine
+from src.api import api, close_request_db
+from src.api.cache import query_cache
+from src.api.ingest import MAX_INGEST_BYTES
+from src.utils.database import Base, engine, data_dir
 from src.collectors.collection_manager import CollectionManager
+from src.collectors.rollup_manager import RollupManager
+from src.collectors.chunk_sealer import ChunkSealer
+from src.collectors.hot_window import HotWindow
+from src.collectors.sampling_policy import SamplingPolicy, parse_deadbands
+from src.utils.write_buffer import WriteBuffer
+from src.utils.leader import LeaderElection
+from src.utils import instrumentation
 
 # Load environment variables
 load_dotenv()
@@ -12,30 +22,137 @@ load_dotenv()
 # Create Flask app
 app = Flask(__name__)
 CORS(app)
+# Request bodies are only sent to /api/ingest; reading stops one byte past its
+# limit, so a chunked body without a Content-Length is still seen as too large
+app.config['MAX_CONTENT_LENGTH'] = MAX_INGEST_BYTES + 1
 
 # Initialize API with proper configuration
 api.init_app(app, prefix='/api')
 
+# Return database connections to the pool as soon as each request ends
+app.teardown_request(close_request_db)
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
 # Initialize metrics collection
 service_names = os.getenv('SERVICE_NAMES', '').split(',')
 collection_interval = int(os.getenv('COLLECTION_INTERVAL', '60'))
-collection_manager = CollectionManager(service_names, collection_interval)
+collection_workers = int(os.getenv('COLLECTION_WORKERS', '4'))
+collector_timeout = float(os.getenv('COLLECTOR_TIMEOUT', str(collection_interval)))
+# Per-collector intervals, e.g. "node=30,my-service=300"
+collector_intervals = {
+    name.strip(): float(seconds)
+    for name, _, seconds in (
+        item.partition('=') for item in os.getenv('COLLECTOR_INTERVALS', '').split(',') if item
+    )
+}
+# Per-metric deadbands, e.g. "disk_usage=0.5,network_in=10%"; empty stores every sample
+sampling_policy = SamplingPolicy(
+    parse_deadbands(os.getenv('DEADBANDS', '')),
+    heartbeat=float(os.getenv('HEARTBEAT_INTERVAL', '600')),
+    adaptive=os.getenv('ADAPTIVE_SAMPLING', 'false').lower() in ('1', 'true', 'yes'),
+    speedup=float(os.getenv('ADAPTIVE_SPEEDUP', '4')),
+    backoff=float(os.getenv('ADAPTIVE_BACKOFF', '4'))
+)
+write_buffer = WriteBuffer(
+    max_size=int(os.getenv('WRITE_QUEUE_SIZE', '10000')),
+    flush_size=int(os.getenv('WRITE_FLUSH_SIZE', '500')),
+    max_age=float(os.getenv('WRITE_FLUSH_INTERVAL', '5'))
+)
+# Query results are cached with time bounds snapped to the collection interval
+# and dropped when newer data for their series is written
+query_cache.configure(int(os.getenv('QUERY_CACHE_SIZE', '1024')), collection_interval)
+write_buffer.add_listener(query_cache.on_write)
+collection_manager = CollectionManager(
+    service_names,
+    collection_interval,
+    max_workers=collection_workers,
+    collector_timeout=collector_timeout,
+    intervals=collector_intervals,
+    write_buffer=write_buffer,
+    hot_window=HotWindow(int(os.getenv('HOT_WINDOW_SIZE', '720'))),
+    sampling_policy=sampling_policy
+)
+# Lets the API answer recent queries from the collectors' in-memory window
+app.extensions['hot_window'] = collection_manager.hot_window
+# Samples in the hot window learn their database ids once written
+write_buffer.add_listener(collection_manager.hot_window.on_write)
+# Remotely collected samples go through the same write-behind queue
+app.extensions['write_buffer'] = write_buffer
+# Buckets stay open for the grace period so queued samples are rolled up with them
+rollup_manager = RollupManager(
+    int(os.getenv('ROLLUP_INTERVAL', '60')),
+    grace=max(float(os.getenv('ROLLUP_GRACE', '30')), write_buffer.max_age)
+)
+# Optional storage mode sealing closed windows of raw rows into compressed chunks
+chunk_storage = os.getenv('CHUNK_STORAGE', 'false').lower() in ('1', 'true', 'yes')
+chunk_sealer = ChunkSealer(duration=int(os.getenv('CHUNK_DURATION', '7200')))
 
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
     return jsonify({"status": "healthy"}), 200
 
-# Initialize metrics collection on first request
+@app.route('/stats')
+def stats():
+    """Internal statistics endpoint."""
+    return jsonify({
+        "write_buffer": write_buffer.stats(),
+        "query_cache": query_cache.stats(),
+        "chunk_sealer": dict(chunk_sealer.stats(), enabled=chunk_storage),
+        "collection": {
+            "leader": leader_election.is_leader,
+            "leader_pid": leader_election.holder(),
+            "sampling": sampling_policy.stats()
+        },
+        "metrics": instrumentation.stats.snapshot()
+    }), 200
+
 @app.before_request
-def initialize_metrics_collection():
-    """Initialize metrics collection on first request."""
-    if not hasattr(app, '_metrics_initialized'):
-        collection_manager.start()
-        app._metrics_initialized = True
+def start_request_timer():
+    """Remember when the request started for the latency histogram."""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_stats(response):
+    """Record latency, status and returned rows per endpoint."""
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = f"{request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}"
+        instrumentation.stats.observe(f'api.{endpoint}.latency_seconds', time.perf_counter() - started)
+        instrumentation.stats.increment(f'api.{endpoint}.status_{response.status_code // 100}xx')
+        if g.get('row_count') is not None:
+            instrumentation.stats.observe_count(f'api.{endpoint}.rows', g.row_count)
+    return response
+
+def start_leader_jobs():
+    """Run collection, rollups and chunk sealing; called in the one process elected leader."""
+    collection_manager.start()
+    rollup_manager.start()
+    if chunk_storage:
+        chunk_sealer.start()
+
+def start_background_jobs():
+    """Start the write flusher here and compete to run collection on this host.
+
+    Every worker flushes the samples it receives through the ingest
+    endpoint, but only the leader collects and rolls up, so running several
+    workers does not multiply the samples written.
+    """
+    write_buffer.start()
+    leader_election.start()
+
+leader_election = LeaderElection(
+    os.getenv('LEADER_LOCK_PATH', os.path.join(data_dir, 'collector.lock')),
+    start_leader_jobs,
+    retry_interval=float(os.getenv('LEADER_RETRY_INTERVAL', '5'))
+)
+
+# Background jobs are started by the server entry point, not at import: under
+# gunicorn --preload the app is imported in the master, whose threads the
+# forked workers would not inherit (see gunicorn.conf.py)
+collection_enabled = os.getenv('COLLECTION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
 
 if __name__ == '__main__':
     import sys
@@ -46,4 +163,6 @@ if __name__ == '__main__':
             port = int(sys.argv[1])
         except ValueError:
             print(f"Invalid port argument: {sys.argv[1]}. Using default port {port}.")
+    if collection_enabled:
+        start_background_jobs()
     app.run(host='0.0.0.0', port=port) 
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""API endpoint latency at several table sizes and page depths."""
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Sequence
+from src.api.cache import query_cache
+from src.collectors.rollup_manager import RollupManager
+from . import seed
+from .common import measure
+
+# Aggregate ranges and the step used for each
+AGGREGATE_RANGES = {
+    '1h': (timedelta(hours=1), 60),
+    '24h': (timedelta(hours=24), 300),
+    '7d': (timedelta(days=7), 3600)
+}
+
+def _expect(response, status: int = 200):
+    response.get_data()
+    if response.status_code != status:
+        raise RuntimeError(f'{response.request.path} answered {response.status_code}: {response.get_data(as_text=True)[:200]}')
+    return response
+
+def _iso(value: datetime) -> str:
+    """Format a timestamp for a query string, where a '+' offset would read as a space."""
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _cursor_at(client, path: str, depth: int) -> str:
+    """Get the cursor that continues a listing after depth rows."""
+    response = _expect(client.get(f'{path}?limit=1&offset={depth - 1}'))
+    return response.headers['X-Next-Cursor']
+
+def endpoint_calls(client, end, services: Sequence[str], depths: Sequence[int],
+                   rows_per_series: int) -> Dict[str, Callable[[], Any]]:
+    """Build the requests to time, keyed by a stable name."""
+    service = services[0]
+    path = f'/api/services/{service}/metrics'
+    calls = {
+        'services_list': lambda: _expect(client.get('/api/services')),
+        'nodes_page': lambda: _expect(client.get('/api/nodes/node-00/metrics?limit=100')),
+        'services_page_columns': lambda: _expect(client.get(f'{path}?limit=100&format=columns')),
+        'services_page_fields': lambda: _expect(client.get(f'{path}?limit=100&fields=cpu_usage'))
+    }
+    for depth in depths:
+        if depth >= rows_per_series:
+            continue
+        calls[f'services_page_offset_{depth}'] = (
+            lambda depth=depth: _expect(client.get(f'{path}?limit=100&offset={depth}'))
+        )
+        if depth:
+            cursor = _cursor_at(client, path, depth)
+            calls[f'services_page_cursor_{depth}'] = (
+                lambda cursor=cursor: _expect(client.get(f'{path}?limit=100&after={cursor}'))
+            )
+    for name, (span, step) in AGGREGATE_RANGES.items():
+        query = f'start_time={_iso(end - span)}&end_time={_iso(end)}&step={step}'
+        calls[f'services_aggregate_{name}'] = (
+            lambda query=query: _expect(client.get(f'{path}/aggregate?{query}&fn=avg,max'))
+        )
+    day = {'start_time': _iso(end - timedelta(hours=24)), 'end_time': _iso(end)}
+    calls['services_stream_24h'] = lambda: _expect(client.get(
+        f'{path}?stream=true&start_time={day["start_time"]}&end_time={day["end_time"]}'
+    ))
+    targets = [
+        dict(day, refId=name, type='service', series=name, metric='cpu_usage', fn='avg', step=300)
+        for name in services
+    ]
+    body = json.dumps({'targets': targets})
+    calls['query_batch_24h'] = lambda: _expect(
+        client.post('/api/query', data=body, content_type='application/json')
+    )
+    return calls
+
+def run(app, bind, sizes: Sequence[int] = (100000, 1000000),
+        depths: Sequence[int] = (0, 1000, 10000, 100000), iterations: int = 50,
+        services: int = 10, nodes: int = 2, interval: int = 60) -> Dict[str, Any]:
+    """Seed the tables up to each size in turn and time every endpoint against them.
+
+    The query cache is disabled so every request reaches the database, and
+    rollups are brought up to date after each seeding step as the rollup
+    job would have done.
+    """
+    query_cache.configure(0, 1)
+    client = app.test_client()
+    names = seed.series_names(services, nodes)['service']
+    per_step = services + nodes
+    # Lay the samples out so that those of the largest size end now
+    first = datetime.now(timezone.utc) - timedelta(seconds=interval * -(-max(sizes) // per_step))
+
+    report = {}
+    for size in sorted(sizes):
+        existing = seed.count_rows(bind)
+        started = time.perf_counter()
+        if size > existing:
+            seed.seed(bind, size - existing, services, nodes, interval, start=first)
+        seed_seconds = time.perf_counter() - started
+        end = seed.latest_timestamp(bind)
+
+        started = time.perf_counter()
+        RollupManager(bind=bind).run_once(now=end + timedelta(seconds=interval))
+        rollup_seconds = time.perf_counter() - started
+
+        rows = seed.count_rows(bind)
+        calls = endpoint_calls(client, end, names, depths, rows // per_step)
+        report[f'rows_{size}'] = {
+            'rows': rows,
+            'seed_seconds': round(seed_seconds, 3),
+            'rollup_seconds': round(rollup_seconds, 3),
+            'endpoints': {name: measure(call, iterations) for name, call in calls.items()}
+        }
+    return report
@@ -0,0 +1,136 @@
+"""Collector cycle time against a mocked process table of N processes."""
+import random
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+from typing import Any, Dict, Sequence
+from unittest import mock
+import psutil
+from src.collectors.collection_manager import CollectionManager
+from src.collectors.hot_window import HotWindow
+from .common import summarize
+
+CpuTimes = namedtuple('CpuTimes', 'user system')
+
+class FakeProcess:
+    """Just enough of ``psutil.Process`` for discovery and service collection."""
+
+    def __init__(self, pid: int, cmdline: str):
+        self.pid = pid
+        self._cmdline = cmdline.split()
+        self._cpu = 0.0
+        self.running = True
+
+    def cmdline(self):
+        return self._cmdline
+
+    def is_running(self):
+        return self.running
+
+    def oneshot(self):
+        return nullcontext()
+
+    def cpu_times(self):
+        self._cpu += 0.01
+        return CpuTimes(self._cpu, self._cpu / 2)
+
+    def create_time(self):
+        return 1700000000.0 + self.pid
+
+    def memory_percent(self):
+        return 1.5
+
+    def num_threads(self):
+        return 8
+
+    def num_fds(self):
+        return 32
+
+    def status(self):
+        return 'running'
+
+class FakeProcessTable:
+    """A process table of count processes, some of them the benchmarked services."""
+
+    def __init__(self, count: int, service_names: Sequence[str], seed_value: int = 0):
+        self.rng = random.Random(seed_value)
+        self.processes: Dict[int, FakeProcess] = {}
+        self.next_pid = 1000
+        self.service_pids = set()
+        spacing = max(count // max(len(service_names), 1), 1)
+        for index in range(count):
+            pid = self._add('/usr/bin/worker --id %d' % index)
+            if index % spacing == 0 and index // spacing < len(service_names):
+                self.processes[pid]._cmdline = ['/usr/bin/horizon', service_names[index // spacing]]
+                self.service_pids.add(pid)
+
+    def _add(self, cmdline: str) -> int:
+        pid = self.next_pid
+        self.next_pid += 1
+        self.processes[pid] = FakeProcess(pid, cmdline)
+        return pid
+
+    def churn(self, fraction: float) -> None:
+        """Replace a fraction of the non-service processes with new ones."""
+        others = [pid for pid in self.processes if pid not in self.service_pids]
+        for pid in self.rng.sample(others, min(int(len(others) * fraction), len(others))):
+            self.processes.pop(pid).running = False
+            self._add('/usr/bin/worker --respawned')
+
+    def pids(self):
+        return list(self.processes)
+
+    def process(self, pid: int) -> FakeProcess:
+        try:
+            return self.processes[pid]
+        except KeyError:
+            raise psutil.NoSuchProcess(pid)
+
+class NullSink:
+    """Write buffer stand-in that discards samples, isolating collection cost."""
+
+    def push(self, kind: str, record: Dict[str, Any]) -> bool:
+        return True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+def run(process_counts: Sequence[int] = (100, 1000, 10000), services: int = 10,
+        cycles: int = 20, churn: float = 0.01, max_workers: int = 4) -> Dict[str, Any]:
+    """Time full collection cycles with services found among N processes.
+
+    The first cycle reads every command line and is reported on its own;
+    later cycles replace ``churn`` of the process table before each run, so
+    they measure the incremental index refresh plus the collectors.
+    """
+    service_names = [f'service-{index:03d}' for index in range(services)]
+    report = {}
+    for count in process_counts:
+        table = FakeProcessTable(count, service_names)
+        with mock.patch.object(psutil, 'pids', table.pids), \
+                mock.patch.object(psutil, 'Process', table.process):
+            started = time.perf_counter()
+            manager = CollectionManager(
+                service_names, max_workers=max_workers,
+                write_buffer=NullSink(), hot_window=HotWindow()
+            )
+            manager._collect_and_store_metrics()
+            cold = time.perf_counter() - started
+
+            durations = []
+            for _ in range(cycles):
+                table.churn(churn)
+                started = time.perf_counter()
+                manager._collect_and_store_metrics()
+                durations.append(time.perf_counter() - started)
+
+        found = sum(1 for collector in manager.service_collectors if collector.process is not None)
+        report[f'processes_{count}'] = {
+            'services_found': found,
+            'cold_cycle_ms': round(cold * 1000, 3),
+            'cycle': summarize(durations)
+        }
+    return report
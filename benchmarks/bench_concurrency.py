@@ -0,0 +1,136 @@
+"""Dashboard load against the WSGI (gunicorn) and ASGI (uvicorn) servers.
+
+Both servers run as subprocesses on the same seeded database with the query
+cache disabled; many concurrent clients replay dashboard-style requests and
+throughput and latency are compared at each concurrency level.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import timedelta, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+from src.utils.database import Base
+from . import seed
+from .common import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def server_commands(port: int, wsgi_workers: int, asgi_workers: int) -> Dict[str, List[str]]:
+    """Get the command line starting each server variant on port."""
+    return {
+        'wsgi': [sys.executable, '-m', 'gunicorn', '--workers', str(wsgi_workers),
+                 '--bind', f'127.0.0.1:{port}', '--backlog', '4096', 'app:app'],
+        'asgi': [sys.executable, '-m', 'uvicorn', 'src.api.asgi:app', '--host', '127.0.0.1',
+                 '--port', str(port), '--no-access-log', '--log-level', 'warning', '--backlog', '4096',
+                 '--workers', str(asgi_workers)]
+    }
+
+def start_server(command: List[str], port: int, database_url: str, timeout: float = 30.0) -> subprocess.Popen:
+    """Start a server and wait until it answers its health check."""
+    env = dict(os.environ, DATABASE_URL=database_url, COLLECTION_ENABLED='false', QUERY_CACHE_SIZE='0')
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{command[2]} exited with status {process.returncode}')
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{command[2]} did not start within {timeout}s')
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+async def fetch(port: int, path: str) -> Tuple[int, float]:
+    """Make one GET request on a new connection. Returns the status and duration."""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    status = int(response.split(b' ', 2)[1]) if response.startswith(b'HTTP/') else 0
+    return status, time.perf_counter() - started
+
+async def load(port: int, paths: Sequence[str], concurrency: int, duration: float) -> Dict[str, Any]:
+    """Keep concurrency requests in flight for duration seconds."""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client(offset: int):
+        nonlocal errors
+        index = offset
+        while time.monotonic() < deadline:
+            try:
+                status, seconds = await fetch(port, paths[index % len(paths)])
+            except OSError:
+                status, seconds = 0, 0.0
+            if status == 200:
+                latencies.append(seconds)
+            else:
+                errors += 1
+            index += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+    elapsed = time.monotonic() - started
+    return dict(summarize(latencies), errors=errors,
+                requests_per_second=round(len(latencies) / elapsed, 1))
+
+def dashboard_paths(bind, services: int, nodes: int) -> List[str]:
+    """Requests a dashboard refresh makes: a day of buckets and the newest page per series."""
+    end = seed.latest_timestamp(bind).astimezone(timezone.utc)
+    start = end - timedelta(hours=24)
+    window = f'start_time={start:%Y-%m-%dT%H:%M:%SZ}&end_time={end:%Y-%m-%dT%H:%M:%SZ}'
+    names = seed.series_names(services, nodes)
+    paths = []
+    for kind, prefix in (('service', 'services'), ('node', 'nodes')):
+        for name in names[kind]:
+            paths.append(f'/api/{prefix}/{name}/metrics/aggregate?{window}&step=300&fn=avg,max')
+            paths.append(f'/api/{prefix}/{name}/metrics?limit=100&fields=cpu_usage,memory_usage')
+    return paths
+
+def run(database_url: str, bind, rows: int = 100000, concurrency: Sequence[int] = (10, 100, 300),
+        duration: float = 10.0, wsgi_workers: int = 4, asgi_workers: int = 1,
+        services: int = 10, nodes: int = 2) -> Dict[str, Any]:
+    """Compare both servers at each concurrency level on a database of at least rows samples."""
+    Base.metadata.create_all(bind=bind)
+    existing = seed.count_rows(bind)
+    if existing < rows:
+        seed.seed(bind, rows - existing, services, nodes)
+    paths = dashboard_paths(bind, services, nodes)
+
+    report = {'rows': seed.count_rows(bind), 'wsgi_workers': wsgi_workers, 'asgi_workers': asgi_workers}
+    for variant in ('wsgi', 'asgi'):
+        port = free_port()
+        process = start_server(server_commands(port, wsgi_workers, asgi_workers)[variant], port, database_url)
+        try:
+            asyncio.run(load(port, paths, 2, 1.0))
+            report[variant] = {
+                f'concurrency_{level}': asyncio.run(load(port, paths, level, duration))
+                for level in concurrency
+            }
+        finally:
+            stop_server(process)
+    return report
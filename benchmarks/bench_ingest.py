@@ -0,0 +1,75 @@
+"""Ingest throughput: collected samples through ``CollectionManager`` into the database."""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Sequence
+from src.collectors.collection_manager import CollectionManager
+from src.collectors.hot_window import HotWindow
+from src.utils.database import Base
+from src.utils.write_buffer import WriteBuffer
+from .common import summarize
+
+def collected_results(services: int, cycles: int, interval: int = 60) -> List[List[Dict[str, Any]]]:
+    """Build what the collectors would return over cycles collection cycles."""
+    start = datetime.now(timezone.utc) - timedelta(seconds=interval * cycles)
+    results = []
+    for cycle in range(cycles):
+        timestamp = start + timedelta(seconds=interval * cycle)
+        batch = [{
+            'service_name': f'service-{index:03d}',
+            'timestamp': timestamp,
+            'cpu_usage': float(cycle % 100),
+            'memory_usage': 40.0 + index,
+            'network_in': 1000.0 * cycle,
+            'network_out': 500.0 * cycle,
+            'disk_usage': 55.0,
+            'additional_metrics': {'num_threads': 8, 'status': 'running'}
+        } for index in range(services)]
+        batch.append({
+            'node_id': 'node-00',
+            'timestamp': timestamp,
+            'cpu_usage': 25.0,
+            'memory_usage': 50.0,
+            'disk_usage': 55.0,
+            'network_in': 2000.0 * cycle,
+            'network_out': 1000.0 * cycle,
+            'additional_metrics': {'cpu_count': 8}
+        })
+        results.append(batch)
+    return results
+
+def run(bind, samples: int = 100000, services: int = 50,
+        flush_sizes: Sequence[int] = (100, 500, 5000)) -> Dict[str, Any]:
+    """Measure samples per second from ``_store_metrics`` to committed rows.
+
+    The write buffer is flushed inline whenever ``flush_size`` samples are
+    queued, as its background flusher would, so the figure covers queueing,
+    the hot window, the executemany insert and the catalog upsert.
+    """
+    cycles = max(samples // (services + 1), 1)
+    results = collected_results(services, cycles)
+    report = {}
+    for flush_size in flush_sizes:
+        Base.metadata.drop_all(bind=bind)
+        Base.metadata.create_all(bind=bind)
+        buffer = WriteBuffer(max_size=flush_size + services + 1, flush_size=flush_size, bind=bind)
+        manager = CollectionManager([], write_buffer=buffer, hot_window=HotWindow())
+
+        flushes = []
+        started = time.perf_counter()
+        for batch in results:
+            manager._store_metrics(batch)
+            if len(buffer) >= flush_size:
+                flush_started = time.perf_counter()
+                buffer.flush()
+                flushes.append(time.perf_counter() - flush_started)
+        buffer.flush()
+        elapsed = time.perf_counter() - started
+
+        report[f'flush_size_{flush_size}'] = {
+            'samples': buffer.rows_flushed,
+            'dropped': buffer.dropped,
+            'seconds': round(elapsed, 3),
+            'samples_per_second': round(buffer.rows_flushed / elapsed, 1),
+            'flush': summarize(flushes)
+        }
+    return report
@@ -0,0 +1,116 @@
+"""Row layout against sealed chunks: file size and range scan speed.
+
+The same synthetic history is measured twice on one SQLite file: first as
+raw rows (rolled up, as in production), then after the chunk sealer has
+moved every closed window into compressed chunks. The file is vacuumed
+before each size measurement so freed pages are not counted, and the pages
+of the sample tables and their indexes are reported separately from the
+whole file when SQLite has the dbstat table.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from src.api.queries import read_rows, aggregate_series
+from src.collectors.chunk_sealer import ChunkSealer
+from src.collectors.rollup_manager import RollupManager
+from src.utils.database import Base
+from src.utils.models import ServiceMetrics, MetricChunk
+from . import seed
+from .common import measure
+
+# Scanned ranges, ending at the newest sample
+SCAN_RANGES = {
+    '1h': timedelta(hours=1),
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7)
+}
+
+# Tables holding samples in either layout; their indexes are counted too
+SAMPLE_TABLES = ('service_metrics', 'node_metrics', 'metric_chunks')
+
+def file_bytes(bind, path: str) -> int:
+    """Get the size of the database file after reclaiming free pages."""
+    with bind.connect() as conn:
+        conn.exec_driver_sql('VACUUM')
+    return os.path.getsize(path)
+
+def sample_bytes(bind) -> Optional[int]:
+    """Get the pages used by the sample tables and their indexes, or None without dbstat."""
+    placeholders = ', '.join('?' for _ in SAMPLE_TABLES)
+    with bind.connect() as conn:
+        try:
+            return conn.exec_driver_sql(
+                'SELECT SUM(pgsize) FROM dbstat WHERE name IN '
+                f'(SELECT name FROM sqlite_master WHERE tbl_name IN ({placeholders}))',
+                SAMPLE_TABLES
+            ).scalar()
+        except OperationalError:
+            return None
+
+def scan_calls(bind, series: str, end: datetime) -> Dict[str, Any]:
+    """Build the scans to time: every row of a range, and its raw 5-minute last values."""
+    calls = {}
+    for name, span in SCAN_RANGES.items():
+        start = end - span
+
+        def scan(start=start):
+            with Session(bind) as db:
+                return list(read_rows(db, ServiceMetrics, series, start, end, limit=None))
+
+        def last(start=start):
+            # ``last`` is never answered from rollups, so this reads every sample
+            with Session(bind) as db:
+                return aggregate_series(db, ServiceMetrics, series, ['cpu_usage'], ['last'], 300, start, end)
+
+        calls[f'scan_{name}'] = scan
+        calls[f'last_{name}'] = last
+    return calls
+
+def run(path: str, rows: int = 1000000, services: int = 10, nodes: int = 2,
+        duration: int = 7200, iterations: int = 20) -> Dict[str, Any]:
+    """Measure storage and scans of rows samples before and after sealing."""
+    if os.path.exists(path):
+        os.remove(path)
+    bind = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(bind=bind)
+    seed.seed(bind, rows, services, nodes)
+    end = seed.latest_timestamp(bind).replace(tzinfo=timezone.utc)
+    series = seed.series_names(services, nodes)['service'][0]
+    RollupManager(bind=bind).run_once(now=end + timedelta(days=2))
+
+    report: Dict[str, Any] = {'rows': rows, 'chunk_duration': duration}
+    calls = scan_calls(bind, series, end)
+    report['row_layout'] = {'file_bytes': file_bytes(bind, path), 'sample_bytes': sample_bytes(bind)}
+    report['row_layout'].update({name: measure(call, iterations) for name, call in calls.items()})
+
+    sealed = ChunkSealer(duration=duration, bind=bind).run_once(now=end + timedelta(days=2))
+    with bind.connect() as conn:
+        chunks, chunk_bytes = conn.execute(
+            select(func.count(MetricChunk.id), func.sum(func.length(MetricChunk.data)))
+        ).one()
+        remaining = conn.execute(text('SELECT COUNT(*) FROM service_metrics')).scalar()
+    report['chunks'] = {
+        'file_bytes': file_bytes(bind, path),
+        'sample_bytes': sample_bytes(bind),
+        'rows_sealed': sealed,
+        'rows_left': remaining,
+        'chunk_count': chunks,
+        'encoded_bytes_per_sample': round(chunk_bytes / sealed, 2) if sealed else 0.0
+    }
+    report['chunks'].update({name: measure(call, iterations) for name, call in calls.items()})
+
+    # Rollups and the catalog are the same in both layouts and dilute the file ratio
+    report['file_compression_ratio'] = round(report['row_layout']['file_bytes'] / report['chunks']['file_bytes'], 2)
+    if report['row_layout']['sample_bytes'] and report['chunks']['sample_bytes']:
+        report['compression_ratio'] = round(
+            report['row_layout']['sample_bytes'] / report['chunks']['sample_bytes'], 2
+        )
+    report['scan_speedup'] = {
+        name: round(report['row_layout'][name]['p50_ms'] / report['chunks'][name]['p50_ms'], 2)
+        for name in calls if report['chunks'][name]['p50_ms']
+    }
+    bind.dispose()
+    return report
@@ -0,0 +1,78 @@
+import json
+import math
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Get a nearest-rank percentile (0-1) of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    rank = min(max(math.ceil(fraction * len(ordered)), 1), len(ordered))
+    return ordered[rank - 1]
+
+def summarize(seconds: List[float]) -> Dict[str, Any]:
+    """Summarise a list of durations in seconds as milliseconds."""
+    ordered = sorted(seconds)
+    to_ms = lambda value: round(value * 1000, 3)
+    return {
+        'count': len(ordered),
+        'min_ms': to_ms(ordered[0]) if ordered else 0.0,
+        'p50_ms': to_ms(percentile(ordered, 0.5)),
+        'p90_ms': to_ms(percentile(ordered, 0.9)),
+        'p99_ms': to_ms(percentile(ordered, 0.99)),
+        'max_ms': to_ms(ordered[-1]) if ordered else 0.0,
+        'mean_ms': to_ms(sum(ordered) / len(ordered)) if ordered else 0.0
+    }
+
+def measure(call: Callable[[], Any], iterations: int, warmup: int = 3) -> Dict[str, Any]:
+    """Time call() iterations times after a few untimed warm-up calls."""
+    for _ in range(warmup):
+        call()
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - started)
+    return summarize(durations)
+
+def git_commit() -> str:
+    """Get the commit the benchmarks ran against, marked dirty if the tree has changes."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+def environment() -> Dict[str, Any]:
+    """Describe where the benchmarks ran, so results are only compared like for like."""
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'sqlite': sqlite3.sqlite_version,
+        'argv': sys.argv[1:]
+    }
+
+def write_results(path: str, results: Dict[str, Any]) -> None:
+    """Write benchmark results as indented JSON."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
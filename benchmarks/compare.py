@@ -0,0 +1,62 @@
+"""Compare two benchmark result files.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.2
+
+Prints every latency and throughput figure present in both files with its
+relative change, and exits with status 1 if any got worse by more than the
+threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict
+
+# Figures where lower is better and higher is better, by key suffix
+LOWER_IS_BETTER = ('p50_ms', 'p99_ms', 'cold_cycle_ms')
+HIGHER_IS_BETTER = ('samples_per_second', 'requests_per_second')
+
+def flatten(results: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    """Flatten nested results into dotted keys for the comparable figures."""
+    figures = {}
+    for key, value in results.items():
+        path = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            figures.update(flatten(value, path))
+        elif key in LOWER_IS_BETTER + HIGHER_IS_BETTER and isinstance(value, (int, float)):
+            figures[path] = float(value)
+    return figures
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> int:
+    """Print the changes between two result files. Returns the number of regressions."""
+    before = flatten(baseline.get('results', {}))
+    after = flatten(candidate.get('results', {}))
+    regressions = 0
+    for path in sorted(set(before) & set(after)):
+        old, new = before[path], after[path]
+        change = (new - old) / old if old else 0.0
+        worse = -change if path.endswith(HIGHER_IS_BETTER) else change
+        marker = ''
+        if worse > threshold:
+            regressions += 1
+            marker = '  REGRESSION'
+        print(f'{path:<70} {old:>12.3f} {new:>12.3f} {change:>+8.1%}{marker}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown counted as a regression (default: 0.2)')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"Baseline {baseline['environment']['commit']}, candidate {candidate['environment']['commit']}")
+    regressions = compare(baseline, candidate, args.threshold)
+    print(f'{regressions} regression(s) beyond {args.threshold:.0%}')
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Run the benchmark suite and write the results as JSON.
+
+    python -m benchmarks.run --output benchmark-results.json
+    python -m benchmarks.run --only api --sizes 1000000,5000000 --database data/benchmark.db
+
+Every benchmark works on its own SQLite files in a temporary directory
+unless --database is given, so the application database is never touched.
+"""
+import argparse
+import os
+import tempfile
+import time
+from .common import environment, write_results
+
+BENCHMARKS = ('ingest', 'collectors', 'api', 'concurrency', 'storage')
+
+def int_list(value: str):
+    return [int(item) for item in value.split(',') if item]
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite.')
+    parser.add_argument('--output', default='benchmark-results.json', help='Results file (default: benchmark-results.json)')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help=f'Comma-separated benchmarks to run (default: {",".join(BENCHMARKS)})')
+    parser.add_argument('--database', help='SQLite file for the API benchmark; reused and grown between runs (default: a temporary file)')
+    parser.add_argument('--sizes', type=int_list, default=[100000, 1000000], help='Table sizes for the API benchmark (default: 100000,1000000)')
+    parser.add_argument('--depths', type=int_list, default=[0, 1000, 10000, 100000], help='Page depths for the API benchmark (default: 0,1000,10000,100000)')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint (default: 50)')
+    parser.add_argument('--ingest-samples', type=int, default=100000, help='Samples for the ingest benchmark (default: 100000)')
+    parser.add_argument('--flush-sizes', type=int_list, default=[100, 500, 5000], help='Write buffer flush sizes for the ingest benchmark (default: 100,500,5000)')
+    parser.add_argument('--processes', type=int_list, default=[100, 1000, 10000], help='Mocked process counts for the collector benchmark (default: 100,1000,10000)')
+    parser.add_argument('--concurrency', type=int_list, default=[10, 100, 300], help='Concurrent clients for the WSGI/ASGI comparison (default: 10,100,300)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per concurrency level (default: 10)')
+    parser.add_argument('--wsgi-workers', type=int, default=4, help='gunicorn workers for the WSGI server (default: 4)')
+    parser.add_argument('--asgi-workers', type=int, default=1, help='uvicorn workers for the ASGI server (default: 1)')
+    parser.add_argument('--chunk-duration', type=int, default=7200, help='Seconds per sealed chunk for the storage benchmark (default: 7200)')
+    parser.add_argument('--cycles', type=int, default=20, help='Timed cycles per process count (default: 20)')
+    args = parser.parse_args()
+
+    selected = [name for name in args.only.split(',') if name]
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'Unknown benchmarks: {", ".join(unknown)}')
+
+    workdir = tempfile.mkdtemp(prefix='metrics-bench-')
+    database = os.path.abspath(args.database or os.path.join(workdir, 'api.db'))
+    # The application engine reads DATABASE_URL on import, so set it first
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    # Only the benchmarks themselves may write to the databases
+    os.environ['COLLECTION_ENABLED'] = 'false'
+
+    from sqlalchemy import create_engine
+    from src.utils.database import engine
+    results = {
+        'environment': environment(),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': {}
+    }
+    started = time.perf_counter()
+
+    if 'ingest' in selected:
+        from . import bench_ingest
+        print('Running ingest benchmark...')
+        bind = create_engine(f'sqlite:///{os.path.join(workdir, "ingest.db")}')
+        results['results']['ingest'] = bench_ingest.run(
+            bind, samples=args.ingest_samples, flush_sizes=args.flush_sizes
+        )
+    if 'collectors' in selected:
+        from . import bench_collectors
+        print('Running collector benchmark...')
+        results['results']['collectors'] = bench_collectors.run(
+            process_counts=args.processes, cycles=args.cycles
+        )
+    if 'api' in selected:
+        from app import app
+        from . import bench_api
+        print(f'Running API benchmark against {database}...')
+        results['results']['api'] = bench_api.run(
+            app, engine, sizes=args.sizes, depths=args.depths, iterations=args.iterations
+        )
+
+    if 'concurrency' in selected:
+        from . import bench_concurrency
+        print(f'Running WSGI/ASGI concurrency benchmark against {database}...')
+        results['results']['concurrency'] = bench_concurrency.run(
+            os.environ['DATABASE_URL'], engine, rows=min(args.sizes),
+            concurrency=args.concurrency, duration=args.duration,
+            wsgi_workers=args.wsgi_workers, asgi_workers=args.asgi_workers
+        )
+
+    if 'storage' in selected:
+        from . import bench_storage
+        print('Running storage benchmark (rows against sealed chunks)...')
+        results['results']['storage'] = bench_storage.run(
+            os.path.join(workdir, 'storage.db'), rows=min(args.sizes),
+            duration=args.chunk_duration, iterations=args.iterations
+        )
+
+    results['total_seconds'] = round(time.perf_counter() - started, 3)
+    write_results(args.output, results)
+    print(f'Wrote {args.output} in {results["total_seconds"]:.1f}s')
+
+if __name__ == '__main__':
+    main()
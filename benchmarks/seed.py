@@ -0,0 +1,136 @@
+"""Seed a database with synthetic service and node metrics.
+
+    python -m benchmarks.seed --rows 5000000 --database data/benchmark.db
+
+Rows are appended after the newest existing sample, so running it again
+grows the same tables further.
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine, func, insert, select
+from src.utils.database import Base
+from src.utils.models import ServiceMetrics, NodeMetrics
+from src.utils.series_catalog import update_catalog
+
+# Tables and series columns, by sample type
+TABLES = {
+    'service': ServiceMetrics,
+    'node': NodeMetrics
+}
+SERIES_KEYS = {
+    'service': 'service_name',
+    'node': 'node_id'
+}
+
+# Rows written per transaction
+CHUNK_SIZE = 10000
+
+def series_names(services: int, nodes: int) -> Dict[str, List[str]]:
+    """Get the synthetic series names of each type."""
+    return {
+        'service': [f'service-{index:03d}' for index in range(services)],
+        'node': [f'node-{index:02d}' for index in range(nodes)]
+    }
+
+def synthetic_record(kind: str, series: str, timestamp: datetime, step: int,
+                     rng: random.Random) -> Dict[str, Any]:
+    """Build one plausible sample: a daily cycle plus noise."""
+    phase = (step % 1440) / 1440 * 2 * math.pi
+    record = {
+        SERIES_KEYS[kind]: series,
+        'timestamp': timestamp,
+        'cpu_usage': round(max(0.0, 30 + 20 * math.sin(phase) + rng.gauss(0, 5)), 1),
+        'memory_usage': round(40 + 10 * math.sin(phase / 2) + rng.random() * 2, 2),
+        'network_in': round(rng.expovariate(1 / 50000), 1),
+        'network_out': round(rng.expovariate(1 / 20000), 1),
+        'disk_usage': round(55 + step * 1e-5, 2)
+    }
+    if kind == 'service':
+        record['additional_metrics'] = {'num_threads': rng.randint(4, 32), 'status': 'running'}
+    else:
+        record['additional_metrics'] = {'cpu_count': 8, 'load_avg': round(rng.random() * 4, 2)}
+    return record
+
+def latest_timestamp(bind) -> Optional[datetime]:
+    """Get the newest sample timestamp in either table, or None if both are empty."""
+    with bind.connect() as conn:
+        latest = [conn.execute(select(func.max(model.timestamp))).scalar() for model in TABLES.values()]
+    latest = [value for value in latest if value is not None]
+    if not latest:
+        return None
+    newest = max(latest)
+    return newest if newest.tzinfo else newest.replace(tzinfo=timezone.utc)
+
+def count_rows(bind) -> int:
+    """Get the number of samples in both metrics tables."""
+    with bind.connect() as conn:
+        return sum(
+            conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+            for model in TABLES.values()
+        )
+
+def _write(bind, batches: Dict[str, List[Dict[str, Any]]]) -> None:
+    with bind.begin() as conn:
+        for kind, records in batches.items():
+            if records:
+                conn.execute(insert(TABLES[kind].__table__), records)
+                update_catalog(conn, kind, records)
+                records.clear()
+
+def seed(bind, rows: int, services: int = 10, nodes: int = 2, interval: int = 60,
+         start: Optional[datetime] = None, seed_value: int = 0) -> datetime:
+    """Append rows synthetic samples, one per series every interval seconds.
+
+    Samples continue after the newest existing one, or begin at start
+    (default: far enough back that they end now). Returns the timestamp of
+    the last sample written.
+    """
+    names = series_names(services, nodes)
+    per_step = services + nodes
+    steps = math.ceil(rows / per_step)
+    latest = latest_timestamp(bind)
+    if latest is not None:
+        first = latest + timedelta(seconds=interval)
+    else:
+        first = start or datetime.now(timezone.utc) - timedelta(seconds=interval * steps)
+
+    rng = random.Random(seed_value)
+    batches: Dict[str, List[Dict[str, Any]]] = {'service': [], 'node': []}
+    written = 0
+    timestamp = first
+    for step in range(steps):
+        timestamp = first + timedelta(seconds=interval * step)
+        for kind, series_list in names.items():
+            for series in series_list:
+                if written == rows:
+                    break
+                batches[kind].append(synthetic_record(kind, series, timestamp, step, rng))
+                written += 1
+        if len(batches['service']) + len(batches['node']) >= CHUNK_SIZE:
+            _write(bind, batches)
+    _write(bind, batches)
+    return timestamp
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a database with synthetic metrics.')
+    parser.add_argument('--rows', type=int, default=1000000, help='Samples to add (default: 1000000)')
+    parser.add_argument('--database', default='data/benchmark.db', help='SQLite file to seed (default: data/benchmark.db)')
+    parser.add_argument('--services', type=int, default=10, help='Number of service series (default: 10)')
+    parser.add_argument('--nodes', type=int, default=2, help='Number of node series (default: 2)')
+    parser.add_argument('--interval', type=int, default=60, help='Seconds between samples of a series (default: 60)')
+    args = parser.parse_args()
+
+    bind = create_engine(f'sqlite:///{args.database}')
+    Base.metadata.create_all(bind=bind)
+    started = time.perf_counter()
+    seed(bind, args.rows, args.services, args.nodes, args.interval)
+    elapsed = time.perf_counter() - started
+    print(f"Added {args.rows} samples in {elapsed:.1f}s ({args.rows / elapsed:.0f}/s); "
+          f"{count_rows(bind)} samples in {args.database}")
+
+if __name__ == '__main__':
+    main()
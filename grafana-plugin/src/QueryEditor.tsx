@@ -24,6 +24,14 @@ const nodeMetrics = [
   { label: 'Network Out', value: 'network_out' },
 ];
 
+const aggregations = [
+  { label: 'Average', value: 'avg' },
+  { label: 'Minimum', value: 'min' },
+  { label: 'Maximum', value: 'max' },
+  { label: 'Last', value: 'last' },
+  { label: 'Count', value: 'count' },
+];
+
 type Props = QueryEditorProps<DataSource, OpenHorizonQuery, OpenHorizonDataSourceOptions>;
 
 export function QueryEditor({ query, onChange, onRunQuery }: Props) {
@@ -99,6 +107,14 @@ export function QueryEditor({ query, onChange, onRunQuery }: Props) {
     onRunQuery();
   };
 
+  const onAggregationChange = (value: string) => {
+    onChange({
+      ...query,
+      aggregation: value as OpenHorizonQuery['aggregation'],
+    });
+    onRunQuery();
+  };
+
   const onLimitChange = (event: React.ChangeEvent<HTMLInputElement>) => {
     onChange({
       ...query,
@@ -155,6 +171,17 @@ export function QueryEditor({ query, onChange, onRunQuery }: Props) {
         </InlineField>
       </InlineFieldRow>
 
+      <InlineFieldRow>
+        <InlineField label="Aggregation" labelWidth={14} tooltip="Ignored when a limit is set">
+          <Select
+            width={20}
+            options={aggregations}
+            value={query.aggregation || 'avg'}
+            onChange={(v) => onAggregationChange(v.value!)}
+          />
+        </InlineField>
+      </InlineFieldRow>
+
       <InlineFieldRow>
         <InlineField label="Limit" labelWidth={14}>
           <Input
@@ -1,5 +1,6 @@
 import { DataSource } from '../datasource';
 import { dateTime } from '@grafana/data';
+import { getBackendSrv } from '@grafana/runtime';
 
 describe('OpenHorizonMetricsDataSource', () => {
   let datasource: DataSource;
@@ -53,4 +54,35 @@ describe('OpenHorizonMetricsDataSource', () => {
     });
     expect(result.data).toBeDefined();
   });
-}); 
\ No newline at end of file
+
+  it('should batch targets into one aggregated query at the panel resolution', async () => {
+    const datasourceRequest = getBackendSrv().datasourceRequest as jest.Mock;
+    datasourceRequest.mockClear();
+    const query = { metric: 'cpu_usage', nodeId: 'node1', metricType: 'node' as const, refId: 'A' };
+    await datasource.query({
+      targets: [query],
+      requestId: 'test-request',
+      interval: '5m',
+      intervalMs: 300000,
+      maxDataPoints: 500,
+      range: { from: dateTime(), to: dateTime(), raw: { from: dateTime(), to: dateTime() } },
+      scopedVars: {},
+      timezone: 'UTC',
+      app: 'dashboard',
+      startTime: Date.now(),
+    });
+    expect(datasourceRequest).toHaveBeenCalledTimes(1);
+    const request = datasourceRequest.mock.calls[0][0];
+    expect(request.url).toBe('http://localhost:5000/query');
+    expect(request.method).toBe('POST');
+    expect(request.headers.Accept).toBe('application/vnd.openhorizon.columns+json');
+    expect(request.data.targets[0]).toMatchObject({
+      refId: 'A',
+      type: 'node',
+      series: 'node1',
+      fn: 'avg',
+      step: 300,
+      max_points: 500,
+    });
+  });
+});
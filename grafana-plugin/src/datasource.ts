@@ -16,17 +16,27 @@ export interface OpenHorizonQuery extends DataQuery {
   metricType: 'service' | 'node';
   metric: string;
   limit?: number;
+  aggregation?: 'avg' | 'min' | 'max' | 'last' | 'count';
 }
 
 export interface OpenHorizonDataSourceOptions extends DataSourceJsonData {
   url: string;
 }
 
-interface MetricPoint {
-  timestamp: string;
-  [key: string]: number | string;
+type MetricColumns = {
+  timestamp: number[];
+} & Record<string, Array<number | null>>;
+
+interface QueryResult {
+  refId: string;
+  step?: number;
+  columns?: MetricColumns;
+  error?: string;
 }
 
+// Asks the API for one array per field instead of one object per sample
+const COLUMNS_MIMETYPE = 'application/vnd.openhorizon.columns+json';
+
 export class DataSource extends DataSourceApi<OpenHorizonQuery, OpenHorizonDataSourceOptions> {
   url: string;
 
@@ -40,56 +50,71 @@ export class DataSource extends DataSourceApi<OpenHorizonQuery, OpenHorizonDataS
     const from = range?.from.toISOString();
     const to = range?.to.toISOString();
 
-    const promises = options.targets.map(async (target) => {
-      const query = this.buildQuery(target, from, to);
-      const response = await this.doRequest(query);
+    // All panel targets go out in one request so the API can merge them into
+    // as few database queries as possible.
+    const targets = options.targets.map((target) =>
+      this.buildTarget(target, from, to, options.intervalMs, options.maxDataPoints)
+    );
+    const response = await this.doRequest(`${this.url}/query`, 'POST', { targets }, { Accept: COLUMNS_MIMETYPE });
+    const results: QueryResult[] = response?.results ?? [];
 
+    const data = options.targets.map((target) => {
+      const columns = results.find((result) => result.refId === target.refId)?.columns;
       return new MutableDataFrame({
         refId: target.refId,
         fields: [
-          {
-            name: 'Time',
-            type: FieldType.time,
-            values: (response as MetricPoint[]).map((point) => new Date(point.timestamp).getTime()),
-          },
-          {
-            name: target.metric,
-            type: FieldType.number,
-            values: (response as MetricPoint[]).map((point) => point[target.metric]),
-          },
+          { name: 'Time', type: FieldType.time, values: columns?.timestamp ?? [] },
+          { name: target.metric, type: FieldType.number, values: columns?.[target.metric] ?? [] },
         ],
       });
     });
-
-    const data = await Promise.all(promises);
     return { data };
   }
 
-  private buildQuery(target: OpenHorizonQuery, from?: string, to?: string): string {
-    const baseUrl =
-      target.metricType === 'service'
-        ? `${this.url}/services/${target.serviceName}/metrics`
-        : `${this.url}/nodes/${target.nodeId}/metrics`;
-
-    const params = new URLSearchParams();
+  private buildTarget(
+    target: OpenHorizonQuery,
+    from?: string,
+    to?: string,
+    intervalMs?: number,
+    maxDataPoints?: number
+  ): Record<string, string | number> {
+    const query: Record<string, string | number> = {
+      refId: target.refId,
+      type: target.metricType,
+      series: (target.metricType === 'service' ? target.serviceName : target.nodeId) || '',
+      metric: target.metric,
+    };
     if (from) {
-      params.append('start_time', from);
+      query.start_time = from;
     }
     if (to) {
-      params.append('end_time', to);
+      query.end_time = to;
     }
+
+    // An explicit limit asks for raw samples; otherwise let the API bucket the
+    // range down to the resolution the panel can actually display.
     if (target.limit) {
-      params.append('limit', target.limit.toString());
+      query.limit = target.limit;
+      return query;
     }
 
-    return `${baseUrl}?${params.toString()}`;
+    query.fn = target.aggregation || 'avg';
+    if (intervalMs) {
+      query.step = Math.max(1, Math.round(intervalMs / 1000));
+    }
+    if (maxDataPoints) {
+      query.max_points = maxDataPoints;
+    }
+    return query;
   }
 
-  private async doRequest(query: string) {
+  private async doRequest(url: string, method = 'GET', data?: unknown, headers?: Record<string, string>) {
     try {
       const result = await getBackendSrv().datasourceRequest({
-        url: query,
-        method: 'GET',
+        url,
+        method,
+        data,
+        headers,
       });
       return result.data;
     } catch (err) {
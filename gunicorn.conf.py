@@ -0,0 +1,11 @@
+"""gunicorn settings, read from the working directory by default.
+
+Starts the background jobs in every worker once it has loaded the app, so
+they run in the workers whether or not the app is preloaded in the master.
+"""
+
+def post_worker_init(worker):
+    """Start the write flusher and compete for collection in this worker."""
+    from app import collection_enabled, start_background_jobs
+    if collection_enabled:
+        start_background_jobs()
@@ -0,0 +1,65 @@
+"""Initial metrics schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+Creates the tables as they were originally created by
+``Base.metadata.create_all``. Databases created by the application before
+migrations existed already have them and can simply be stamped:
+``alembic stamp 0001``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'service_metrics' not in existing:
+        op.create_table(
+            'service_metrics',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('service_name', sa.String()),
+            sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('cpu_usage', sa.Float()),
+            sa.Column('memory_usage', sa.Float()),
+            sa.Column('network_in', sa.Float()),
+            sa.Column('network_out', sa.Float()),
+            sa.Column('disk_usage', sa.Float()),
+            sa.Column('additional_metrics', sa.JSON()),
+        )
+        op.create_index('ix_service_metrics_id', 'service_metrics', ['id'])
+        op.create_index('ix_service_metrics_service_name', 'service_metrics', ['service_name'])
+        op.create_index('ix_service_metrics_timestamp', 'service_metrics', ['timestamp'])
+
+    if 'node_metrics' not in existing:
+        op.create_table(
+            'node_metrics',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('node_id', sa.String()),
+            sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('cpu_usage', sa.Float()),
+            sa.Column('memory_usage', sa.Float()),
+            sa.Column('disk_usage', sa.Float()),
+            sa.Column('network_in', sa.Float()),
+            sa.Column('network_out', sa.Float()),
+            sa.Column('additional_metrics', sa.JSON()),
+        )
+        op.create_index('ix_node_metrics_id', 'node_metrics', ['id'])
+        op.create_index('ix_node_metrics_node_id', 'node_metrics', ['node_id'])
+        op.create_index('ix_node_metrics_timestamp', 'node_metrics', ['timestamp'])
+
+
+def downgrade() -> None:
+    op.drop_table('node_metrics')
+    op.drop_table('service_metrics')
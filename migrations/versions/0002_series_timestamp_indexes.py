@@ -0,0 +1,48 @@
+"""Composite (series, timestamp) indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00.000000
+
+The metrics endpoints filter by series and sort by timestamp, which the
+separate single-column indexes cannot serve together. The composite index
+makes the series-only index redundant, so it is dropped.
+
+On SQLite, timestamps written by CURRENT_TIMESTAMP lack the fractional
+seconds SQLAlchemy writes, which breaks ordering and keyset comparisons
+between the two formats; they are normalised here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_service_metrics_series_timestamp', 'service_metrics',
+                    ['service_name', 'timestamp'], if_not_exists=True)
+    op.create_index('ix_node_metrics_series_timestamp', 'node_metrics',
+                    ['node_id', 'timestamp'], if_not_exists=True)
+    op.drop_index('ix_service_metrics_service_name', 'service_metrics', if_exists=True)
+    op.drop_index('ix_node_metrics_node_id', 'node_metrics', if_exists=True)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in ('service_metrics', 'node_metrics'):
+            op.execute(
+                f"UPDATE {table} SET timestamp = timestamp || '.000000' "
+                "WHERE length(timestamp) = 19"
+            )
+
+
+def downgrade() -> None:
+    op.create_index('ix_node_metrics_node_id', 'node_metrics', ['node_id'], if_not_exists=True)
+    op.create_index('ix_service_metrics_service_name', 'service_metrics',
+                    ['service_name'], if_not_exists=True)
+    op.drop_index('ix_node_metrics_series_timestamp', 'node_metrics', if_exists=True)
+    op.drop_index('ix_service_metrics_series_timestamp', 'service_metrics', if_exists=True)
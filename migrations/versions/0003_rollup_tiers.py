@@ -0,0 +1,56 @@
+"""Rollup tier tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds the per-series rollup buckets maintained by RollupManager and the
+watermark recording how far each tier has been rolled up. Tiers are filled
+in from existing history on the first run of the job.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+METRICS = ['cpu_usage', 'memory_usage', 'disk_usage', 'network_in', 'network_out']
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metric_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('series_type', sa.String(), nullable=False),
+        sa.Column('series', sa.String(), nullable=False),
+        sa.Column('resolution', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        *[
+            sa.Column(f'{metric}_{name}', sa.Float())
+            for metric in METRICS
+            for name in ('min', 'max', 'avg')
+        ],
+    )
+    op.create_index(
+        'ix_metric_rollups_series_bucket', 'metric_rollups',
+        ['series_type', 'series', 'resolution', 'bucket'], unique=True
+    )
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('series_type', sa.String(), primary_key=True),
+        sa.Column('resolution', sa.Integer(), primary_key=True),
+        sa.Column('watermark', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rollup_watermarks')
+    op.drop_index('ix_metric_rollups_series_bucket', 'metric_rollups')
+    op.drop_table('metric_rollups')
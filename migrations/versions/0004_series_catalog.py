@@ -0,0 +1,62 @@
+"""Series catalog
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds the catalog of known services and nodes that the ingest path upserts
+and the list endpoints read, and fills it in from existing history. Latest
+values are left empty for existing series until their next sample arrives.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOURCES = [('service', 'service_metrics', 'service_name'), ('node', 'node_metrics', 'node_id')]
+
+
+def upgrade() -> None:
+    # The application creates missing tables at startup, so the catalog may
+    # already exist (empty or partly filled) when this migration runs
+    if not sa.inspect(op.get_bind()).has_table('series_catalog'):
+        _create_table()
+    for series_type, table, column in SOURCES:
+        op.execute(
+            f"INSERT INTO series_catalog (series_type, series, first_seen, last_seen, sample_count) "
+            f"SELECT '{series_type}', {column}, MIN(timestamp), MAX(timestamp), COUNT(*) "
+            f"FROM {table} WHERE {column} IS NOT NULL AND {column} NOT IN "
+            f"(SELECT series FROM series_catalog WHERE series_type = '{series_type}') "
+            f"GROUP BY {column}"
+        )
+
+
+def _create_table() -> None:
+    op.create_table(
+        'series_catalog',
+        sa.Column('series_type', sa.String(), primary_key=True),
+        sa.Column('series', sa.String(), primary_key=True),
+        sa.Column('first_seen', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_seen', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('cpu_usage', sa.Float()),
+        sa.Column('memory_usage', sa.Float()),
+        sa.Column('disk_usage', sa.Float()),
+        sa.Column('network_in', sa.Float()),
+        sa.Column('network_out', sa.Float()),
+    )
+    op.create_index(
+        'ix_series_catalog_type_last_seen', 'series_catalog', ['series_type', 'last_seen']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_series_catalog_type_last_seen', 'series_catalog')
+    op.drop_table('series_catalog')
@@ -0,0 +1,180 @@
+"""Series inventory
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds the inventory of static service and node facts and the inventory_id
+column metric rows reference it by, then compacts existing rows: the facts
+are moved out of additional_metrics into one inventory row per distinct set
+of values. SQLite only returns the freed pages to the filesystem after a
+VACUUM.
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOURCES = [('service', 'service_metrics', 'service_name'), ('node', 'node_metrics', 'node_id')]
+
+# Facts moved into the inventory, by series type
+FACTS = {
+    'service': ('create_time',),
+    'node': ('cpu_count', 'memory_total', 'disk_total', 'boot_time')
+}
+
+# Rows read and rewritten per statement
+BATCH_SIZE = 5000
+
+inventory = sa.Table(
+    'series_inventory',
+    sa.MetaData(),
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('series_type', sa.String),
+    sa.Column('series', sa.String),
+    sa.Column('fingerprint', sa.String),
+    sa.Column('facts', sa.JSON),
+    sa.Column('first_seen', sa.DateTime(timezone=True)),
+)
+
+
+def _metrics_table(name: str, column: str) -> sa.TableClause:
+    return sa.table(
+        name,
+        sa.column('id', sa.Integer),
+        sa.column(column, sa.String),
+        sa.column('timestamp', sa.DateTime(timezone=True)),
+        sa.column('additional_metrics', sa.JSON),
+        sa.column('inventory_id', sa.Integer),
+    )
+
+
+def _fingerprint(facts: dict) -> str:
+    # Must match src.utils.inventory.fingerprint
+    return hashlib.sha1(json.dumps(facts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # The application creates missing tables at startup, so the inventory
+    # may already exist and hold rows when this migration runs
+    if not inspector.has_table('series_inventory'):
+        _create_table()
+    for _, table, _ in SOURCES:
+        if 'inventory_id' not in {column['name'] for column in inspector.get_columns(table)}:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.add_column(sa.Column('inventory_id', sa.Integer()))
+    for series_type, table, column in SOURCES:
+        _compact(bind, series_type, _metrics_table(table, column), column)
+
+
+def _create_table() -> None:
+    op.create_table(
+        'series_inventory',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('series_type', sa.String(), nullable=False),
+        sa.Column('series', sa.String(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('facts', sa.JSON(), nullable=False),
+        sa.Column('first_seen', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        'ix_series_inventory_series_fingerprint', 'series_inventory',
+        ['series_type', 'series', 'fingerprint'], unique=True
+    )
+
+
+def _compact(bind, series_type: str, table: sa.TableClause, column: str) -> None:
+    """Move the facts of every row into the inventory, one batch of ids at a time."""
+    names = FACTS[series_type]
+    known = {
+        (row.series, row.fingerprint): row.id
+        for row in bind.execute(
+            sa.select(inventory.c.id, inventory.c.series, inventory.c.fingerprint)
+            .where(inventory.c.series_type == series_type)
+        )
+    }
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c[column], table.c.timestamp, table.c.additional_metrics)
+            .where(table.c.id > last_id, table.c.additional_metrics.isnot(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            extra = row.additional_metrics
+            if not isinstance(extra, dict) or not any(name in extra for name in names):
+                continue
+            facts = {name: extra[name] for name in names if name in extra}
+            key = (row[1], _fingerprint(facts))
+            if key not in known:
+                known[key] = bind.execute(
+                    sa.insert(inventory).values(
+                        series_type=series_type, series=key[0], fingerprint=key[1],
+                        facts=facts, first_seen=row.timestamp
+                    )
+                ).inserted_primary_key[0]
+            updates.append({
+                'row_id': row.id,
+                'inventory_id': known[key],
+                'rest': {name: value for name, value in extra.items() if name not in names}
+            })
+        if updates:
+            bind.execute(
+                sa.update(table)
+                .where(table.c.id == sa.bindparam('row_id'))
+                .values(inventory_id=sa.bindparam('inventory_id'),
+                        additional_metrics=sa.bindparam('rest', type_=sa.JSON)),
+                updates
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for series_type, table, column in SOURCES:
+        facts = {
+            row.id: row.facts
+            for row in bind.execute(
+                sa.select(inventory.c.id, inventory.c.facts)
+                .where(inventory.c.series_type == series_type)
+            )
+        }
+        metrics = _metrics_table(table, column)
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(metrics.c.id, metrics.c.additional_metrics, metrics.c.inventory_id)
+                .where(metrics.c.id > last_id, metrics.c.inventory_id.isnot(None))
+                .order_by(metrics.c.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            bind.execute(
+                sa.update(metrics)
+                .where(metrics.c.id == sa.bindparam('row_id'))
+                .values(additional_metrics=sa.bindparam('restored', type_=sa.JSON)),
+                [{'row_id': row.id,
+                  'restored': {**(row.additional_metrics or {}), **facts.get(row.inventory_id, {})}}
+                 for row in rows]
+            )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('inventory_id')
+    op.drop_index('ix_series_inventory_series_fingerprint', 'series_inventory')
+    op.drop_table('series_inventory')
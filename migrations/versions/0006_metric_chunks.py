@@ -0,0 +1,82 @@
+"""Metric chunks
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds the table that the chunk sealer moves closed windows of raw rows into
+when CHUNK_STORAGE is enabled. Existing rows are sealed by the sealer itself
+on its first runs; downgrading decodes every chunk back into raw rows.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.chunks import decode_chunk, from_micros, CHUNK_METRICS
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOURCES = {'service': ('service_metrics', 'service_name'), 'node': ('node_metrics', 'node_id')}
+
+
+def upgrade() -> None:
+    # The application creates missing tables at startup
+    if sa.inspect(op.get_bind()).has_table('metric_chunks'):
+        return
+    op.create_table(
+        'metric_chunks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('series_type', sa.String(), nullable=False),
+        sa.Column('series', sa.String(), nullable=False),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+    )
+    op.create_index(
+        'ix_metric_chunks_series_end_time', 'metric_chunks', ['series_type', 'series', 'end_time']
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    chunks = sa.table(
+        'metric_chunks',
+        sa.column('id', sa.Integer),
+        sa.column('series_type', sa.String),
+        sa.column('series', sa.String),
+        sa.column('data', sa.LargeBinary),
+    )
+    last_id = 0
+    while True:
+        chunk = bind.execute(
+            sa.select(chunks).where(chunks.c.id > last_id).order_by(chunks.c.id).limit(1)
+        ).first()
+        if chunk is None:
+            break
+        last_id = chunk.id
+        table, column = SOURCES[chunk.series_type]
+        metrics = sa.table(
+            table,
+            sa.column('id', sa.Integer),
+            sa.column(column, sa.String),
+            sa.column('timestamp', sa.DateTime(timezone=True)),
+            sa.column('additional_metrics', sa.JSON),
+            sa.column('inventory_id', sa.Integer),
+            *[sa.column(name, sa.Float) for name in CHUNK_METRICS]
+        )
+        columns = decode_chunk(chunk.data)
+        rows = [
+            dict({name: columns[name][index] for name in columns},
+                 timestamp=from_micros(columns['timestamp'][index]), **{column: chunk.series})
+            for index in range(len(columns['id']))
+        ]
+        bind.execute(sa.insert(metrics), rows)
+    op.drop_index('ix_metric_chunks_series_end_time', 'metric_chunks')
+    op.drop_table('metric_chunks')
@@ -0,0 +1,41 @@
+"""Rollup metric counts
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds the number of non-null values of every metric to the rollup buckets, so
+averages are weighted by the values they were computed from rather than the
+sample count. Existing buckets cannot tell how many of their samples were
+null; they are assumed to have none where the average is set.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+METRICS = ['cpu_usage', 'memory_usage', 'disk_usage', 'network_in', 'network_out']
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('metric_rollups') as batch:
+        for metric in METRICS:
+            batch.add_column(sa.Column(f'{metric}_count', sa.Integer()))
+    for metric in METRICS:
+        op.execute(
+            f'UPDATE metric_rollups SET {metric}_count = '
+            f'CASE WHEN {metric}_avg IS NULL THEN 0 ELSE count END'
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('metric_rollups') as batch:
+        for metric in METRICS:
+            batch.drop_column(f'{metric}_count')
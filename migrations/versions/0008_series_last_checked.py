@@ -0,0 +1,33 @@
+"""Series last checked
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds the time of the newest collected sample to the series catalog,
+including samples suppressed by deadbands, so a series whose values hold
+steady can be told from one that stopped reporting. Existing entries start
+from their newest stored sample.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('series_catalog') as batch:
+        batch.add_column(sa.Column('last_checked', sa.DateTime(timezone=True)))
+    op.execute('UPDATE series_catalog SET last_checked = last_seen')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('series_catalog') as batch:
+        batch.drop_column('last_checked')
@@ -0,0 +1,131 @@
+import gzip
+import random
+import threading
+import urllib.error
+import urllib.request
+from typing import Optional, Tuple
+from .spool import Spool
+
+class Shipper:
+    """Ships spooled samples to a central instance's ``/api/ingest`` endpoint.
+
+    Batches of up to ``batch_size`` samples are gzip-compressed and posted;
+    the spool is only advanced once the central instance acknowledges a batch
+    with 202, so nothing is lost while it is unreachable. Failed attempts are
+    retried with exponential backoff and jitter, capped at ``max_backoff``
+    seconds, and a 429 waits for the server's Retry-After.
+
+    A batch refused with 400 is shipped again in halves until the samples
+    the server rejects are isolated; each is moved to the spool's rejected
+    file and the rest are shipped. A 413 halves ``batch_size`` for good, and
+    a single sample still too large is rejected the same way.
+    """
+
+    def __init__(self, spool: Spool, url: str, batch_size: int = 1000,
+                 interval: float = 10.0, max_backoff: float = 300.0, timeout: float = 30.0):
+        self.spool = spool
+        self.url = url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.backoff = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+        # Batch size while isolating the samples of a refused batch, and how many of them are left
+        self._split = 0
+        self._split_remaining = 0
+
+        self.batches_sent = 0
+        self.samples_sent = 0
+        self.samples_rejected = 0
+        self.failures = 0
+
+    def _post(self, body: bytes) -> Tuple[int, Optional[str]]:
+        """Post one compressed batch. Returns the status code and any Retry-After."""
+        request = urllib.request.Request(self.url, data=gzip.compress(body), method='POST', headers={
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip'
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Retry-After')
+
+    def _failed(self, retry_after: Optional[str] = None) -> float:
+        """Record a failed attempt and get the seconds to wait before the next one."""
+        self.failures += 1
+        self.backoff = min(max(self.backoff * 2, 1.0), self.max_backoff)
+        if retry_after and retry_after.isdigit():
+            return max(float(retry_after), 1.0)
+        return self.backoff * random.uniform(0.5, 1.0)
+
+    def _done(self, count: int) -> None:
+        """Count samples shipped or rejected against the refused batch being split."""
+        if self._split_remaining:
+            self._split_remaining = max(self._split_remaining - count, 0)
+            if not self._split_remaining:
+                self._split = 0
+
+    def ship_once(self) -> float:
+        """Try to ship one batch. Returns the seconds to wait before the next attempt."""
+        size = min(self._split, self.batch_size) if self._split else self.batch_size
+        body, end = self.spool.read_batch(size)
+        if not body:
+            return self.interval
+        count = body.count(b'\n')
+        try:
+            status, retry_after = self._post(body)
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Error shipping metrics to {self.url}: {str(e)}")
+            return self._failed()
+
+        if status == 202:
+            self.spool.ack(end)
+            self.backoff = 0.0
+            self.batches_sent += 1
+            self.samples_sent += count
+            self._done(count)
+            # Keep going while there is a backlog
+            return 0.0
+        if status in (400, 413) and count > 1:
+            if status == 413:
+                # The server's size limit holds for every later batch too
+                self.batch_size = max(count // 2, 1)
+            else:
+                self._split = max(count // 2, 1)
+                self._split_remaining = self._split_remaining or count
+            return 0.0
+        if status in (400, 413):
+            # Retrying a sample the server refuses would block the spool forever
+            print(f"Central instance refused a sample with {status}; moving it to {self.spool.rejected_path}")
+            self.spool.reject(body)
+            self.spool.ack(end)
+            self.samples_rejected += 1
+            self._done(count)
+            return 0.0
+        print(f"Central instance answered {status} to a batch of metrics")
+        return self._failed(retry_after)
+
+    def _ship_loop(self):
+        """Background loop shipping batches until stopped."""
+        while not self._stop_event.is_set():
+            delay = self.ship_once()
+            if delay:
+                self._stop_event.wait(delay)
+
+    def start(self):
+        """Start shipping in the background."""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._ship_loop)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop shipping; unshipped samples stay in the spool."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
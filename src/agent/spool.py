@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+class Spool:
+    """Size-capped, append-only on-disk queue of samples awaiting shipment.
+
+    Samples are appended as JSON lines to ``path``. The byte offset up to
+    which the central instance has acknowledged them is kept in
+    ``<path>.offset`` and survives restarts, so shipping resumes where it
+    stopped. Acknowledged bytes are reclaimed by rewriting the unacknowledged
+    tail when the file reaches ``max_bytes``; if it is still full, new
+    samples are dropped.
+
+    Exposes the ``push``/``start``/``stop`` interface of ``WriteBuffer`` so
+    ``CollectionManager`` can write to it directly.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.offset_path = path + '.offset'
+        self.rejected_path = path + '.rejected'
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'ab+')
+        self._truncate_partial_line()
+        self._size = self._file.seek(0, os.SEEK_END)
+        self._acked = self._read_offset()
+
+    def _truncate_partial_line(self) -> None:
+        """Drop a trailing line left incomplete by a crash mid-write."""
+        size = self._file.seek(0, os.SEEK_END)
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            self._file.seek(position - step)
+            chunk = self._file.read(step)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != size:
+            self._file.truncate(position)
+
+    def _read_offset(self) -> int:
+        try:
+            with open(self.offset_path) as f:
+                offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+        return offset if 0 <= offset <= self._size else 0
+
+    def _write_offset(self, offset: int) -> None:
+        """Persist the acknowledged offset atomically."""
+        temp_path = self.offset_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.offset_path)
+
+    def __len__(self) -> int:
+        """Get the number of bytes not yet acknowledged."""
+        return self._size - self._acked
+
+    def push(self, kind: str, record: Dict[str, Any]) -> bool:
+        """Append one sample. Returns False if the spool is full."""
+        sample = dict(record, type=kind)
+        if isinstance(sample.get('timestamp'), datetime):
+            sample['timestamp'] = sample['timestamp'].isoformat()
+        line = (json.dumps(sample, default=str, separators=(',', ':')) + '\n').encode()
+        with self._lock:
+            if self._size + len(line) > self.max_bytes:
+                self._compact()
+            if self._size + len(line) > self.max_bytes:
+                self.dropped += 1
+                return False
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+        return True
+
+    def read_batch(self, max_records: int) -> Tuple[bytes, int]:
+        """Get up to max_records unacknowledged lines and the offset just past them."""
+        with self._lock:
+            self._file.seek(self._acked)
+            lines: List[bytes] = []
+            end = self._acked
+            while len(lines) < max_records and end < self._size:
+                line = self._file.readline()
+                if not line.endswith(b'\n'):
+                    break
+                lines.append(line)
+                end += len(line)
+            return b''.join(lines), end
+
+    def ack(self, offset: int) -> None:
+        """Mark everything before offset as delivered."""
+        with self._lock:
+            if not self._acked < offset <= self._size:
+                return
+            if offset == self._size:
+                # Everything is delivered: start the file over instead of growing it
+                self._file.truncate(0)
+                self._size = offset = 0
+            self._acked = offset
+            self._write_offset(offset)
+
+    def reject(self, lines: bytes) -> None:
+        """Keep samples the central instance refused in ``<path>.rejected`` for inspection."""
+        with self._lock:
+            with open(self.rejected_path, 'ab') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _compact(self) -> None:
+        """Rewrite the file without its acknowledged head. Called with the lock held."""
+        if not self._acked:
+            return
+        temp_path = self.path + '.tmp'
+        self._file.seek(self._acked)
+        with open(temp_path, 'wb') as temp:
+            while True:
+                chunk = self._file.read(64 * 1024)
+                if not chunk:
+                    break
+                temp.write(chunk)
+            temp.flush()
+            os.fsync(temp.fileno())
+        # Reset the offset first: a crash in between re-sends samples rather than losing them
+        self._write_offset(0)
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'ab+')
+        self._size -= self._acked
+        self._acked = 0
+
+    def touch(self, kind: str, series: str, timestamp: datetime) -> None:
+        """Ignore a suppressed sample; not shipping those is the point of suppressing them."""
+
+    def start(self):
+        """Nothing to start; samples are written as they are pushed."""
+
+    def stop(self):
+        """Flush and close the spool file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get spool size and drop statistics."""
+        return {
+            'pending_bytes': len(self),
+            'file_bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'dropped': self.dropped
+        }
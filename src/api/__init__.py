@@ -1,13 +1,48 @@
-from flask_restx import Resource, reqparse
-from flask import request
-from datetime import datetime
-from sqlalchemy import desc
+import json
+import math
+from itertools import chain
+from flask_restx import Resource, reqparse, inputs
+from flask import request, current_app, stream_with_context, g
 from ..utils.database import get_db
 from ..utils.models import ServiceMetrics, NodeMetrics
+from .queries import read_rows, MAX_POINTS
+from .serializers import (
+    rows_to_dicts,
+    rows_to_columns,
+    rows_to_ndjson,
+    points_to_columns,
+    pack_columns,
+    COLUMNS_MIMETYPE,
+    MSGPACK_MIMETYPE,
+    NDJSON_MIMETYPE
+)
+from .handlers import (
+    response_format,
+    wants_stream,
+    page_query,
+    page_key,
+    aggregate_query,
+    aggregate_key,
+    series_validators,
+    is_not_modified,
+    fetch_page,
+    fetch_points,
+    page_headers,
+    latest_fields,
+    latest_rows,
+    catalog_entries,
+    batch_query,
+    batch_columns,
+    STREAM_BATCH_SIZE
+)
+from .ingest import parse_samples, MAX_INGEST_BYTES
 from .models import (
     api,
     service_metrics_model,
     node_metrics_model,
+    service_catalog_model,
+    node_catalog_model,
+    query_request_model,
     error_model,
     metrics_query_params
 )
@@ -16,8 +51,7 @@ from .models import (
 metrics_query_params = {
     'limit': {
         'type': int,
-        'default': 100,
-        'help': 'Number of records to return',
+        'help': 'Number of records to return (default: 100, or all when streaming)',
         'location': 'args'
     },
     'offset': {
@@ -35,15 +69,41 @@ metrics_query_params = {
         'type': str,
         'help': 'End time in ISO 8601 format (e.g., 2024-02-20T23:59:59Z)',
         'location': 'args'
+    },
+    'after': {
+        'type': str,
+        'help': 'Keyset cursor from the X-Next-Cursor header of the previous page',
+        'location': 'args'
+    },
+    'fields': {
+        'type': str,
+        'help': 'Comma-separated columns to return (default: all); the timestamp is always included and inventory joins in static facts',
+        'location': 'args'
+    },
+    'format': {
+        'type': str,
+        'choices': ('rows', 'columns', 'msgpack'),
+        'help': 'Response format; overrides the Accept header',
+        'location': 'args'
+    },
+    'stream': {
+        'type': inputs.boolean,
+        'default': False,
+        'help': 'Stream rows as newline-delimited JSON',
+        'location': 'args'
     }
 }
 
 # Define API documentation parameters
 api_doc_params = {
-    'limit': {'description': 'Number of records to return (default: 100)', 'type': 'integer', 'default': 100, 'example': 5},
+    'limit': {'description': 'Number of records to return (default: 100, or all when streaming)', 'type': 'integer', 'default': 100, 'example': 5},
     'offset': {'description': 'Number of records to skip (default: 0)', 'type': 'integer', 'default': 0, 'example': 0},
     'start_time': {'description': 'Start time in ISO 8601 format', 'type': 'string', 'example': '2024-02-20T00:00:00Z'},
-    'end_time': {'description': 'End time in ISO 8601 format', 'type': 'string', 'example': '2024-02-20T23:59:59Z'}
+    'end_time': {'description': 'End time in ISO 8601 format', 'type': 'string', 'example': '2024-02-20T23:59:59Z'},
+    'after': {'description': 'Cursor returned in the X-Next-Cursor header of the previous page. Takes precedence over offset and costs the same at any depth.', 'type': 'string'},
+    'fields': {'description': 'Comma-separated columns to return (default: all). Only these and the timestamp are read from the database. Add inventory to join in the static facts of each row (cpu_count, memory_total, ...).', 'type': 'string', 'example': 'cpu_usage,memory_usage'},
+    'format': {'description': 'Response format: rows (JSON objects), columns (JSON arrays) or msgpack. Overrides the Accept header.', 'type': 'string', 'enum': ['rows', 'columns', 'msgpack']},
+    'stream': {'description': 'Stream every matching row as newline-delimited JSON (same as Accept: application/x-ndjson). The limit defaults to no limit.', 'type': 'boolean', 'default': False}
 }
 
 # Create request parser for query parameters
@@ -51,6 +111,181 @@ parser = reqparse.RequestParser()
 for param, config in metrics_query_params.items():
     parser.add_argument(param, **config)
 
+# Query parameters for the aggregate endpoints
+aggregate_query_params = {
+    'step': {
+        'type': int,
+        'default': 60,
+        'help': 'Bucket width in seconds; widened if the range would exceed max_points buckets',
+        'location': 'args'
+    },
+    'fn': {
+        'type': str,
+        'default': 'avg',
+        'help': 'Comma-separated aggregation functions: avg, min, max, last, count',
+        'location': 'args'
+    },
+    'metrics': {
+        'type': str,
+        'help': 'Comma-separated metrics to aggregate (default: all)',
+        'location': 'args'
+    },
+    'max_points': {
+        'type': int,
+        'default': MAX_POINTS,
+        'help': f'Maximum number of buckets to return (at most {MAX_POINTS})',
+        'location': 'args'
+    },
+    'start_time': metrics_query_params['start_time'],
+    'end_time': metrics_query_params['end_time'],
+    'format': metrics_query_params['format']
+}
+
+aggregate_doc_params = {
+    'step': {'description': 'Bucket width in seconds (default: 60)', 'type': 'integer', 'default': 60, 'example': 300},
+    'fn': {'description': 'Comma-separated aggregation functions: avg, min, max, last, count (default: avg)', 'type': 'string', 'default': 'avg', 'example': 'avg,max'},
+    'metrics': {'description': 'Comma-separated metrics to aggregate (default: all)', 'type': 'string', 'example': 'cpu_usage'},
+    'max_points': {'description': f'Maximum number of buckets to return (default and maximum: {MAX_POINTS})', 'type': 'integer', 'default': MAX_POINTS},
+    'start_time': api_doc_params['start_time'],
+    'end_time': api_doc_params['end_time'],
+    'format': api_doc_params['format']
+}
+
+aggregate_parser = reqparse.RequestParser()
+for param, config in aggregate_query_params.items():
+    aggregate_parser.add_argument(param, **config)
+
+def request_db():
+    """Get a database session that is closed when the request ends.
+
+    A session that is merely dropped holds its pooled connection until the
+    garbage collector gets to it, which drains the pool under sustained load.
+    """
+    db = next(get_db())
+    g.setdefault('db_sessions', []).append(db)
+    return db
+
+def close_request_db(exception=None):
+    """Close the sessions opened by request_db during the request."""
+    for db in g.pop('db_sessions', ()):
+        db.close()
+
+def columnar_response(data, fmt, headers=None):
+    """Build a columnar JSON or msgpack response, bypassing flask-restx marshalling."""
+    if fmt == 'msgpack':
+        response = current_app.response_class(pack_columns(data), mimetype=MSGPACK_MIMETYPE)
+    else:
+        response = current_app.response_class(json.dumps(data), mimetype=COLUMNS_MIMETYPE)
+    response.headers.update(headers or {})
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def not_modified(validators):
+    """Build a 304 response if the client's copy matches the validators, else None."""
+    if not is_not_modified(validators, request.headers.get('If-None-Match'),
+                           request.headers.get('If-Modified-Since')):
+        return None
+    response = current_app.response_class(status=304)
+    response.headers.update(validators)
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def get_aggregated_metrics(model, series, not_found_error):
+    """Get a series aggregated into time buckets inside the database."""
+    args = aggregate_parser.parse_args()
+    try:
+        query = aggregate_query(args['fn'], args['metrics'], args['start_time'], args['end_time'],
+                                args['step'], args['max_points'])
+        fmt = response_format(args['format'], request.headers.get('Accept'))
+    except ValueError as e:
+        api.abort(400, error=str(e))
+
+    key = aggregate_key(model, series, query)
+    db = request_db()
+    validators = series_validators(db, model, series, key + (fmt,), request.headers.get('Accept'),
+                                   current_app.extensions.get('hot_window'))
+    response = not_modified(validators)
+    if response is not None:
+        return response
+
+    points = fetch_points(db, model, series, query)
+    if not points:
+        api.abort(404, error=not_found_error)
+    g.row_count = len(points)
+    headers = dict(validators, **{'X-Step': str(query['step'])})
+    if fmt != 'rows':
+        return columnar_response(points_to_columns(points), fmt, headers)
+    return points, 200, headers
+
+def stream_metrics(db, rows, fields, not_found_error):
+    """Stream rows from read_rows as newline-delimited JSON.
+
+    Rows are fetched from a server-side cursor in batches of STREAM_BATCH_SIZE
+    and written as they arrive, so memory stays flat however many are exported.
+    """
+    first = next(rows, None)
+    if first is None:
+        rows.close()
+        db.close()
+        api.abort(404, error=not_found_error)
+
+    def generate():
+        try:
+            yield from rows_to_ndjson(chain([first], rows), fields)
+        finally:
+            rows.close()
+            db.close()
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def get_latest_metrics(model, series, not_found_error):
+    """Get the newest sample of a series.
+
+    It comes from the hot window without a database query when this process
+    collects the series; other workers read it from the database.
+    """
+    # The session only checks out a connection if the hot window cannot answer
+    rows = latest_rows(request_db(), model, series, current_app.extensions.get('hot_window'))
+    if not rows:
+        api.abort(404, error=not_found_error)
+    return rows_to_dicts(rows, latest_fields(model))[0], 200
+
+def get_metrics_page(model, series, not_found_error):
+    """Get one page of metrics for a series, with the next-page cursor header."""
+    args = parser.parse_args()
+    stream = wants_stream(args['stream'], request.headers.get('Accept'))
+    try:
+        page = page_query(model, args['start_time'], args['end_time'], args['after'],
+                          args['fields'], args['limit'], args['offset'], stream)
+        fmt = response_format(args['format'], request.headers.get('Accept'))
+    except ValueError as e:
+        api.abort(400, error=str(e))
+
+    db = request_db()
+    if stream:
+        rows = read_rows(db, model, series, batch_size=STREAM_BATCH_SIZE, **page)
+        return stream_metrics(db, rows, page['fields'], not_found_error)
+
+    key = page_key(model, series, page)
+    hot_window = current_app.extensions.get('hot_window')
+    validators = series_validators(db, model, series, key + (fmt,), request.headers.get('Accept'),
+                                   hot_window)
+    response = not_modified(validators)
+    if response is not None:
+        return response
+
+    rows = fetch_page(db, model, series, page, hot_window)
+    if not rows:
+        api.abort(404, error=not_found_error)
+    g.row_count = len(rows)
+
+    headers = page_headers(validators, rows, page['limit'])
+    if fmt != 'rows':
+        return columnar_response(rows_to_columns(rows, page['fields']), fmt, headers)
+    return rows_to_dicts(rows, page['fields']), 200, headers
+
 # Define API tags
 api_tags = {
     'services': 'Service metrics operations',
@@ -86,41 +321,20 @@ class ServiceMetricsResource(Resource):
                      }
                  ]
              })
-    @api.marshal_list_with(service_metrics_model)
     def get(self, service_name):
         """Get metrics for a specific service.
         
-        Returns a list of metrics for the specified service, ordered by timestamp.
-        Supports pagination and time-based filtering.
+        Returns a list of metrics for the specified service, newest first.
+        Supports time-based filtering, column projection with ``fields`` and
+        offset or keyset (cursor) pagination; the cursor for the next page is
+        returned in the X-Next-Cursor header.
         
         **Authentication:** Not required.
         **Rate Limiting:** Not implemented.
         """
-        args = parser.parse_args()
-        db = next(get_db())
-        
-        query = db.query(ServiceMetrics).filter(
-            ServiceMetrics.service_name == service_name
+        return get_metrics_page(
+            ServiceMetrics, service_name, f'No metrics found for service {service_name}'
         )
-        
-        # Apply time filters if provided
-        if args['start_time']:
-            start_time = datetime.fromisoformat(args['start_time'])
-            query = query.filter(ServiceMetrics.timestamp >= start_time)
-        if args['end_time']:
-            end_time = datetime.fromisoformat(args['end_time'])
-            query = query.filter(ServiceMetrics.timestamp <= end_time)
-        
-        # Apply pagination
-        query = query.order_by(desc(ServiceMetrics.timestamp))
-        offset = args.get('offset', 0)
-        query = query.offset(offset).limit(args['limit'])
-        
-        metrics = query.all()
-        if not metrics:
-            api.abort(404, error=f'No metrics found for service {service_name}')
-        
-        return metrics
 
 @api.route('/nodes/<string:node_id>/metrics')
 @api.param('node_id', 'ID of the node to get metrics for')
@@ -151,47 +365,202 @@ class NodeMetricsResource(Resource):
                      }
                  ]
              })
-    @api.marshal_list_with(node_metrics_model)
     def get(self, node_id):
         """Get metrics for a specific node.
         
-        Returns a list of metrics for the specified node, ordered by timestamp.
-        Supports pagination and time-based filtering.
+        Returns a list of metrics for the specified node, newest first.
+        Supports time-based filtering, column projection with ``fields`` and
+        offset or keyset (cursor) pagination; the cursor for the next page is
+        returned in the X-Next-Cursor header.
         
         **Authentication:** Not required.
         **Rate Limiting:** Not implemented.
         """
-        args = parser.parse_args()
-        db = next(get_db())
-        
-        query = db.query(NodeMetrics).filter(
-            NodeMetrics.node_id == node_id
+        return get_metrics_page(
+            NodeMetrics, node_id, f'No metrics found for node {node_id}'
         )
-        
-        # Apply time filters if provided
-        if args['start_time']:
-            start_time = datetime.fromisoformat(args['start_time'])
-            query = query.filter(NodeMetrics.timestamp >= start_time)
-        if args['end_time']:
-            end_time = datetime.fromisoformat(args['end_time'])
-            query = query.filter(NodeMetrics.timestamp <= end_time)
-        
-        # Apply pagination
-        query = query.order_by(desc(NodeMetrics.timestamp))
-        offset = args.get('offset', 0)
-        query = query.offset(offset).limit(args['limit'])
-        
-        metrics = query.all()
-        if not metrics:
-            api.abort(404, error=f'No metrics found for node {node_id}')
-        
-        return metrics
+
+@api.route('/services/<string:service_name>/metrics/aggregate')
+@api.param('service_name', 'Name of the service to aggregate metrics for')
+@api.doc(tags=['services'])
+class ServiceMetricsAggregateResource(Resource):
+    @api.doc('aggregate_service_metrics',
+             params=aggregate_doc_params,
+             description='''Get metrics for a service aggregated into time buckets. The bucket width actually used is returned in the X-Step header.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
+             responses={
+                 200: 'Success',
+                 400: ('Invalid request', error_model),
+                 404: ('Service not found', error_model)
+             })
+    def get(self, service_name):
+        """Get aggregated metrics for a specific service.
+
+        Buckets are computed in the database with GROUP BY on truncated
+        timestamps, so at most max_points rows are returned per series.
+        """
+        return get_aggregated_metrics(
+            ServiceMetrics, service_name, f'No metrics found for service {service_name}'
+        )
+
+@api.route('/services/<string:service_name>/metrics/latest')
+@api.param('service_name', 'Name of the service to get the newest sample for')
+@api.doc(tags=['services'])
+class ServiceLatestMetricsResource(Resource):
+    @api.doc('get_latest_service_metrics',
+             description='''Get the newest sample collected for a service, served from memory when this process collects it and from the database otherwise.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
+             responses={
+                 200: 'Success',
+                 404: ('Service has no samples', error_model)
+             })
+    def get(self, service_name):
+        """Get the newest metrics sample of a service, from the hot window or the database."""
+        return get_latest_metrics(
+            ServiceMetrics, service_name, f'No recent metrics for service {service_name}'
+        )
+
+@api.route('/nodes/<string:node_id>/metrics/aggregate')
+@api.param('node_id', 'ID of the node to aggregate metrics for')
+@api.doc(tags=['nodes'])
+class NodeMetricsAggregateResource(Resource):
+    @api.doc('aggregate_node_metrics',
+             params=aggregate_doc_params,
+             description='''Get metrics for a node aggregated into time buckets. The bucket width actually used is returned in the X-Step header.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
+             responses={
+                 200: 'Success',
+                 400: ('Invalid request', error_model),
+                 404: ('Node not found', error_model)
+             })
+    def get(self, node_id):
+        """Get aggregated metrics for a specific node.
+
+        Buckets are computed in the database with GROUP BY on truncated
+        timestamps, so at most max_points rows are returned per series.
+        """
+        return get_aggregated_metrics(
+            NodeMetrics, node_id, f'No metrics found for node {node_id}'
+        )
+
+@api.route('/nodes/<string:node_id>/metrics/latest')
+@api.param('node_id', 'ID of the node to get the newest sample for')
+@api.doc(tags=['nodes'])
+class NodeLatestMetricsResource(Resource):
+    @api.doc('get_latest_node_metrics',
+             description='''Get the newest sample collected for a node, served from memory when this process collects it and from the database otherwise.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
+             responses={
+                 200: 'Success',
+                 404: ('Node has no samples', error_model)
+             })
+    def get(self, node_id):
+        """Get the newest metrics sample of a node, from the hot window or the database."""
+        return get_latest_metrics(
+            NodeMetrics, node_id, f'No recent metrics for node {node_id}'
+        )
+
+@api.route('/query')
+@api.doc(tags=['query'])
+class QueryResource(Resource):
+    @api.doc('batch_query',
+             description='''Answer several series queries in one request. Targets on the same table with the same function, step and time range are served by one merged SQL query.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
+             params={'format': api_doc_params['format']},
+             responses={
+                 200: 'Success',
+                 400: ('Invalid request', error_model)
+             })
+    @api.expect(query_request_model, validate=False)
+    def post(self):
+        """Query several series at once.
+
+        Returns ``{"results": [...]}`` with one entry per target, in order,
+        holding its refId, the step used and its points oldest first. A target
+        that fails validation gets an ``error`` instead of points. Columnar and
+        msgpack responses carry ``columns`` instead of ``points``.
+        """
+        try:
+            fmt = response_format(request.args.get('format'), request.headers.get('Accept'))
+            results = batch_query(request_db(), request.get_json(silent=True))
+        except ValueError as e:
+            api.abort(400, error=str(e))
+        g.row_count = sum(len(result.get('points', ())) for result in results)
+
+        if fmt != 'rows':
+            return columnar_response({'results': batch_columns(results)}, fmt)
+        return {'results': results}, 200
+
+# Query parameters for the series list endpoints
+catalog_parser = reqparse.RequestParser()
+catalog_parser.add_argument(
+    'seen_within', type=int, location='args',
+    help='Only list series with a sample in the last seen_within seconds'
+)
+
+catalog_doc_params = {
+    'seen_within': {'description': 'Only list series with a sample in the last seen_within seconds', 'type': 'integer', 'example': 3600}
+}
+
+def list_series(series_type):
+    """List the catalog entries of one series type."""
+    args = catalog_parser.parse_args()
+    try:
+        return catalog_entries(request_db(), series_type, args['seen_within'])
+    except ValueError as e:
+        api.abort(400, error=str(e))
+
+@api.route('/ingest')
+@api.doc(tags=['ingest'])
+class IngestResource(Resource):
+    @api.doc('ingest_samples',
+             description='''Store a batch of node and service samples sent by remote collectors. The body is newline-delimited JSON (application/x-ndjson) or msgpack (application/msgpack), optionally with Content-Encoding: gzip. Samples are validated as a whole and queued for bulk insertion.\n\n**Authentication:** Not required.\n**Rate Limiting:** Answers 429 with Retry-After while the write queue is full.''',
+             responses={
+                 202: 'Samples queued',
+                 400: ('Invalid batch', error_model),
+                 413: ('Body or batch too large', error_model),
+                 429: ('Write queue full; retry after Retry-After seconds', error_model)
+             })
+    def post(self):
+        """Queue a batch of remotely collected samples.
+
+        The batch is all or nothing: one invalid sample rejects it with 400,
+        and when the write queue cannot take all of it the request is refused
+        with 429 so the sender can back off and retry.
+        """
+        write_buffer = current_app.extensions['write_buffer']
+        # Refuse oversized bodies before reading them into memory
+        if request.content_length is not None and request.content_length > MAX_INGEST_BYTES:
+            api.abort(413, error=f'Body exceeds {MAX_INGEST_BYTES} bytes')
+        body = request.get_data(cache=False)
+        if len(body) > MAX_INGEST_BYTES:
+            # Chunked bodies have no Content-Length and are cut off at MAX_CONTENT_LENGTH instead
+            api.abort(413, error=f'Body exceeds {MAX_INGEST_BYTES} bytes')
+        try:
+            records = parse_samples(
+                body,
+                request.mimetype,
+                request.headers.get('Content-Encoding', '').strip().lower()
+            )
+        except ValueError as e:
+            api.abort(400, error=str(e))
+
+        count = sum(len(batch) for batch in records.values())
+        g.row_count = count
+        if count > write_buffer.max_size:
+            api.abort(413, error=f'Batch of {count} samples exceeds the write queue size of {write_buffer.max_size}')
+        retry_after = {'Retry-After': str(max(1, math.ceil(write_buffer.max_age)))}
+        if not write_buffer.has_room(count):
+            return {'error': 'Write queue is full'}, 429, retry_after
+
+        accepted = 0
+        for kind, batch in records.items():
+            if batch and not write_buffer.push_many(kind, batch):
+                return {'error': 'Write queue is full', 'accepted': accepted}, 429, retry_after
+            accepted += len(batch)
+        return {'accepted': accepted}, 202
 
 @api.route('/services')
 @api.doc(tags=['services'])
 class ServicesResource(Resource):
     @api.doc('list_services',
-             description='''List all services that have metrics data.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
+             params=catalog_doc_params,
+             description='''List all services that have metrics data, read from the series catalog.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
              responses={
                  200: ('Success', [{'service_name': 'example-service'}])
              },
@@ -200,24 +569,24 @@ class ServicesResource(Resource):
                      {'service_name': 'example-service'}
                  ]
              })
-    @api.marshal_list_with(service_metrics_model)
+    @api.marshal_list_with(service_catalog_model)
     def get(self):
         """List all services with metrics.
         
-        Returns a list of all services that have metrics data in the system.
+        Returns every service in the series catalog with when it was first
+        and last seen, its sample count and latest values.
         
         **Authentication:** Not required.
         **Rate Limiting:** Not implemented.
         """
-        db = next(get_db())
-        services = db.query(ServiceMetrics.service_name).distinct().all()
-        return [{'service_name': service[0]} for service in services]
+        return list_series('service')
 
 @api.route('/nodes')
 @api.doc(tags=['nodes'])
 class NodesResource(Resource):
     @api.doc('list_nodes',
-             description='''List all nodes that have metrics data.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
+             params=catalog_doc_params,
+             description='''List all nodes that have metrics data, read from the series catalog.\n\n**Authentication:** Not required.\n**Rate Limiting:** Not implemented.''',
              responses={
                  200: ('Success', [{'node_id': 'node-1'}])
              },
@@ -226,18 +595,17 @@ class NodesResource(Resource):
                      {'node_id': 'node-1'}
                  ]
              })
-    @api.marshal_list_with(node_metrics_model)
+    @api.marshal_list_with(node_catalog_model)
     def get(self):
         """List all nodes with metrics.
         
-        Returns a list of all nodes that have metrics data in the system.
+        Returns every node in the series catalog with when it was first and
+        last seen, its sample count and latest values.
         
         **Authentication:** Not required.
         **Rate Limiting:** Not implemented.
         """
-        db = next(get_db())
-        nodes = db.query(NodeMetrics.node_id).distinct().all()
-        return [{'node_id': node[0]} for node in nodes]
+        return list_series('node')
 
 @api.route('/health')
 @api.doc(tags=['health'], description='Health check endpoint. Returns API status.', responses={200: 'API is healthy'})
@@ -0,0 +1,318 @@
+"""ASGI variant of the read-only metrics API, built on Starlette.
+
+    uvicorn src.api.asgi:app --host 0.0.0.0 --port 5001
+
+Serves the metrics, aggregate, latest, batch query and series list endpoints
+with the statements and semantics of the Flask API, but over async
+SQLAlchemy sessions: a request waiting on the database yields to the event
+loop, so one process can keep hundreds of dashboard queries in flight
+instead of one per worker. It neither collects nor accepts ingestion; run
+it next to the Flask application against the same database.
+"""
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..utils.async_database import AsyncSessionLocal, async_engine
+from ..utils.instrumentation import stats
+from ..utils.models import ServiceMetrics, NodeMetrics
+from .cache import query_cache
+from .queries import read_rows
+from .serializers import (
+    serialize_value,
+    rows_to_dicts,
+    rows_to_columns,
+    points_to_columns,
+    pack_columns,
+    JSON_MIMETYPE,
+    COLUMNS_MIMETYPE,
+    MSGPACK_MIMETYPE,
+    NDJSON_MIMETYPE
+)
+from .handlers import (
+    parse_int,
+    response_format,
+    wants_stream,
+    page_query,
+    page_key,
+    aggregate_query,
+    aggregate_key,
+    series_validators,
+    is_not_modified,
+    fetch_page,
+    fetch_points,
+    page_headers,
+    latest_fields,
+    latest_rows,
+    catalog_entries,
+    batch_query,
+    batch_columns,
+    CATALOG_FIELDS,
+    STREAM_BATCH_SIZE
+)
+
+class JSONBody(JSONResponse):
+    """JSON response encoded like the Flask API's."""
+    media_type = JSON_MIMETYPE
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content).encode()
+
+def columnar_response(data: Any, fmt: str, headers: Dict[str, str]) -> Response:
+    """Build a columnar JSON or msgpack response."""
+    headers = dict(headers, Vary='Accept')
+    if fmt == 'msgpack':
+        return Response(pack_columns(data), headers=headers, media_type=MSGPACK_MIMETYPE)
+    return Response(json.dumps(data), headers=headers, media_type=COLUMNS_MIMETYPE)
+
+def not_modified(request: Request, validators: Dict[str, str]) -> Optional[Response]:
+    """Build a 304 response if the client's copy matches the validators, else None."""
+    if not is_not_modified(validators, request.headers.get('if-none-match'),
+                           request.headers.get('if-modified-since')):
+        return None
+    return Response(status_code=304, headers=dict(validators, Vary='Accept'))
+
+async def get_metrics_page(request: Request, model, series: str, not_found_error: str) -> Response:
+    """Get one page of metrics for a series, with the next-page cursor header."""
+    args = request.query_params
+    accept = request.headers.get('accept')
+    stream = args.get('stream', '').lower() in ('1', 'true', 'yes', 'on')
+    stream = wants_stream(stream, accept)
+    try:
+        page = page_query(model, args.get('start_time'), args.get('end_time'), args.get('after'),
+                          args.get('fields'), parse_int(args.get('limit'), 'limit'),
+                          parse_int(args.get('offset'), 'offset', 0), stream)
+        fmt = response_format(args.get('format'), accept)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if stream:
+        return await stream_metrics(model, series, page, not_found_error)
+
+    key = page_key(model, series, page)
+    async with AsyncSessionLocal() as session:
+        validators = await session.run_sync(series_validators, model, series, key + (fmt,), accept)
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+        rows = await session.run_sync(fetch_page, model, series, page)
+    if not rows:
+        raise HTTPException(404, not_found_error)
+
+    headers = page_headers(validators, rows, page['limit'])
+    if fmt != 'rows':
+        return columnar_response(rows_to_columns(rows, page['fields']), fmt, headers)
+    return JSONBody(rows_to_dicts(rows, page['fields']), headers=headers)
+
+async def stream_metrics(model, series: str, page: Dict[str, Any], not_found_error: str) -> Response:
+    """Stream rows from read_rows as newline-delimited JSON, one batch per round trip.
+
+    The row iterator is advanced inside ``run_sync``, so raw rows come from a
+    server-side cursor and sealed chunks are decoded as the stream reaches them.
+    """
+    session = AsyncSessionLocal()
+    rows = await session.run_sync(
+        lambda db: read_rows(db, model, series, batch_size=STREAM_BATCH_SIZE, **page)
+    )
+
+    async def close() -> None:
+        await session.run_sync(lambda db: rows.close())
+        await session.close()
+
+    batch = await session.run_sync(lambda db: list(islice(rows, STREAM_BATCH_SIZE)))
+    if not batch:
+        await close()
+        raise HTTPException(404, not_found_error)
+    fields = page['fields']
+
+    async def generate() -> AsyncIterator[bytes]:
+        nonlocal batch
+        try:
+            while batch:
+                yield b''.join(_ndjson_line(row, fields) for row in batch)
+                batch = await session.run_sync(lambda db: list(islice(rows, STREAM_BATCH_SIZE)))
+        finally:
+            await close()
+
+    return StreamingResponse(generate(), headers={'Vary': 'Accept'}, media_type=NDJSON_MIMETYPE)
+
+def _ndjson_line(row, fields: List[str]) -> bytes:
+    return (json.dumps({field: serialize_value(getattr(row, field)) for field in fields}) + '\n').encode()
+
+async def get_aggregated_metrics(request: Request, model, series: str, not_found_error: str) -> Response:
+    """Get a series aggregated into time buckets inside the database."""
+    args = request.query_params
+    accept = request.headers.get('accept')
+    try:
+        query = aggregate_query(args.get('fn'), args.get('metrics'), args.get('start_time'),
+                                args.get('end_time'), parse_int(args.get('step'), 'step'),
+                                parse_int(args.get('max_points'), 'max_points'))
+        fmt = response_format(args.get('format'), accept)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    key = aggregate_key(model, series, query)
+    async with AsyncSessionLocal() as session:
+        validators = await session.run_sync(series_validators, model, series, key + (fmt,), accept)
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+        # The synchronous query code runs unchanged on the async connection
+        points = await session.run_sync(fetch_points, model, series, query)
+    if not points:
+        raise HTTPException(404, not_found_error)
+
+    headers = dict(validators, **{'X-Step': str(query['step'])})
+    if fmt != 'rows':
+        return columnar_response(points_to_columns(points), fmt, headers)
+    return JSONBody(points, headers=headers)
+
+async def get_latest_metrics(request: Request, model, series: str, not_found_error: str) -> Response:
+    """Get the newest sample of a series."""
+    async with AsyncSessionLocal() as session:
+        rows = await session.run_sync(latest_rows, model, series)
+    if not rows:
+        raise HTTPException(404, not_found_error)
+    return JSONBody(rows_to_dicts(rows, latest_fields(model))[0])
+
+async def query(request: Request) -> Response:
+    """Answer several series queries at once, like ``POST /api/query``."""
+    try:
+        body = json.loads(await request.body() or b'null')
+    except ValueError:
+        body = None
+    try:
+        fmt = response_format(request.query_params.get('format'), request.headers.get('accept'))
+        async with AsyncSessionLocal() as session:
+            results = await session.run_sync(batch_query, body)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    if fmt != 'rows':
+        return columnar_response({'results': batch_columns(results)}, fmt, {})
+    return JSONBody({'results': results})
+
+async def list_series(request: Request, series_type: str, name_field: str) -> Response:
+    """List the catalog entries of one series type."""
+    try:
+        seen_within = parse_int(request.query_params.get('seen_within'), 'seen_within')
+        async with AsyncSessionLocal() as session:
+            entries = await session.run_sync(catalog_entries, series_type, seen_within)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return JSONBody([
+        dict({name_field: entry.series}, **{
+            field: serialize_value(getattr(entry, field)) for field in CATALOG_FIELDS
+        })
+        for entry in entries
+    ])
+
+async def list_services(request: Request) -> Response:
+    return await list_series(request, 'service', 'service_name')
+
+async def list_nodes(request: Request) -> Response:
+    return await list_series(request, 'node', 'node_id')
+
+async def health(request: Request) -> Response:
+    return JSONBody({'status': 'healthy'})
+
+def _series_routes(prefix: str, model, label: str) -> List[Route]:
+    def bind(handler: Callable) -> Callable:
+        async def endpoint(request: Request) -> Response:
+            series = request.path_params['series']
+            return await handler(request, model, series, f'No metrics found for {label} {series}')
+        return endpoint
+    return [
+        Route(f'/api/{prefix}/{{series}}/metrics', bind(get_metrics_page)),
+        Route(f'/api/{prefix}/{{series}}/metrics/aggregate', bind(get_aggregated_metrics)),
+        Route(f'/api/{prefix}/{{series}}/metrics/latest', bind(get_latest_metrics))
+    ]
+
+# Every route of the API
+ROUTES = (
+    _series_routes('services', ServiceMetrics, 'service')
+    + _series_routes('nodes', NodeMetrics, 'node')
+    + [
+        Route('/api/query', query, methods=['POST']),
+        Route('/api/services', list_services),
+        Route('/api/nodes', list_nodes),
+        Route('/api/health', health),
+        Route('/health', health)
+    ]
+)
+
+async def http_error(request: Request, exc: HTTPException) -> Response:
+    """Answer an HTTPException with a JSON ``{"error": ...}`` body, like the Flask API."""
+    return JSONBody({'error': exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+async def server_error(request: Request, exc: Exception) -> Response:
+    """Answer an unhandled error with a JSON 500; the server logs the traceback."""
+    return JSONBody({'error': 'Internal server error'}, status_code=500)
+
+# Errors answered with a JSON body instead of Starlette's plain text
+EXCEPTION_HANDLERS: Dict[Any, Callable[..., Any]] = {
+    HTTPException: http_error,
+    Exception: server_error
+}
+
+class RequestStats:
+    """Record latency and status per route in the shared stats registry."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.paths: Dict[Any, str] = {route.endpoint: route.path for route in ROUTES}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched endpoint in the scope
+            endpoint = f"{scope['method']} {self.paths.get(scope.get('endpoint'), 'unmatched')}"
+            stats.observe(f'asgi.{endpoint}.latency_seconds', time.perf_counter() - started)
+            stats.increment(f'asgi.{endpoint}.status_{status // 100}xx')
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Size the query cache on startup and dispose of the connection pool on shutdown."""
+    # This process does not see the writes; cached entries are checked against the series version
+    query_cache.configure(
+        int(os.getenv('QUERY_CACHE_SIZE', '1024')), int(os.getenv('COLLECTION_INTERVAL', '60'))
+    )
+    yield
+    await async_engine.dispose()
+
+def create_app() -> Starlette:
+    """Create the ASGI application."""
+    return Starlette(
+        routes=ROUTES,
+        middleware=[
+            Middleware(RequestStats),
+            # Same policy as the Flask application's CORS(app)
+            Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+        lifespan=lifespan
+    )
+
+app = create_app()
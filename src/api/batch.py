@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.models import ServiceMetrics, NodeMetrics
+from .queries import (
+    parse_time,
+    resolve_range,
+    aggregate_many,
+    latest_many,
+    METRIC_COLUMNS,
+    AGGREGATE_FUNCTION_NAMES,
+    MAX_POINTS
+)
+from .serializers import serialize_value
+
+# Metrics model for each target type
+TARGET_MODELS = {
+    'service': ServiceMetrics,
+    'node': NodeMetrics
+}
+
+# Upper bound on the number of targets answered by one request
+MAX_TARGETS = 200
+
+def _parse_target(target: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Validate one target and resolve its range. Raises ValueError if it is invalid."""
+    if target.get('type') not in TARGET_MODELS:
+        raise ValueError('type must be "service" or "node"')
+    if not target.get('series'):
+        raise ValueError('series is required')
+    metric = target.get('metric', 'cpu_usage')
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f'Unknown metric: {metric}')
+
+    start_time = parse_time(target.get('start_time'))
+    end_time = parse_time(target.get('end_time'))
+    parsed = {
+        'type': target['type'],
+        'series': str(target['series']),
+        'metric': metric
+    }
+    if target.get('limit'):
+        parsed['limit'] = int(target['limit'])
+        parsed['start_time'] = start_time
+        parsed['end_time'] = end_time
+        return parsed
+
+    fn = target.get('fn', 'avg')
+    if fn not in AGGREGATE_FUNCTION_NAMES:
+        raise ValueError(f'Unknown function: {fn}')
+    start_time, end_time, step = resolve_range(
+        start_time, end_time, target.get('step') or 60,
+        target.get('max_points') or MAX_POINTS, now=now
+    )
+    parsed.update(fn=fn, step=step, start_time=start_time, end_time=end_time)
+    return parsed
+
+def run_batch(db, targets: List[Dict[str, Any]],
+              now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Answer a list of series queries with as few SQL queries as possible.
+
+    Targets reading the same table with the same function, resolution and time
+    range are merged into one query over all of their series and metrics. Raw
+    targets (those with a ``limit``) are merged the same way. Returns one result
+    per target, in order, with points oldest first; invalid targets get an
+    ``error`` instead of ``points``.
+    """
+    if len(targets) > MAX_TARGETS:
+        raise ValueError(f'At most {MAX_TARGETS} targets are allowed per request')
+    now = now or datetime.now(timezone.utc)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(targets)
+    groups: Dict[Tuple, List[Tuple[int, Dict[str, Any]]]] = {}
+    for index, target in enumerate(targets):
+        ref_id = target.get('refId', str(index)) if isinstance(target, dict) else str(index)
+        try:
+            if not isinstance(target, dict):
+                raise ValueError('target must be an object')
+            parsed = _parse_target(target, now)
+        except (TypeError, ValueError) as e:
+            results[index] = {'refId': ref_id, 'error': str(e)}
+            continue
+        parsed['refId'] = ref_id
+        key: Tuple[Any, ...]
+        if 'limit' in parsed:
+            key = ('raw', parsed['type'], parsed['limit'], parsed['start_time'], parsed['end_time'])
+        else:
+            key = ('aggregate', parsed['type'], parsed['fn'], parsed['step'],
+                   parsed['start_time'], parsed['end_time'])
+        groups.setdefault(key, []).append((index, parsed))
+
+    for key, members in groups.items():
+        model = TARGET_MODELS[key[1]]
+        series = list(dict.fromkeys(parsed['series'] for _, parsed in members))
+        metrics = list(dict.fromkeys(parsed['metric'] for _, parsed in members))
+
+        if key[0] == 'raw':
+            _, _, limit, start_time, end_time = key
+            rows = latest_many(db, model, series, ['timestamp'] + metrics, limit,
+                               start_time, end_time)
+            for index, parsed in members:
+                metric = parsed['metric']
+                results[index] = {
+                    'refId': parsed['refId'],
+                    'points': [
+                        {'timestamp': serialize_value(row.timestamp), metric: getattr(row, metric)}
+                        for row in reversed(rows[parsed['series']])
+                    ]
+                }
+            continue
+
+        _, _, fn, step, start_time, end_time = key
+        data = aggregate_many(db, model, series, metrics, [fn], step, start_time, end_time)
+        for index, parsed in members:
+            metric = parsed['metric']
+            value_key = 'count' if fn == 'count' else metric
+            results[index] = {
+                'refId': parsed['refId'],
+                'step': step,
+                'points': [
+                    {'timestamp': point['timestamp'], metric: point.get(value_key)}
+                    for point in data[parsed['series']]
+                ]
+            }
+
+    # Every target has a result or an error by now
+    return [result for result in results if result is not None]
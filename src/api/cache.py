@@ -0,0 +1,147 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from ..utils.timeseries import to_epoch, from_epoch
+
+# Column holding the series name, by record kind
+SERIES_KEYS = {
+    'service': 'service_name',
+    'node': 'node_id'
+}
+
+class QueryCache:
+    """Bounded LRU cache of query results, invalidated by ingest.
+
+    Entries are registered against the series they read. When new records for
+    a series are written, every entry of that series whose window is open or
+    reaches the oldest new timestamp is dropped; windows that closed before
+    it stay cached. Open windows also expire after ``ttl`` seconds. Writes
+    made by other processes are caught by the version an entry is stored
+    with: a lookup with a different version, e.g. after the series' sample
+    count changed, misses.
+    """
+
+    def __init__(self, max_entries: int = 1024, snap_seconds: int = 60,
+                 ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.snap_seconds = snap_seconds
+        self.ttl = ttl if ttl is not None else snap_seconds
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, Tuple[str, str], Optional[float], Optional[float], Any]]' = OrderedDict()
+        self._by_series: Dict[Tuple[str, str], Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def configure(self, max_entries: int, snap_seconds: int, ttl: Optional[float] = None) -> None:
+        """Resize the cache and set the snapping interval, dropping every entry."""
+        with self._lock:
+            self.max_entries = max_entries
+            self.snap_seconds = snap_seconds
+            self.ttl = ttl if ttl is not None else snap_seconds
+            self._entries.clear()
+            self._by_series.clear()
+
+    def snap(self, start_time: Optional[datetime], end_time: Optional[datetime],
+             seconds: Optional[int] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Widen a time range outwards to whole collection intervals, or to multiples of seconds.
+
+        Queries differing only by where inside an interval their bounds fall
+        share one entry; a missing bound stays missing. Callers read the
+        widened range and trim the result back to the requested one.
+        """
+        step = max(int(seconds or self.snap_seconds), 1)
+        if start_time is not None:
+            start_time = from_epoch(math.floor(to_epoch(start_time) / step) * step)
+        if end_time is not None:
+            end_time = from_epoch(math.ceil(to_epoch(end_time) / step) * step)
+        return start_time, end_time
+
+    def get(self, key: Hashable, version: Any = None) -> Any:
+        """Get a cached value, or None if it is missing, expired or stored with another version."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[4] != version
+                                      or entry[3] is not None and entry[3] <= time.monotonic()):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, series_type: str, series: str, value: Any,
+            end_time: Optional[datetime] = None, version: Any = None) -> None:
+        """Cache the result of a query over one series ending at end_time (None: open), as of version."""
+        if self.max_entries <= 0:
+            return
+        end = to_epoch(end_time) if end_time is not None else None
+        is_open = end is None or end >= time.time()
+        expires_at = time.monotonic() + self.ttl if is_open else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, (series_type, series), end, expires_at, version)
+            self._by_series.setdefault((series_type, series), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        series_key = self._entries.pop(key)[1]
+        keys = self._by_series.get(series_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_series[series_key]
+
+    def on_write(self, kind: str, records: List[Dict[str, Any]]) -> None:
+        """Write buffer listener dropping the entries the new records could change."""
+        oldest: Dict[str, float] = {}
+        for record in records:
+            series = record.get(SERIES_KEYS.get(kind, ''))
+            if series is None:
+                continue
+            timestamp = record.get('timestamp')
+            epoch = to_epoch(timestamp) if isinstance(timestamp, datetime) else float('-inf')
+            oldest[series] = min(oldest.get(series, epoch), epoch)
+
+        with self._lock:
+            for series, since in oldest.items():
+                for key in list(self._by_series.get((kind, series), ())):
+                    end = self._entries[key][2]
+                    if end is None or end >= since:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._by_series.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the size and hit/miss counters of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
+
+# Shared cache used by the metrics resources; sized from the environment in app.py
+query_cache = QueryCache()
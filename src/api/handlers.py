@@ -0,0 +1,292 @@
+"""Request handling shared by the Flask and ASGI front ends.
+
+Parameters arrive as plain values and headers as raw header strings, and
+invalid requests raise ValueError for the front end to answer with 400, so
+both serve the same queries with the same validation, caching and
+conditional requests. Database work takes a synchronous session; the ASGI
+front end runs it with ``run_sync``.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags
+from ..collectors.hot_window import SAMPLE_TYPES
+from ..utils.timeseries import to_epoch, from_epoch
+from .batch import run_batch
+from .cache import query_cache
+from .queries import (
+    parse_time,
+    decode_cursor,
+    read_rows,
+    newest_row_statement,
+    series_state_statement,
+    catalog_statement,
+    next_cursor,
+    resolve_fields,
+    resolve_range,
+    aggregate_series,
+    METRIC_COLUMNS,
+    AGGREGATE_FUNCTION_NAMES,
+    MAX_POINTS,
+    SERIES_COLUMNS,
+    SERIES_TYPES
+)
+from .serializers import points_to_columns, JSON_MIMETYPE, NDJSON_MIMETYPE, RESPONSE_FORMATS
+
+# Rows fetched per round trip when streaming
+STREAM_BATCH_SIZE = 1000
+
+# Values of the format parameter
+FORMATS = ('rows', 'columns', 'msgpack')
+
+# Catalog columns returned by the series list endpoints
+CATALOG_FIELDS = ('first_seen', 'last_seen', 'last_checked', 'sample_count') + tuple(METRIC_COLUMNS)
+
+def parse_int(value: Optional[str], name: str, default: Optional[int] = None) -> Optional[int]:
+    """Parse an integer query parameter, or get the default if it is missing."""
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+def split_list(value: str, allowed: Sequence[str], kind: str) -> List[str]:
+    """Split a comma-separated parameter and check every item is allowed."""
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise ValueError(f'Unknown {kind}: {", ".join(unknown)}')
+    return items
+
+def best_mimetype(accept: Optional[str], mimetypes: List[str]) -> str:
+    """Pick the mimetype the Accept header prefers, defaulting to JSON."""
+    return parse_accept_header(accept, MIMEAccept).best_match(mimetypes, default=JSON_MIMETYPE)
+
+def response_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """Pick rows, columns or msgpack from the format parameter or the Accept header."""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f'Unknown format: {requested}')
+        return requested
+    return RESPONSE_FORMATS[best_mimetype(accept, list(RESPONSE_FORMATS))]
+
+def wants_stream(stream: bool, accept: Optional[str]) -> bool:
+    """Check whether rows should be streamed as newline-delimited JSON."""
+    return stream or best_mimetype(accept, list(RESPONSE_FORMATS) + [NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def page_query(model, start_time: Optional[str], end_time: Optional[str], after: Optional[str],
+               fields: Optional[str], limit: Optional[int], offset: Optional[int],
+               stream: bool) -> Dict[str, Any]:
+    """Validate the parameters of a metrics page into read_rows arguments."""
+    if limit is None and not stream:
+        limit = 100
+    return dict(
+        start_time=parse_time(start_time),
+        end_time=parse_time(end_time),
+        after=decode_cursor(after) if after else None,
+        limit=limit,
+        offset=offset or 0,
+        fields=resolve_fields(model, fields)
+    )
+
+def snapped_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Get a page with its range widened to whole collection intervals."""
+    start, end = query_cache.snap(page['start_time'], page['end_time'])
+    return dict(page, start_time=start, end_time=end)
+
+def page_key(model, series: str, page: Dict[str, Any]) -> Tuple:
+    """Get the key identifying a metrics page in the cache and in ETags."""
+    return ('rows', model.__tablename__, series, page['start_time'], page['end_time'],
+            page['after'], page['limit'], page['offset'], tuple(page['fields']))
+
+def in_range(timestamp: datetime, start_time: Optional[datetime],
+             end_time: Optional[datetime]) -> bool:
+    """Check whether a timestamp falls inside a range whose bounds may be missing."""
+    epoch = to_epoch(timestamp)
+    return ((start_time is None or epoch >= to_epoch(start_time))
+            and (end_time is None or epoch <= to_epoch(end_time)))
+
+def aggregate_query(fn: Optional[str], metrics: Optional[str], start_time: Optional[str],
+                    end_time: Optional[str], step: Optional[int],
+                    max_points: Optional[int]) -> Dict[str, Any]:
+    """Validate the parameters of an aggregate query into aggregate_series arguments."""
+    functions = split_list(fn or 'avg', AGGREGATE_FUNCTION_NAMES, 'function')
+    columns = split_list(metrics or ','.join(METRIC_COLUMNS), METRIC_COLUMNS, 'metric')
+    if not functions or not columns:
+        raise ValueError('At least one function and one metric are required')
+    start, end, step = resolve_range(
+        parse_time(start_time), parse_time(end_time) or datetime.now(timezone.utc),
+        step or 60, max_points or MAX_POINTS
+    )
+    return dict(metrics=columns, functions=functions, step=step, start_time=start, end_time=end)
+
+def bucket_range(query: Dict[str, Any]) -> Tuple[datetime, datetime]:
+    """Get the range of an aggregate query widened to whole buckets."""
+    start, end = query_cache.snap(query['start_time'], query['end_time'], query['step'])
+    return start or query['start_time'], end or query['end_time']
+
+def aggregate_key(model, series: str, query: Dict[str, Any]) -> Tuple:
+    """Get the key identifying an aggregate query in the cache and in ETags."""
+    return ('aggregate', model.__tablename__, series, tuple(query['metrics']),
+            tuple(query['functions']), query['step'], query['start_time'], query['end_time'])
+
+def series_version(db, model, series: str) -> Tuple[Any, ...]:
+    """Get the (sample count, newest time) of a series' catalog entry and the (timestamp, id) of its newest row.
+
+    Any sample written changes it, whatever its timestamp and whether its
+    range has been sealed into chunks since; None where there is no entry or
+    no raw row.
+    """
+    entry = db.execute(series_state_statement(SERIES_TYPES[model], series)).first()
+    newest = db.execute(newest_row_statement(model, series)).first()
+    return tuple(entry or (None, None)) + tuple(newest or (None, None))
+
+def series_validators(db, model, series: str, key: Tuple, accept: Optional[str],
+                      hot_window=None) -> Dict[str, str]:
+    """Compute the ETag and Last-Modified headers of a response.
+
+    The ETag hashes the normalised query and the Accept header with the
+    series_version of the series and its newest sample in the hot window, so
+    it changes whenever a sample is written, late ones included. Returns an
+    empty dict for a series with no data.
+    """
+    state = series_version(db, model, series)
+    sample = hot_window.latest(SERIES_TYPES[model], series) if hot_window else None
+    timestamps = [to_epoch(value) for value in (state[1], state[2], sample.timestamp if sample else None)
+                  if value is not None]
+    if not timestamps:
+        return {}
+
+    version = repr((key, accept, state, sample.timestamp if sample else None))
+    return {
+        'ETag': '"%s"' % hashlib.sha1(version.encode()).hexdigest(),
+        'Last-Modified': http_date(from_epoch(max(timestamps)))
+    }
+
+def is_not_modified(validators: Dict[str, str], if_none_match: Optional[str],
+                    if_modified_since: Optional[str]) -> bool:
+    """Check whether the client's copy, per its conditional headers, matches the validators."""
+    if not validators:
+        return False
+    if if_none_match:
+        return parse_etags(if_none_match).contains(validators['ETag'].strip('"'))
+    if if_modified_since:
+        since = parse_date(if_modified_since)
+        modified = parse_date(validators['Last-Modified'])
+        return since is not None and modified is not None and modified <= since
+    return False
+
+def recent_rows(model, series: str, page: Dict[str, Any], hot_window) -> Optional[List[Any]]:
+    """Get the rows of a page from the in-memory hot window, if it can answer it.
+
+    The window can answer a first page whose range starts inside it when
+    every requested field is kept in memory and the result fits in one page.
+    Samples get their id once the write buffer has written them; until then a
+    request for ids is left to the database.
+    """
+    series_type = SERIES_TYPES[model]
+    if hot_window is None or page['start_time'] is None or page['after'] or page['offset']:
+        return None
+    if not set(page['fields']) <= set(SAMPLE_TYPES[series_type]._fields):
+        return None
+    rows = hot_window.window(series_type, series, page['start_time'], page['end_time'])
+    if rows is None or (page['limit'] is not None and len(rows) >= page['limit']):
+        return None
+    if 'id' in page['fields'] and any(row.id is None for row in rows):
+        return None
+    return rows
+
+def fetch_page(db, model, series: str, page: Dict[str, Any], hot_window=None) -> List[Any]:
+    """Get the rows of a metrics page from the hot window, the cache or the database.
+
+    The cache holds the page of the range widened to whole collection
+    intervals, which queries a few seconds apart share, and its rows are
+    trimmed back to the requested range. Rows newer than end_time take places
+    in that page, so when any were trimmed from a full page, or the end moved
+    under an offset, the page is read again with the exact range. Cached
+    pages are only used while the series_version is the one they were read
+    at, so writes by any process are seen.
+    """
+    rows = recent_rows(model, series, page, hot_window)
+    if rows:
+        return rows
+    version = series_version(db, model, series)
+    snapped = snapped_page(page)
+    rows = _cached_rows(db, model, series, snapped, version)
+    end_moved = page['end_time'] is not None and to_epoch(snapped['end_time']) != to_epoch(page['end_time'])
+    trimmed = [row for row in rows if in_range(row.timestamp, page['start_time'], page['end_time'])]
+    newer = any(not in_range(row.timestamp, None, page['end_time']) for row in rows)
+    full = page['limit'] is not None and len(rows) >= page['limit']
+    if (end_moved and page['offset']) or (newer and full):
+        return _cached_rows(db, model, series, page, version)
+    return trimmed
+
+def _cached_rows(db, model, series: str, page: Dict[str, Any], version: Tuple[Any, ...]) -> List[Any]:
+    key = page_key(model, series, page)
+    rows = query_cache.get(key, version)
+    if rows is None:
+        rows = list(read_rows(db, model, series, **page))
+        if rows:
+            query_cache.put(key, SERIES_TYPES[model], series, rows, page['end_time'], version)
+    return rows
+
+def fetch_points(db, model, series: str, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get the buckets of an aggregate query from the cache or the database.
+
+    Buckets are read whole over the range widened to bucket boundaries, so
+    queries with the same step share them, and a bucket starting after
+    end_time is dropped. Like pages, cached buckets are only used at the
+    series_version they were computed at.
+    """
+    start, end = bucket_range(query)
+    key = aggregate_key(model, series, dict(query, start_time=start, end_time=end))
+    version = series_version(db, model, series)
+    points = query_cache.get(key, version)
+    if points is None:
+        points = aggregate_series(
+            db, model, series, query['metrics'], query['functions'], query['step'], start, end
+        )
+        if points:
+            query_cache.put(key, SERIES_TYPES[model], series, points, end, version)
+    end_time = to_epoch(query['end_time'])
+    return [point for point in points if to_epoch(datetime.fromisoformat(point['timestamp'])) <= end_time]
+
+def page_headers(validators: Dict[str, str], rows: List[Any], limit: Optional[int]) -> Dict[str, str]:
+    """Get the validators and next-page cursor headers of a page."""
+    headers = dict(validators)
+    cursor = next_cursor(rows, limit) if limit is not None else None
+    if cursor:
+        headers['X-Next-Cursor'] = cursor
+    return headers
+
+def latest_fields(model) -> List[str]:
+    """Get the fields of the newest-sample endpoints."""
+    return [SERIES_COLUMNS[model].name, 'timestamp'] + METRIC_COLUMNS
+
+def latest_rows(db, model, series: str, hot_window=None) -> List[Any]:
+    """Get the newest sample of a series, from the hot window when this process collects it."""
+    sample = hot_window.latest(SERIES_TYPES[model], series) if hot_window else None
+    if sample is not None:
+        return [sample]
+    return list(read_rows(db, model, series, limit=1, fields=latest_fields(model)))
+
+def catalog_entries(db, series_type: str, seen_within: Optional[int]) -> List[Any]:
+    """Get the catalog entries of one series type."""
+    if seen_within is not None and seen_within < 0:
+        raise ValueError('seen_within must not be negative')
+    return list(db.execute(catalog_statement(series_type, seen_within)).scalars().all())
+
+def batch_query(db, body: Any) -> List[Dict[str, Any]]:
+    """Answer a ``POST /api/query`` body with one result per target."""
+    if not isinstance(body, dict) or not isinstance(body.get('targets'), list):
+        raise ValueError('Request body must be an object with a list of targets')
+    return run_batch(db, body['targets'])
+
+def batch_columns(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace the points of every batch result with columns."""
+    for result in results:
+        if 'points' in result:
+            result['columns'] = points_to_columns(result.pop('points'))
+    return results
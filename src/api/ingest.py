@@ -0,0 +1,118 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+import msgpack
+from ..utils.inventory import split_facts
+from .queries import parse_time, METRIC_COLUMNS
+from .serializers import MSGPACK_MIMETYPE
+
+# Column holding the series name, by sample type
+SERIES_KEYS = {
+    'service': 'service_name',
+    'node': 'node_id'
+}
+
+# Upper bounds on one ingest request
+MAX_INGEST_BYTES = 64 * 1024 * 1024
+MAX_INGEST_SAMPLES = 10000
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    """Undo a gzip Content-Encoding, refusing bodies that inflate past MAX_INGEST_BYTES."""
+    if not encoding:
+        return body
+    if encoding != 'gzip':
+        raise ValueError(f'Unsupported Content-Encoding: {encoding}')
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(body, MAX_INGEST_BYTES)
+    except zlib.error as e:
+        raise ValueError(f'Invalid gzip body: {e}')
+    if inflater.unconsumed_tail:
+        raise ValueError(f'Decompressed body exceeds {MAX_INGEST_BYTES} bytes')
+    return data
+
+def _decode(data: bytes, content_type: str) -> Iterable[Any]:
+    """Iterate over the samples of a JSON lines or msgpack body."""
+    if content_type == MSGPACK_MIMETYPE:
+        unpacker = msgpack.Unpacker(raw=False, timestamp=3, max_buffer_size=MAX_INGEST_BYTES)
+        unpacker.feed(data)
+        for item in unpacker:
+            # Either a stream of maps or a single array of them
+            if isinstance(item, list):
+                yield from item
+            else:
+                yield item
+        return
+    for number, line in enumerate(data.splitlines(), 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise ValueError(f'Invalid JSON on line {number}')
+
+def _timestamp(value: Any) -> datetime:
+    """Convert an ISO 8601 string, epoch seconds or datetime to a UTC datetime."""
+    if value is None:
+        return datetime.now(timezone.utc)
+    if isinstance(value, str):
+        value = parse_time(value)
+        if value is None:
+            raise ValueError('timestamp must not be empty')
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            value = datetime.fromtimestamp(value, timezone.utc)
+        except (OverflowError, OSError):
+            raise ValueError(f'Invalid timestamp: {value!r}')
+    elif not isinstance(value, datetime):
+        raise ValueError(f'Invalid timestamp: {value!r}')
+    # Stored as UTC whatever offset the sender used
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _record(sample: Any) -> tuple:
+    """Validate one sample and convert it to a (kind, record) pair for the write buffer."""
+    if not isinstance(sample, dict):
+        raise ValueError('sample must be an object')
+    kind = sample.get('type')
+    if kind not in SERIES_KEYS:
+        raise ValueError('type must be "service" or "node"')
+    series = sample.get(SERIES_KEYS[kind])
+    if not isinstance(series, str) or not series:
+        raise ValueError(f'{SERIES_KEYS[kind]} is required')
+
+    record = {SERIES_KEYS[kind]: series, 'timestamp': _timestamp(sample.get('timestamp'))}
+    for metric in METRIC_COLUMNS:
+        value = sample.get(metric)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f'{metric} must be a number')
+        record[metric] = None if value is None else float(value)
+    extra = sample.get('additional_metrics')
+    if extra is not None and not isinstance(extra, dict):
+        raise ValueError('additional_metrics must be an object')
+    facts = sample.get('inventory')
+    if facts is None:
+        # Older senders still put the static facts in additional_metrics
+        facts, extra = split_facts(kind, extra)
+    elif not isinstance(facts, dict):
+        raise ValueError('inventory must be an object')
+    record['additional_metrics'] = extra
+    record['inventory'] = facts or None
+    return kind, record
+
+def parse_samples(body: bytes, content_type: str, encoding: str = '') -> Dict[str, List[Dict[str, Any]]]:
+    """Decode and validate an ingest body into write buffer records, grouped by kind.
+
+    The whole batch is rejected with a ValueError naming the first invalid
+    sample, so a request is either stored completely or not at all.
+    """
+    data = decompress(body, encoding)
+    records: Dict[str, List[Dict[str, Any]]] = {'service': [], 'node': []}
+    for count, sample in enumerate(_decode(data, content_type), 1):
+        if count > MAX_INGEST_SAMPLES:
+            raise ValueError(f'At most {MAX_INGEST_SAMPLES} samples are allowed per request')
+        try:
+            kind, record = _record(sample)
+        except ValueError as e:
+            raise ValueError(f'Sample {count}: {e}')
+        records[kind].append(record)
+    return records
@@ -72,6 +72,10 @@ service_metrics_model = api.model('ServiceMetrics', {
     'additional_metrics': fields.Raw(
         description='Additional service-specific metrics in JSON format',
         example={'custom_metric': 'value'}
+    ),
+    'inventory': fields.Raw(
+        description='Static service facts at the time of the sample; only returned with fields=...,inventory',
+        example={'create_time': 1708430400.0}
     )
 })
 
@@ -109,9 +113,54 @@ node_metrics_model = api.model('NodeMetrics', {
     'additional_metrics': fields.Raw(
         description='Additional node-specific metrics in JSON format',
         example={'custom_metric': 'value'}
+    ),
+    'inventory': fields.Raw(
+        description='Static node facts at the time of the sample; only returned with fields=...,inventory',
+        example={'cpu_count': 8, 'memory_total': 17179869184}
     )
 })
 
+# Series catalog models
+catalog_fields = {
+    'first_seen': fields.DateTime(description='Timestamp of the oldest sample'),
+    'last_seen': fields.DateTime(description='Timestamp of the newest sample'),
+    'last_checked': fields.DateTime(description='Timestamp of the newest sample collected, stored or suppressed by a deadband'),
+    'sample_count': fields.Integer(description='Number of samples stored', example=1440),
+    'cpu_usage': fields.Float(description='Latest CPU usage percentage (0-100)', example=45.5),
+    'memory_usage': fields.Float(description='Latest memory usage percentage (0-100)', example=60.2),
+    'disk_usage': fields.Float(description='Latest disk usage percentage (0-100)', example=75.0),
+    'network_in': fields.Float(description='Latest network input rate in bytes per second', example=1024.0),
+    'network_out': fields.Float(description='Latest network output rate in bytes per second', example=2048.0)
+}
+
+service_catalog_model = api.model('ServiceCatalogEntry', {
+    'service_name': fields.String(attribute='series', description='Name of the service', example='example-service'),
+    **catalog_fields
+})
+
+node_catalog_model = api.model('NodeCatalogEntry', {
+    'node_id': fields.String(attribute='series', description='Node identifier', example='node-1'),
+    **catalog_fields
+})
+
+# Batch query models
+query_target_model = api.model('QueryTarget', {
+    'refId': fields.String(description='Identifier echoed back in the result', example='A'),
+    'type': fields.String(description='Series type', enum=['service', 'node'], required=True, example='node'),
+    'series': fields.String(description='Service name or node ID', required=True, example='node-1'),
+    'metric': fields.String(description='Metric to return', example='cpu_usage'),
+    'fn': fields.String(description='Aggregation function: avg, min, max, last or count', example='avg'),
+    'step': fields.Integer(description='Bucket width in seconds', example=60),
+    'max_points': fields.Integer(description='Maximum number of buckets', example=1000),
+    'limit': fields.Integer(description='Return the newest limit raw samples instead of buckets'),
+    'start_time': fields.String(description='Start time in ISO 8601 format', example='2024-02-20T00:00:00Z'),
+    'end_time': fields.String(description='End time in ISO 8601 format', example='2024-02-20T23:59:59Z')
+})
+
+query_request_model = api.model('QueryRequest', {
+    'targets': fields.List(fields.Nested(query_target_model), required=True)
+})
+
 # Error response model
 error_model = api.model('Error', {
     'error': fields.String(
@@ -0,0 +1,595 @@
+import base64
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import select, and_, or_, desc, func
+from sqlalchemy.sql import Select
+from ..utils.models import (
+    ServiceMetrics, NodeMetrics, MetricRollup, RollupWatermark, SeriesCatalog, SeriesInventory, MetricChunk
+)
+from ..utils.chunks import decode_chunk, to_micros, from_micros
+from ..utils.timeseries import ROLLUP_FUNCTIONS, to_epoch, from_epoch, bucket_expression, weighted_avg
+
+# Column identifying the series of each metrics model
+SERIES_COLUMNS = {
+    ServiceMetrics: ServiceMetrics.service_name,
+    NodeMetrics: NodeMetrics.node_id
+}
+
+# Series type of each metrics model, as used by rollups and the write buffer
+SERIES_TYPES = {
+    ServiceMetrics: 'service',
+    NodeMetrics: 'node'
+}
+
+# Numeric metric columns that can be aggregated
+METRIC_COLUMNS = ['cpu_usage', 'memory_usage', 'disk_usage', 'network_in', 'network_out']
+
+# Columns used internally and never returned
+INTERNAL_COLUMNS = ('inventory_id',)
+
+# Fields joined in from other tables, only returned when requested
+JOINED_FIELDS = ('inventory',)
+
+# Aggregation functions supported by the aggregate endpoints
+AGGREGATE_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    'avg': func.avg,
+    'min': func.min,
+    'max': func.max
+}
+AGGREGATE_FUNCTION_NAMES = ('avg', 'min', 'max', 'last', 'count')
+
+# Upper bound on the number of buckets returned per series
+MAX_POINTS = 1000
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 query parameter. Raises ValueError if it is invalid."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Encode the position of a row as an opaque, URL-safe keyset cursor."""
+    position = f'{timestamp.isoformat()},{row_id}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is invalid."""
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+    timestamp, _, row_id = position.rpartition(',')
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+def model_fields(model) -> List[str]:
+    """Get the names of every column of a metrics model, in response order."""
+    return [column.name for column in model.__table__.columns if column.name not in INTERNAL_COLUMNS]
+
+def resolve_fields(model, fields: Optional[str]) -> List[str]:
+    """Parse a fields parameter into the columns to return.
+
+    The timestamp is always returned. Joined fields such as ``inventory``
+    are only returned when asked for. Raises ValueError on unknown fields.
+    """
+    available = model_fields(model)
+    if not fields:
+        return available
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in available and field not in JOINED_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    return ([field for field in available if field in requested or field == 'timestamp']
+            + [field for field in JOINED_FIELDS if field in requested])
+
+def selected_fields(model, fields: Optional[List[str]] = None) -> List[str]:
+    """Get the fields a page query selects: the requested ones plus the id and timestamp."""
+    selected = set(fields or model_fields(model)) | {'id', 'timestamp'}
+    return ([name for name in model_fields(model) if name in selected]
+            + [name for name in JOINED_FIELDS if name in selected])
+
+def metrics_statement(model, series: str, start_time: Optional[datetime] = None,
+                      end_time: Optional[datetime] = None,
+                      after: Optional[Tuple[datetime, int]] = None,
+                      limit: Optional[int] = 100, offset: int = 0,
+                      fields: Optional[List[str]] = None) -> Select:
+    """Build the query for one page of a series, newest first.
+
+    With ``after`` the page starts right after the given (timestamp, id)
+    position instead of skipping ``offset`` rows, so every page is a single
+    range scan of the (series, timestamp) index however deep it is.
+
+    Only the given fields are selected (default: all), plus the id and
+    timestamp needed for the next-page cursor. The ``inventory`` field joins
+    in the static facts each row references. A limit of None returns every
+    matching row.
+    """
+    series_column = SERIES_COLUMNS[model]
+    selected = selected_fields(model, fields)
+    columns = [getattr(model, name) for name in selected if name not in JOINED_FIELDS]
+    statement = select(*columns).where(series_column == series)
+    if 'inventory' in selected:
+        statement = statement.add_columns(SeriesInventory.facts.label('inventory')).outerjoin(
+            SeriesInventory, SeriesInventory.id == model.inventory_id
+        )
+
+    if start_time:
+        statement = statement.where(model.timestamp >= start_time)
+    if end_time:
+        statement = statement.where(model.timestamp <= end_time)
+
+    if after:
+        after_time, after_id = after
+        statement = statement.where(or_(
+            model.timestamp < after_time,
+            and_(model.timestamp == after_time, model.id < after_id)
+        ))
+    elif offset:
+        statement = statement.offset(offset)
+
+    statement = statement.order_by(desc(model.timestamp), desc(model.id))
+    return statement.limit(limit) if limit is not None else statement
+
+def chunk_index_statement(model, series: List[str], start_time: Optional[datetime] = None,
+                          end_time: Optional[datetime] = None,
+                          after_time: Optional[datetime] = None) -> Select:
+    """Build the query for the sealed chunks of series overlapping a range, newest first.
+
+    Only chunk positions are read; their data is loaded one chunk at a time
+    when it is needed.
+    """
+    statement = select(MetricChunk.id, MetricChunk.series, MetricChunk.end_time).where(
+        MetricChunk.series_type == SERIES_TYPES[model],
+        MetricChunk.series.in_(series)
+    )
+    if start_time:
+        statement = statement.where(MetricChunk.end_time >= start_time)
+    if end_time:
+        statement = statement.where(MetricChunk.start_time <= end_time)
+    if after_time:
+        statement = statement.where(MetricChunk.start_time <= after_time)
+    return statement.order_by(desc(MetricChunk.end_time), desc(MetricChunk.id))
+
+def sealed_series(db, model, series: List[str], start_time: Optional[datetime] = None,
+                  end_time: Optional[datetime] = None) -> Set[str]:
+    """Get which of the series have sealed chunks overlapping a range."""
+    return {row.series for row in db.execute(chunk_index_statement(model, series, start_time, end_time))}
+
+@lru_cache(maxsize=None)
+def _row_type(names: Tuple[str, ...]):
+    return namedtuple('SealedRow', names)
+
+def _row_position(row) -> Tuple[datetime, int]:
+    return row.timestamp, row.id
+
+def _inventory_facts(db, ids: List[Optional[int]]) -> Dict[int, Any]:
+    wanted = {value for value in ids if value is not None}
+    if not wanted:
+        return {}
+    return dict(db.execute(
+        select(SeriesInventory.id, SeriesInventory.facts).where(SeriesInventory.id.in_(wanted))
+    ).all())
+
+def sealed_rows(db, model, series: str, start_time: Optional[datetime] = None,
+                end_time: Optional[datetime] = None,
+                after: Optional[Tuple[datetime, int]] = None,
+                fields: Optional[List[str]] = None) -> Iterator[Any]:
+    """Iterate the rows of a series sealed into chunks, newest first.
+
+    Rows have the fields metrics_statement would select. Chunks are decoded
+    one at a time, newest first, so a page near the end of a range decodes
+    only the chunks it returns rows from. Rows of a chunk that an older one
+    overlaps (late samples sealed on a later run) are held back until that
+    chunk has been decoded too.
+    """
+    names = selected_fields(model, fields)
+    row_type = _row_type(tuple(names))
+    series_name = SERIES_COLUMNS[model].name
+    # SQLite returns naive UTC datetimes; match the rows read from the table
+    aware = db.get_bind().dialect.name != 'sqlite'
+    wanted = set(names) | ({'inventory_id'} if 'inventory' in names else set())
+    position = (to_micros(after[0]), after[1]) if after else None
+    chunks = db.execute(
+        chunk_index_statement(model, [series], start_time, end_time, after[0] if after else None)
+    ).all()
+
+    pending: List[Tuple[int, int, Any]] = []
+    for index, chunk in enumerate(chunks):
+        columns = decode_chunk(
+            db.execute(select(MetricChunk.data).where(MetricChunk.id == chunk.id)).scalar(), wanted
+        )
+        stamps, ids = columns['timestamp'], columns['id']
+        # Chunk rows are sorted by (timestamp, id), so the range is a slice
+        first = bisect_left(stamps, to_micros(start_time)) if start_time else 0
+        last = bisect_right(stamps, to_micros(end_time)) if end_time else len(stamps)
+        if position is not None:
+            last = min(last, bisect_left(list(zip(stamps, ids)), position))
+
+        values: List[List[Any]] = []
+        for name in names:
+            if name == 'timestamp':
+                values.append([from_micros(stamp, aware) for stamp in stamps[first:last]])
+            elif name == series_name:
+                values.append([series] * max(last - first, 0))
+            elif name == 'inventory':
+                facts = _inventory_facts(db, columns['inventory_id'][first:last])
+                values.append([facts.get(value) for value in columns['inventory_id'][first:last]])
+            else:
+                values.append(columns[name][first:last])
+        rows = list(map(row_type, *values))
+
+        # Older chunks end at or before next_end, so newer rows are final
+        next_end = to_micros(chunks[index + 1].end_time) if index + 1 < len(chunks) else None
+        if not pending and (next_end is None or first >= last or stamps[first] > next_end):
+            yield from reversed(rows)
+            continue
+        for offset, row in enumerate(rows, first):
+            heapq.heappush(pending, (-stamps[offset], -ids[offset], row))
+        while pending and (next_end is None or -pending[0][0] > next_end):
+            yield heapq.heappop(pending)[2]
+
+def read_rows(db, model, series: str, start_time: Optional[datetime] = None,
+              end_time: Optional[datetime] = None,
+              after: Optional[Tuple[datetime, int]] = None,
+              limit: Optional[int] = 100, offset: int = 0,
+              fields: Optional[List[str]] = None,
+              batch_size: Optional[int] = None) -> Generator[Any, None, None]:
+    """Iterate one page of a series newest first, from raw rows and sealed chunks.
+
+    Takes the arguments of metrics_statement and yields the same rows. When
+    no chunk overlaps the range only that statement runs; otherwise its rows
+    and the decoded chunk rows are merged by (timestamp, id) and the offset
+    and limit applied to the merged rows. With batch_size, raw rows are
+    fetched from a server-side cursor in batches of that size.
+    """
+    options = {'yield_per': batch_size} if batch_size else {}
+    has_chunks = db.execute(
+        chunk_index_statement(model, [series], start_time, end_time, after[0] if after else None).limit(1)
+    ).first() is not None
+    stop = offset + limit if has_chunks and limit is not None else limit
+    result = db.execute(
+        metrics_statement(model, series, start_time=start_time, end_time=end_time, after=after,
+                          limit=stop, offset=0 if has_chunks else offset, fields=fields),
+        execution_options=options
+    )
+    try:
+        if not has_chunks:
+            yield from result
+            return
+        merged = heapq.merge(
+            result, sealed_rows(db, model, series, start_time, end_time, after, fields),
+            key=_row_position, reverse=True
+        )
+        yield from islice(merged, offset, stop)
+    finally:
+        result.close()
+
+def newest_row_statement(model, series: str) -> Select:
+    """Build the query for the (timestamp, id) of the newest row of a series.
+
+    This is a single probe of the (series, timestamp) index, cheap enough to
+    run on every request to validate cached responses.
+    """
+    series_column = SERIES_COLUMNS[model]
+    return (
+        select(model.timestamp, model.id)
+        .where(series_column == series)
+        .order_by(desc(model.timestamp), desc(model.id))
+        .limit(1)
+    )
+
+def series_state_statement(series_type: str, series: str) -> Select:
+    """Build the query for the sample count and newest sample time of a series in the catalog.
+
+    A primary key lookup; the count changes with every sample written, late
+    ones included, and the entry outlives rows sealed into chunks.
+    """
+    return select(SeriesCatalog.sample_count, SeriesCatalog.last_seen).where(
+        SeriesCatalog.series_type == series_type, SeriesCatalog.series == series
+    )
+
+def catalog_statement(series_type: str, seen_within: Optional[int] = None,
+                      now: Optional[datetime] = None) -> Select:
+    """Build the query listing the catalog entries of one series type.
+
+    With seen_within, only series with a sample in the last seen_within
+    seconds are listed.
+    """
+    statement = select(SeriesCatalog).where(SeriesCatalog.series_type == series_type)
+    if seen_within is not None:
+        now = now or datetime.now(timezone.utc)
+        statement = statement.where(SeriesCatalog.last_seen >= now - timedelta(seconds=seen_within))
+    return statement.order_by(SeriesCatalog.series)
+
+def next_cursor(rows, limit: int) -> Optional[str]:
+    """Get the cursor of the page following rows, if there may be one."""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.timestamp, last.id)
+
+def resolve_range(start_time: Optional[datetime], end_time: Optional[datetime],
+                  step: int, max_points: int = MAX_POINTS,
+                  now: Optional[datetime] = None) -> Tuple[datetime, datetime, int]:
+    """Fill in a missing time range and widen step to return at most max_points buckets."""
+    max_points = max(1, min(max_points or MAX_POINTS, MAX_POINTS))
+    step = max(int(step or 60), 1)
+    end_time = end_time or now or datetime.now(timezone.utc)
+    start_time = start_time or end_time - timedelta(seconds=step * max_points)
+    span = to_epoch(end_time) - to_epoch(start_time)
+    step = max(step, math.ceil(span / max_points))
+    return start_time, end_time, step
+
+def _range_filter(statement: Select, model, series: List[str], start_time: datetime,
+                  end_time: datetime) -> Select:
+    return statement.where(
+        SERIES_COLUMNS[model].in_(series),
+        model.timestamp >= start_time,
+        model.timestamp <= end_time
+    )
+
+def aggregate_statement(model, series: List[str], metrics: List[str], functions: List[str],
+                        step: int, start_time: datetime, end_time: datetime,
+                        dialect_name: str) -> Select:
+    """Build a GROUP BY query aggregating series into step-wide buckets.
+
+    Handles avg, min, max and count; ``last`` needs a window and is built by
+    last_value_statement.
+    """
+    series_column = SERIES_COLUMNS[model]
+    bucket = bucket_expression(model.timestamp, step, dialect_name).label('bucket')
+    columns = [series_column.label('series'), bucket]
+    for name in functions:
+        if name == 'count':
+            columns.append(func.count(model.id).label('count'))
+        elif name in AGGREGATE_FUNCTIONS:
+            for metric in metrics:
+                columns.append(
+                    AGGREGATE_FUNCTIONS[name](getattr(model, metric)).label(f'{metric}_{name}')
+                )
+    statement = _range_filter(select(*columns), model, series, start_time, end_time)
+    return statement.group_by(series_column, bucket).order_by(bucket)
+
+def last_value_statement(model, series: List[str], metrics: List[str], step: int,
+                         start_time: datetime, end_time: datetime,
+                         dialect_name: str) -> Select:
+    """Build a query returning the newest sample of every step-wide bucket."""
+    series_column = SERIES_COLUMNS[model]
+    bucket = bucket_expression(model.timestamp, step, dialect_name)
+    rank = func.row_number().over(
+        partition_by=(series_column, bucket),
+        order_by=(desc(model.timestamp), desc(model.id))
+    )
+    ranked = _range_filter(
+        select(series_column.label('series'), bucket.label('bucket'), rank.label('rank'),
+               *[getattr(model, metric) for metric in metrics]),
+        model, series, start_time, end_time
+    ).subquery()
+    return select(
+        ranked.c.series, ranked.c.bucket, *[ranked.c[metric] for metric in metrics]
+    ).where(ranked.c.rank == 1).order_by(ranked.c.bucket)
+
+def rollup_tier(db, series_type: str, step: int,
+                functions: List[str]) -> Optional[Tuple[int, float]]:
+    """Pick the coarsest rollup tier that can answer a query at step resolution.
+
+    Returns the tier resolution and its watermark in epoch seconds, or None if
+    the query has to read raw rows.
+    """
+    if any(name not in ROLLUP_FUNCTIONS for name in functions):
+        return None
+    watermarks = dict(db.execute(
+        select(RollupWatermark.resolution, RollupWatermark.watermark)
+        .where(RollupWatermark.series_type == series_type)
+    ).all())
+    for resolution in sorted(watermarks, reverse=True):
+        if resolution <= step and step % resolution == 0:
+            return resolution, to_epoch(watermarks[resolution])
+    return None
+
+def rollup_statement(series_type: str, series: List[str], metrics: List[str],
+                     functions: List[str], step: int, resolution: int,
+                     start_time: datetime, end_time: datetime, dialect_name: str) -> Select:
+    """Build a query re-aggregating rollup buckets in [start_time, end_time) to step."""
+    bucket = bucket_expression(MetricRollup.bucket, step, dialect_name).label('bucket')
+    total = func.sum(MetricRollup.count)
+    columns = [MetricRollup.series, bucket]
+    for name in functions:
+        if name == 'count':
+            columns.append(total.label('count'))
+            continue
+        for metric in metrics:
+            if name == 'avg':
+                value = weighted_avg(getattr(MetricRollup, f'{metric}_avg'),
+                                     getattr(MetricRollup, f'{metric}_count'))
+            else:
+                value = AGGREGATE_FUNCTIONS[name](getattr(MetricRollup, f'{metric}_{name}'))
+            columns.append(value.label(f'{metric}_{name}'))
+    first_bucket = from_epoch(to_epoch(start_time) // resolution * resolution)
+    return select(*columns).where(
+        MetricRollup.series_type == series_type,
+        MetricRollup.series.in_(series),
+        MetricRollup.resolution == resolution,
+        MetricRollup.bucket >= first_bucket,
+        MetricRollup.bucket < end_time
+    ).group_by(MetricRollup.series, bucket).order_by(bucket)
+
+# Python equivalents of AGGREGATE_FUNCTIONS, for rows decoded from chunks
+PYTHON_AGGREGATES: Dict[str, Callable[..., Any]] = {
+    'avg': lambda values: sum(values) / len(values),
+    'min': min,
+    'max': max
+}
+
+def _bucket_of(row, step: int) -> int:
+    return to_micros(row.timestamp) // 1000000 // step * step
+
+def _aggregate_rows(series: str, rows, metrics: List[str], functions: List[str],
+                    step: int) -> List[Dict[str, Any]]:
+    """Aggregate rows of one series in Python, shaped like aggregate_statement rows."""
+    buckets: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        values = buckets.setdefault(_bucket_of(row, step), {'count': 0, **{metric: [] for metric in metrics}})
+        values['count'] += 1
+        for metric in metrics:
+            value = getattr(row, metric)
+            if value is not None:
+                values[metric].append(value)
+
+    results = []
+    for bucket, values in buckets.items():
+        result = {'series': series, 'bucket': bucket}
+        for name in functions:
+            if name == 'count':
+                result['count'] = values['count']
+                continue
+            for metric in metrics:
+                result[f'{metric}_{name}'] = PYTHON_AGGREGATES[name](values[metric]) if values[metric] else None
+        results.append(result)
+    return results
+
+def _last_rows(series: str, rows, metrics: List[str], step: int) -> List[Dict[str, Any]]:
+    """Get the newest of rows (newest first) in every bucket, shaped like last_value_statement rows."""
+    results: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        bucket = _bucket_of(row, step)
+        if bucket not in results:
+            results[bucket] = dict({'series': series, 'bucket': bucket},
+                                   **{metric: getattr(row, metric) for metric in metrics})
+    return list(results.values())
+
+def aggregate_many(db, model, series: List[str], metrics: List[str], functions: List[str],
+                   step: int, start_time: datetime,
+                   end_time: datetime) -> Dict[str, List[Dict[str, Any]]]:
+    """Aggregate several series of one table into buckets with shared queries.
+
+    Returns, for every requested series, one dict per non-empty bucket, oldest
+    first, with the bucket start as ``timestamp``. Values are keyed by metric
+    name when a single function is requested and by ``<metric>_<function>``
+    otherwise; ``count`` is keyed as ``count``.
+
+    When a rollup tier can serve the query, the part of the range its
+    watermark covers is read from the tier and only the rest from raw rows.
+    Series with sealed chunks in the range are aggregated in Python from
+    their raw rows and decoded chunks.
+    """
+    dialect_name = db.get_bind().dialect.name
+    single = len(functions) == 1
+    buckets: Dict[str, Dict[int, Dict[str, Any]]] = {name: {} for name in series}
+
+    def bucket_row(row) -> Dict[str, Any]:
+        points = buckets[row['series']]
+        bucket = int(row['bucket'])
+        if bucket not in points:
+            points[bucket] = {'timestamp': from_epoch(bucket).isoformat()}
+        return points[bucket]
+
+    # Series with sealed chunks in the range are aggregated from decoded rows
+    sealed = sorted(sealed_series(db, model, series, start_time, end_time))
+    unsealed = [name for name in series if name not in sealed]
+
+    grouped = [name for name in functions if name != 'last']
+    statements = []
+    if grouped:
+        raw_start = start_time
+        series_type = SERIES_TYPES[model]
+        tier = rollup_tier(db, series_type, step, grouped)
+        if tier:
+            resolution, watermark = tier
+            split = min(watermark // step * step, to_epoch(end_time))
+            if split > to_epoch(start_time):
+                raw_start = from_epoch(split)
+                statements.append(rollup_statement(
+                    series_type, series, metrics, grouped, step, resolution,
+                    start_time, raw_start, dialect_name
+                ))
+        if unsealed:
+            statements.append(aggregate_statement(
+                model, unsealed, metrics, grouped, step, raw_start, end_time, dialect_name
+            ))
+
+    def grouped_rows():
+        for statement in statements:
+            yield from db.execute(statement).mappings()
+        if grouped:
+            for name in sealed:
+                rows = read_rows(db, model, name, raw_start, end_time, limit=None, fields=metrics)
+                yield from _aggregate_rows(name, rows, metrics, grouped, step)
+
+    for row in grouped_rows():
+        point = bucket_row(row)
+        for key, value in row.items():
+            if key in ('series', 'bucket'):
+                continue
+            if single and key != 'count':
+                key = key.rsplit('_', 1)[0]
+            point[key] = value
+
+    def last_rows():
+        if unsealed:
+            yield from db.execute(last_value_statement(
+                model, unsealed, metrics, step, start_time, end_time, dialect_name
+            )).mappings()
+        for name in sealed:
+            rows = read_rows(db, model, name, start_time, end_time, limit=None, fields=metrics)
+            yield from _last_rows(name, rows, metrics, step)
+
+    if 'last' in functions:
+        for row in last_rows():
+            point = bucket_row(row)
+            for metric in metrics:
+                point[metric if single else f'{metric}_last'] = row[metric]
+
+    return {
+        name: [points[bucket] for bucket in sorted(points)]
+        for name, points in buckets.items()
+    }
+
+def aggregate_series(db, model, series: str, metrics: List[str], functions: List[str],
+                     step: int, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+    """Aggregate a single series into buckets; see aggregate_many."""
+    return aggregate_many(
+        db, model, [series], metrics, functions, step, start_time, end_time
+    )[series]
+
+def latest_many(db, model, series: List[str], fields: List[str], limit: int,
+                start_time: Optional[datetime] = None,
+                end_time: Optional[datetime] = None) -> Dict[str, List[Any]]:
+    """Get the newest limit rows of several series of one table in one query.
+
+    Series with sealed chunks in the range are read one at a time with read_rows.
+    """
+    sealed = sealed_series(db, model, series, start_time, end_time)
+    results: Dict[str, List[Any]] = {
+        name: list(read_rows(db, model, name, start_time, end_time, limit=limit, fields=fields))
+        for name in series if name in sealed
+    }
+    series = [name for name in series if name not in sealed]
+    if not series:
+        return results
+    series_column = SERIES_COLUMNS[model]
+    rank = func.row_number().over(
+        partition_by=series_column,
+        order_by=(desc(model.timestamp), desc(model.id))
+    )
+    statement = select(series_column.label('series'), rank.label('rank'),
+                       *[getattr(model, field) for field in fields])
+    statement = statement.where(series_column.in_(series))
+    if start_time:
+        statement = statement.where(model.timestamp >= start_time)
+    if end_time:
+        statement = statement.where(model.timestamp <= end_time)
+    ranked = statement.subquery()
+    rows = db.execute(
+        select(ranked).where(ranked.c.rank <= limit).order_by(desc(ranked.c.timestamp))
+    ).all()
+
+    results.update({name: [] for name in series})
+    for row in rows:
+        results[row.series].append(row)
+    return results
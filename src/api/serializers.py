@@ -0,0 +1,82 @@
+import sys
+import json
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Union
+import msgpack
+from ..utils.timeseries import to_epoch
+
+# Response formats, by the media type that asks for them
+JSON_MIMETYPE = 'application/json'
+COLUMNS_MIMETYPE = 'application/vnd.openhorizon.columns+json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+RESPONSE_FORMATS = {
+    JSON_MIMETYPE: 'rows',
+    COLUMNS_MIMETYPE: 'columns',
+    MSGPACK_MIMETYPE: 'msgpack'
+}
+
+def serialize_value(value: Any) -> Any:
+    """Convert a column value to its JSON representation."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def rows_to_dicts(rows: Sequence, fields: List[str]) -> List[Dict[str, Any]]:
+    """Serialise selected rows to one dict per row, without flask-restx marshalling."""
+    return [{field: serialize_value(getattr(row, field)) for field in fields} for row in rows]
+
+def rows_to_ndjson(rows: Iterable, fields: List[str]) -> Iterator[str]:
+    """Serialise rows lazily to one JSON document per line."""
+    for row in rows:
+        yield json.dumps({field: serialize_value(getattr(row, field)) for field in fields}) + '\n'
+
+def timestamp_ms(value: Union[datetime, str]) -> float:
+    """Convert a datetime or ISO 8601 string to epoch milliseconds."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return to_epoch(value) * 1000
+
+def rows_to_columns(rows: Sequence, fields: List[str]) -> Dict[str, List[Any]]:
+    """Serialise selected rows to one list per field, timestamps as epoch milliseconds."""
+    columns = {field: [getattr(row, field) for row in rows] for field in fields}
+    columns['timestamp'] = [timestamp_ms(value) for value in columns['timestamp']]
+    return columns
+
+def points_to_columns(points: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Transpose serialised points to one list per key, timestamps as epoch milliseconds."""
+    keys: Dict[str, None] = {}
+    for point in points:
+        keys.update(dict.fromkeys(point))
+    columns: Dict[str, List[Any]] = {key: [point.get(key) for point in points] for key in keys}
+    columns['timestamp'] = [timestamp_ms(value) for value in columns.get('timestamp', [])]
+    return columns
+
+def _pack_column(values: List[Any]) -> Union[bytes, List[Any]]:
+    """Encode a float column as little-endian float64 bytes, with NaN for nulls.
+
+    Columns holding anything other than floats and nulls are left as lists.
+    """
+    if not all(value is None or type(value) is float for value in values):
+        return values
+    packed = array('d', (float('nan') if value is None else value for value in values))
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+def pack_columns(data: Any) -> bytes:
+    """Encode a response to msgpack, sending every float column as a binary array.
+
+    Any dict whose values are all lists is treated as a set of columns.
+    """
+    def encode(value: Any) -> Any:
+        if isinstance(value, dict):
+            if value and all(isinstance(item, list) for item in value.values()):
+                return {key: _pack_column(item) for key, item in value.items()}
+            return {key: encode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [encode(item) for item in value]
+        return serialize_value(value)
+
+    return msgpack.packb(encode(data), use_bin_type=True)
@@ -0,0 +1,136 @@
+import threading
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select, insert, delete, func
+from ..utils.database import engine
+from ..utils.models import ServiceMetrics, NodeMetrics, MetricChunk, RollupWatermark
+from ..utils.chunks import encode_chunk
+from ..utils.timeseries import ROLLUP_TIERS, to_epoch, from_epoch
+
+# Raw metrics table and series column for each series type
+SOURCES: Dict[str, Tuple[Any, Any]] = {
+    'service': (ServiceMetrics, ServiceMetrics.service_name),
+    'node': (NodeMetrics, NodeMetrics.node_id)
+}
+
+# Sealed rows deleted per statement, below the bound parameter limit of SQLite
+DELETE_BATCH_SIZE = 500
+
+class ChunkSealer:
+    """Background job sealing closed time windows of raw rows into compressed chunks.
+
+    Windows are ``duration`` seconds long and aligned to the epoch. Once a
+    window has closed and the finest rollup tier covers it, the raw rows of
+    every series in it are encoded into one chunk per series and deleted, in
+    one transaction per window. Rows that arrive late for a sealed window are
+    sealed into an extra chunk on a later run.
+    """
+
+    def __init__(self, interval: int = 300, duration: int = 7200, bind=None):
+        self.interval = interval
+        self.duration = duration
+        self.bind = bind or engine
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+        self.chunks_written = 0
+        self.rows_sealed = 0
+        self.bytes_written = 0
+
+    def _seal_until(self, conn, series_type: str, now: float) -> Optional[float]:
+        """Get the epoch time before which rows of a series type can be sealed."""
+        watermark = conn.execute(
+            select(RollupWatermark.watermark).where(
+                RollupWatermark.series_type == series_type,
+                RollupWatermark.resolution == ROLLUP_TIERS[0]
+            )
+        ).scalar()
+        if watermark is None:
+            # Rows must be rolled up before they leave the raw table
+            return None
+        return min(now, to_epoch(watermark)) // self.duration * self.duration
+
+    def _seal_window(self, series_type: str, start: float, end: float) -> int:
+        """Seal the raw rows in [start, end) into one chunk per series."""
+        model, series_column = SOURCES[series_type]
+        with self.bind.begin() as conn:
+            rows = conn.execute(
+                select(model.__table__).where(
+                    model.timestamp >= from_epoch(start),
+                    model.timestamp < from_epoch(end)
+                ).order_by(series_column, model.timestamp, model.id)
+            ).mappings().all()
+            chunks = []
+            for series, group in groupby(rows, key=lambda row: row[series_column.name]):
+                samples = list(group)
+                chunks.append({
+                    'series_type': series_type,
+                    'series': series,
+                    'start_time': samples[0]['timestamp'],
+                    'end_time': samples[-1]['timestamp'],
+                    'sample_count': len(samples),
+                    'data': encode_chunk(samples)
+                })
+            if chunks:
+                conn.execute(insert(MetricChunk), chunks)
+            # Delete by id so rows written meanwhile are left for the next run
+            ids = [row['id'] for row in rows]
+            for offset in range(0, len(ids), DELETE_BATCH_SIZE):
+                conn.execute(delete(model).where(model.id.in_(ids[offset:offset + DELETE_BATCH_SIZE])))
+        self.chunks_written += len(chunks)
+        self.rows_sealed += len(rows)
+        self.bytes_written += sum(len(chunk['data']) for chunk in chunks)
+        return len(rows)
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Seal every closed window. Returns the number of rows sealed."""
+        now_epoch = to_epoch(now or datetime.now(timezone.utc))
+        sealed = 0
+        for series_type, (model, _) in SOURCES.items():
+            with self.bind.connect() as conn:
+                seal_until = self._seal_until(conn, series_type, now_epoch)
+            while seal_until is not None:
+                with self.bind.connect() as conn:
+                    oldest = conn.execute(
+                        select(func.min(model.timestamp)).where(model.timestamp < from_epoch(seal_until))
+                    ).scalar()
+                if oldest is None:
+                    break
+                start = to_epoch(oldest) // self.duration * self.duration
+                sealed += self._seal_window(series_type, start, start + self.duration)
+        return sealed
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of chunks and rows sealed and their compressed size."""
+        return {
+            'chunks_written': self.chunks_written,
+            'rows_sealed': self.rows_sealed,
+            'bytes_written': self.bytes_written,
+            'bytes_per_sample': round(self.bytes_written / self.rows_sealed, 2) if self.rows_sealed else 0.0
+        }
+
+    def _seal_loop(self):
+        """Background sealing loop."""
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error sealing metric chunks: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Start the background sealing job."""
+        if not self.running:
+            self.running = True
+            self._stop_event.clear()
+            self.thread = threading.Thread(target=self._seal_loop)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        """Stop the background sealing job."""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join()
@@ -1,74 +1,247 @@
-import schedule
 import time
 import threading
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
-from ..utils.database import SessionLocal
-from ..utils.models import ServiceMetrics, NodeMetrics
+from datetime import datetime
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import List, Dict, Any, Optional, Protocol, Tuple
+from .base_collector import BaseCollector
 from .service_collector import ServiceCollector
 from .node_collector import NodeCollector
+from .process_index import ProcessIndex
+from .system_snapshot import SystemSnapshot
+from .hot_window import HotWindow
+from .sampling_policy import SamplingPolicy
+from ..utils.instrumentation import stats
+
+class SampleSink(Protocol):
+    """Where stored samples go: the ``WriteBuffer``, or the edge agent's ``Spool``."""
+
+    def push(self, kind: str, record: Dict[str, Any]) -> bool:
+        """Queue one sample. Returns False if it was dropped."""
+        ...
+
+    def touch(self, kind: str, series: str, timestamp: datetime) -> None:
+        """Record that a sample was collected but not stored."""
+        ...
+
+    def start(self) -> None:
+        """Start any background work, e.g. flushing."""
+        ...
+
+    def stop(self) -> None:
+        """Stop background work and write out what is queued."""
+        ...
 
 class CollectionManager:
-    """Manager for metrics collection process."""
-    
-    def __init__(self, service_names: List[str], collection_interval: int = 60):
+    """Manager for metrics collection process.
+
+    Collectors run on a bounded worker pool with a per-collector timeout.
+    Each collector is scheduled on its own interval, aligned to boundaries of
+    the monotonic clock, so the sampling period does not drift by however long
+    a cycle took and a hung collector cannot stall the others.
+
+    The newest samples of every series are also kept in a ``HotWindow`` so
+    recent queries can be answered from memory.
+
+    A ``SamplingPolicy`` decides which samples are stored, dropping those
+    within the deadbands of every metric until the heartbeat, and may sample
+    a series faster or slower than its collector's interval. Suppressed
+    samples reach neither the hot window nor the write buffer.
+
+    Samples are handed to ``write_buffer``, any ``SampleSink``; the edge
+    agent passes a ``Spool``.
+    """
+
+    def __init__(self, service_names: List[str], collection_interval: int = 60,
+                 max_workers: int = 4, collector_timeout: Optional[float] = None,
+                 intervals: Optional[Dict[str, float]] = None,
+                 write_buffer: Optional[SampleSink] = None,
+                 hot_window: Optional[HotWindow] = None,
+                 sampling_policy: Optional[SamplingPolicy] = None):
+        intervals = intervals or {}
         self.service_names = service_names
         self.collection_interval = collection_interval
-        self.service_collectors = [ServiceCollector(name) for name in service_names]
-        self.node_collector = NodeCollector()
+        self.max_workers = max_workers
+        self.collector_timeout = collector_timeout or collection_interval
+        self.process_index = ProcessIndex()
+        self.process_index.refresh()
+        self.service_collectors = [
+            ServiceCollector(name, self.process_index, interval=intervals.get(name))
+            for name in service_names
+        ]
+        self.node_collector = NodeCollector(interval=intervals.get('node'))
+        self.collectors: List[BaseCollector] = self.service_collectors + [self.node_collector]
+        self.last_snapshot = SystemSnapshot()
+        if write_buffer is None:
+            # Imported lazily: the edge agent passes its own sink and runs without SQLAlchemy
+            from ..utils.write_buffer import WriteBuffer
+            write_buffer = WriteBuffer()
+        self.write_buffer: SampleSink = write_buffer
+        self.hot_window = hot_window or HotWindow()
+        self.sampling_policy = sampling_policy or SamplingPolicy()
         self.running = False
         self.thread = None
+        self._executor = None
+        self._stop_event = threading.Event()
+        self._next_due: Dict[BaseCollector, float] = {}
+        self._in_flight: Dict[BaseCollector, Future] = {}
 
-    def _collect_and_store_metrics(self):
-        """Collect and store metrics for all services and node."""
-        db = SessionLocal()
-        try:
-            # Collect and store service metrics
-            for collector in self.service_collectors:
-                metrics = collector.collect_metrics()
-                if 'error' not in metrics:
-                    service_metrics = ServiceMetrics(
-                        service_name=metrics['service_name'],
-                        cpu_usage=metrics['cpu_usage'],
-                        memory_usage=metrics['memory_usage'],
-                        network_in=metrics['network_in'],
-                        network_out=metrics['network_out'],
-                        disk_usage=metrics['disk_usage'],
-                        additional_metrics=metrics['additional_metrics']
-                    )
-                    db.add(service_metrics)
-
-            # Collect and store node metrics
-            node_metrics = self.node_collector.collect_metrics()
-            if 'error' not in node_metrics:
-                metrics = NodeMetrics(
-                    node_id=node_metrics['node_id'],
-                    cpu_usage=node_metrics['cpu_usage'],
-                    memory_usage=node_metrics['memory_usage'],
-                    disk_usage=node_metrics['disk_usage'],
-                    network_in=node_metrics['network_in'],
-                    network_out=node_metrics['network_out'],
-                    additional_metrics=node_metrics['additional_metrics']
-                )
-                db.add(metrics)
-
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            print(f"Error collecting metrics: {str(e)}")
-        finally:
-            db.close()
+    def _interval_for(self, collector: BaseCollector) -> float:
+        """Get the configured collection interval of a collector in seconds."""
+        return collector.interval or self.collection_interval
+
+    def _series_of(self, collector: BaseCollector) -> Tuple[str, str]:
+        """Get the record kind and series name a collector reports."""
+        if isinstance(collector, ServiceCollector):
+            return 'service', collector.service_name
+        return 'node', collector.node_id
+
+    def _sampling_interval(self, collector: BaseCollector) -> float:
+        """Get the current collection interval of a collector, as adapted by the sampling policy."""
+        kind, series = self._series_of(collector)
+        return self.sampling_policy.interval(kind, series, self._interval_for(collector))
+
+    def _next_boundary(self, now: float, interval: float) -> float:
+        """Get the first interval boundary of the monotonic clock after now."""
+        return (now // interval + 1) * interval
+
+    def _refresh_service_processes(self):
+        """Scan the process table once and hand each collector its process."""
+        self.process_index.refresh()
+        for collector in self.service_collectors:
+            process = collector.process
+            if process is None or not process.is_running():
+                collector.attach_process(self.process_index.find(collector.service_name))
+
+    def _clear_in_flight(self, collector: BaseCollector, future: Future) -> None:
+        """Let a collector that timed out run again once its collection finishes."""
+        self._in_flight.pop(collector, None)
+
+    def _timed_collect(self, collector: BaseCollector, snapshot: SystemSnapshot) -> Dict[str, Any]:
+        """Run one collector, recording how long it took."""
+        with stats.timer(f'collector.{collector.name}.duration_seconds'):
+            return collector.collect_metrics(snapshot)
+
+    def _collect_metrics(self, collectors: List[BaseCollector]) -> List[Dict[str, Any]]:
+        """Run the given collectors in parallel against one shared snapshot."""
+        if any(isinstance(c, ServiceCollector) for c in collectors):
+            self._refresh_service_processes()
+        snapshot = SystemSnapshot(self.last_snapshot)
+        self.last_snapshot = snapshot
+
+        executor = self._executor or ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {}
+        for collector in collectors:
+            if collector in self._in_flight:
+                print(f"Skipping collector {collector.name}: previous collection still running")
+                stats.increment('collector.skipped')
+                continue
+            futures[collector] = executor.submit(self._timed_collect, collector, snapshot)
+
+        results = []
+        deadline = time.monotonic() + self.collector_timeout
+        for collector, future in futures.items():
+            try:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except TimeoutError:
+                print(f"Collector {collector.name} timed out after {self.collector_timeout}s")
+                stats.increment('collector.timeouts')
+                self._in_flight[collector] = future
+                future.add_done_callback(partial(self._clear_in_flight, collector))
+            except Exception as e:
+                print(f"Error collecting metrics from {collector.name}: {str(e)}")
+                stats.increment('collector.errors')
+
+        if executor is not self._executor:
+            executor.shutdown(wait=False)
+        return results
+
+    def _store_metrics(self, results: List[Dict[str, Any]]):
+        """Queue collected service and node metrics for the write-behind flusher."""
+        intervals = {self._series_of(c): self._interval_for(c) for c in self.collectors}
+        for metrics in results:
+            if 'error' in metrics:
+                continue
+            if 'service_name' in metrics:
+                kind, record = 'service', {
+                    'service_name': metrics['service_name'],
+                    'timestamp': metrics['timestamp'],
+                    'cpu_usage': metrics['cpu_usage'],
+                    'memory_usage': metrics['memory_usage'],
+                    'network_in': metrics['network_in'],
+                    'network_out': metrics['network_out'],
+                    'disk_usage': metrics['disk_usage'],
+                    'additional_metrics': metrics['additional_metrics'],
+                    'inventory': metrics.get('inventory')
+                }
+            else:
+                kind, record = 'node', {
+                    'node_id': metrics['node_id'],
+                    'timestamp': metrics['timestamp'],
+                    'cpu_usage': metrics['cpu_usage'],
+                    'memory_usage': metrics['memory_usage'],
+                    'disk_usage': metrics['disk_usage'],
+                    'network_in': metrics['network_in'],
+                    'network_out': metrics['network_out'],
+                    'additional_metrics': metrics['additional_metrics'],
+                    'inventory': metrics.get('inventory')
+                }
+            series = record['service_name' if kind == 'service' else 'node_id']
+            stored = self.sampling_policy.filter(
+                kind, series, record, intervals.get((kind, series), self.collection_interval)
+            )
+            if stored is None:
+                stats.increment('collection.suppressed_samples')
+                # Readers can tell the series is alive and its values hold
+                self.write_buffer.touch(kind, series, record['timestamp'])
+                continue
+            self.hot_window.append(kind, stored)
+            if not self.write_buffer.push(kind, stored):
+                print(f"Write queue full, dropping {kind} metrics")
+                stats.increment('collection.dropped_samples')
+
+    def _collect_and_store_metrics(self, collectors: Optional[List[BaseCollector]] = None):
+        """Collect and store metrics for the given collectors (default: all)."""
+        with stats.timer('collection.cycle_seconds'):
+            try:
+                results = self._collect_metrics(collectors or self.collectors)
+            except Exception as e:
+                print(f"Error collecting metrics: {str(e)}")
+                stats.increment('collection.errors')
+                return
+            self._store_metrics(results)
 
     def _collection_loop(self):
         """Background collection loop."""
-        while self.running:
-            self._collect_and_store_metrics()
-            time.sleep(self.collection_interval)
+        now = time.monotonic()
+        for collector in self.collectors:
+            self._next_due[collector] = now
+
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            due = [c for c in self.collectors if self._next_due[c] <= now]
+            if due:
+                # How late the cycle starts compared to when it was due
+                stats.observe('collection.lag_seconds', now - min(self._next_due[c] for c in due))
+                self._collect_and_store_metrics(due)
+                now = time.monotonic()
+                for collector in due:
+                    self._next_due[collector] = self._next_boundary(
+                        now, self._sampling_interval(collector)
+                    )
+
+            wake_at = min(self._next_due.values())
+            self._stop_event.wait(max(wake_at - time.monotonic(), 0))
 
     def start(self):
         """Start the metrics collection process."""
         if not self.running:
             self.running = True
+            self._stop_event.clear()
+            self.write_buffer.start()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='collector'
+            )
             self.thread = threading.Thread(target=self._collection_loop)
             self.thread.daemon = True
             self.thread.start()
@@ -76,5 +249,11 @@ class CollectionManager:
     def stop(self):
         """Stop the metrics collection process."""
         self.running = False
+        self._stop_event.set()
         if self.thread:
-            self.thread.join() 
\ No newline at end of file
+            self.thread.join()
+        if self._executor:
+            # Do not wait for hung collectors; their threads finish on their own
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.write_buffer.stop()
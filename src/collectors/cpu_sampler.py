@@ -0,0 +1,69 @@
+import psutil
+import time
+from typing import Dict, Tuple, Any
+
+def _busy_and_total(times: Any) -> Tuple[float, float]:
+    """Split a cpu_times() result into busy and total seconds.
+
+    Mirrors psutil's own accounting: guest time is already included in user
+    time, and iowait counts as idle.
+    """
+    total = sum(times)
+    total -= getattr(times, 'guest', 0.0) + getattr(times, 'guest_nice', 0.0)
+    idle = times.idle + getattr(times, 'iowait', 0.0)
+    return total - idle, total
+
+def host_cpu_percent(previous: Any, current: Any) -> float:
+    """Calculate host CPU usage percentage between two cpu_times() snapshots."""
+    prev_busy, prev_total = _busy_and_total(previous)
+    busy, total = _busy_and_total(current)
+    total_delta = total - prev_total
+    if total_delta <= 0:
+        return 0.0
+    percent = (busy - prev_busy) / total_delta * 100
+    return round(min(max(percent, 0.0), 100.0), 1)
+
+class CpuSampler:
+    """Non-blocking per-process CPU usage sampler.
+
+    Keeps the previous CPU-times snapshot for every sampled process and
+    computes utilisation from the deltas between calls, instead of sleeping
+    inside ``psutil.cpu_percent(interval=...)``. Host CPU usage is derived the
+    same way from consecutive ``SystemSnapshot`` objects.
+    """
+
+    def __init__(self):
+        self._process_times: Dict[int, Tuple[float, float, float]] = {}
+
+    def prime(self, process: psutil.Process) -> None:
+        """Record a baseline for a process so its first sample is meaningful."""
+        cpu = process.cpu_times()
+        self._process_times[process.pid] = (
+            process.create_time(), cpu.user + cpu.system, time.monotonic()
+        )
+
+    def process_percent(self, process: psutil.Process) -> float:
+        """Get process CPU usage since the previous call.
+
+        Uses the same scale as ``psutil.Process.cpu_percent``, so a process
+        busy on several cores can report more than 100. Returns 0.0 the first
+        time a process is seen.
+        """
+        cpu = process.cpu_times()
+        now = time.monotonic()
+        create_time = process.create_time()
+        used = cpu.user + cpu.system
+        previous = self._process_times.get(process.pid)
+        self._process_times[process.pid] = (create_time, used, now)
+
+        # A different create_time means the PID was reused by a new process
+        if previous is None or previous[0] != create_time:
+            return 0.0
+        elapsed = now - previous[2]
+        if elapsed <= 0:
+            return 0.0
+        return round(max(used - previous[1], 0.0) / elapsed * 100, 1)
+
+    def forget(self, pid: int) -> None:
+        """Drop the baseline for a process that has gone away."""
+        self._process_times.pop(pid, None)
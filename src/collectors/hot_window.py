@@ -0,0 +1,152 @@
+import math
+import threading
+from array import array
+from collections import namedtuple
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.timeseries import to_epoch, from_epoch
+
+# Metrics kept in memory for every series
+METRICS = ('cpu_usage', 'memory_usage', 'disk_usage', 'network_in', 'network_out')
+
+# Column holding the series name, by record kind
+SERIES_KEYS = {
+    'service': 'service_name',
+    'node': 'node_id'
+}
+
+# Row types returned for each kind; they mirror the matching table columns
+SAMPLE_TYPES: Dict[str, Any] = {
+    kind: namedtuple(f'{kind.title()}Sample', (column, 'timestamp') + METRICS + ('id', 'additional_metrics'))
+    for kind, column in SERIES_KEYS.items()
+}
+
+class SeriesRing:
+    """Fixed-capacity ring of the newest samples of one series.
+
+    Timestamps (epoch seconds) and every metric live in their own ``array('d')``
+    column, so a sample costs a few dozen bytes instead of a dict per row.
+    Missing values are stored as NaN. Database ids, 0 until the sample has
+    been written, live in an ``array('q')``; ``additional_metrics`` are kept
+    by reference.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._columns = {
+            name: array('d', [math.nan]) * capacity for name in ('timestamp',) + METRICS
+        }
+        self._ids = array('q', [0]) * capacity
+        self._extras: List[Any] = [None] * capacity
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, values: Dict[str, Any]) -> None:
+        """Store a sample, overwriting the oldest one once the ring is full."""
+        self._columns['timestamp'][self._next] = timestamp
+        for name in METRICS:
+            value = values.get(name)
+            self._columns[name][self._next] = math.nan if value is None else value
+        self._ids[self._next] = 0
+        self._extras[self._next] = values.get('additional_metrics')
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def oldest(self) -> Optional[float]:
+        """Get the timestamp of the oldest retained sample."""
+        if not self._size:
+            return None
+        return self._columns['timestamp'][(self._next - self._size) % self.capacity]
+
+    def set_id(self, timestamp: float, row_id: int) -> bool:
+        """Record the database id of the newest sample at timestamp that has none yet."""
+        timestamps = self._columns['timestamp']
+        for offset in range(1, self._size + 1):
+            index = (self._next - offset) % self.capacity
+            if timestamps[index] == timestamp and not self._ids[index]:
+                self._ids[index] = row_id
+                return True
+        return False
+
+    def newest_first(self, count: Optional[int] = None) -> List[Tuple[Any, ...]]:
+        """Get the newest count (default: all) samples, newest first.
+
+        Each is a tuple of the timestamp, every metric, the id and the extras.
+        """
+        count = self._size if count is None else min(count, self._size)
+        columns = [self._columns[name] for name in ('timestamp',) + METRICS] + [self._ids, self._extras]
+        indexes = [(self._next - offset) % self.capacity for offset in range(1, count + 1)]
+        return [tuple(column[index] for column in columns) for index in indexes]
+
+class HotWindow:
+    """In-memory window of the newest samples of every service and node.
+
+    Recent queries whose whole range lies inside the window can be answered
+    without touching the database.
+    """
+
+    def __init__(self, capacity: int = 720):
+        self.capacity = capacity
+        self._rings: Dict[Tuple[str, str], SeriesRing] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def append(self, kind: str, record: Dict[str, Any]) -> None:
+        """Add a collected service or node record."""
+        if self.capacity <= 0:
+            return
+        key = (kind, record[SERIES_KEYS[kind]])
+        timestamp = to_epoch(record['timestamp'])
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = self._rings[key] = SeriesRing(self.capacity)
+            ring.append(timestamp, record)
+
+    def on_write(self, kind: str, records: List[Dict[str, Any]]) -> None:
+        """Write listener recording the database ids of written samples."""
+        with self._lock:
+            for record in records:
+                ring = self._rings.get((kind, record[SERIES_KEYS[kind]]))
+                if ring is not None and record.get('id'):
+                    ring.set_id(to_epoch(record['timestamp']), record['id'])
+
+    def _sample(self, kind: str, series: str, values: Tuple[Any, ...]):
+        timestamp, *metrics, row_id, extras = values
+        return SAMPLE_TYPES[kind](
+            series, from_epoch(timestamp),
+            *[None if math.isnan(value) else value for value in metrics],
+            row_id or None, extras
+        )
+
+    def latest(self, kind: str, series: str):
+        """Get the newest sample of a series, or None if it has none in memory."""
+        with self._lock:
+            ring = self._rings.get((kind, series))
+            samples = ring.newest_first(1) if ring else []
+        return self._sample(kind, series, samples[0]) if samples else None
+
+    def window(self, kind: str, series: str, start_time: datetime,
+               end_time: Optional[datetime] = None) -> Optional[List[Any]]:
+        """Get the samples of a series between start_time and end_time, newest first.
+
+        Returns None unless the window holds every sample collected since
+        start_time, i.e. its oldest sample is no newer than start_time.
+        """
+        start = to_epoch(start_time)
+        end = to_epoch(end_time) if end_time is not None else math.inf
+        with self._lock:
+            ring = self._rings.get((kind, series))
+            oldest = ring.oldest() if ring is not None else None
+            if ring is None or oldest is None or oldest > start:
+                return None
+            samples = ring.newest_first()
+        return [
+            self._sample(kind, series, values)
+            for values in samples if start <= values[0] <= end
+        ]
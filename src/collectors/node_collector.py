@@ -1,33 +1,37 @@
-import psutil
-import socket
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_collector import BaseCollector
+from .system_snapshot import SystemSnapshot
 
 class NodeCollector(BaseCollector):
     """Collector for Open Horizon node metrics."""
     
-    def __init__(self):
-        super().__init__()
-        self.node_id = socket.gethostname()
+    def __init__(self, interval: Optional[float] = None):
+        super().__init__(interval)
+        self.name = 'node'
 
-    def collect_metrics(self) -> Dict[str, Any]:
+    def collect_metrics(self, snapshot: Optional[SystemSnapshot] = None) -> Dict[str, Any]:
         """Collect metrics for the node."""
         try:
+            snapshot = self._take_snapshot(snapshot)
             metrics = {
                 'node_id': self.node_id,
-                'cpu_usage': self._get_cpu_usage(),
-                'memory_usage': self._get_memory_usage(),
-                'disk_usage': self._get_disk_usage(),
-                'network_in': self._calculate_network_rates()['in'],
-                'network_out': self._calculate_network_rates()['out'],
+                'timestamp': snapshot.timestamp,
+                'cpu_usage': snapshot.cpu_usage,
+                'memory_usage': snapshot.memory.percent,
+                'disk_usage': snapshot.disk.percent,
+                'network_in': snapshot.network_rates['in'],
+                'network_out': snapshot.network_rates['out'],
                 'additional_metrics': {
-                    'cpu_count': psutil.cpu_count(),
-                    'cpu_freq': psutil.cpu_freq()._asdict() if psutil.cpu_freq() else None,
-                    'memory_total': psutil.virtual_memory().total,
-                    'memory_available': psutil.virtual_memory().available,
-                    'disk_total': psutil.disk_usage('/').total,
-                    'disk_free': psutil.disk_usage('/').free,
-                    'boot_time': psutil.boot_time()
+                    'cpu_freq': snapshot.cpu_freq._asdict() if snapshot.cpu_freq else None,
+                    'memory_available': snapshot.memory.available,
+                    'disk_free': snapshot.disk.free
+                },
+                # Static facts, stored once in the inventory rather than on every row
+                'inventory': {
+                    'cpu_count': snapshot.cpu_count,
+                    'memory_total': snapshot.memory.total,
+                    'disk_total': snapshot.disk.total,
+                    'boot_time': snapshot.boot_time
                 }
             }
             return metrics
@@ -35,4 +39,4 @@ class NodeCollector(BaseCollector):
             return {
                 'node_id': self.node_id,
                 'error': f'Failed to collect metrics: {str(e)}'
-            } 
\ No newline at end of file
+            }
@@ -0,0 +1,59 @@
+import psutil
+import threading
+from typing import Dict, List, Optional
+
+class ProcessIndex:
+    """Shared index of the process table used for service discovery.
+
+    ``refresh()`` lists the current PIDs and only reads the command line of
+    processes that appeared since the previous refresh, so one index can serve
+    every ``ServiceCollector`` with a single cheap scan per cycle.
+    """
+
+    def __init__(self):
+        self._processes: Dict[int, psutil.Process] = {}
+        self._cmdlines: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Bring the index up to date by diffing the current PID set."""
+        current = set(psutil.pids())
+        with self._lock:
+            known = set(self._processes)
+            for pid in known - current:
+                self._forget(pid)
+
+        for pid in current - known:
+            try:
+                proc = psutil.Process(pid)
+                cmdline = ' '.join(proc.cmdline() or [])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            with self._lock:
+                self._processes[pid] = proc
+                self._cmdlines[pid] = cmdline
+
+    def _forget(self, pid: int) -> None:
+        self._processes.pop(pid, None)
+        self._cmdlines.pop(pid, None)
+
+    def find(self, service_name: str) -> Optional[psutil.Process]:
+        """Get the first live process whose command line mentions the service."""
+        with self._lock:
+            candidates = [
+                self._processes[pid] for pid in sorted(self._cmdlines)
+                if service_name in self._cmdlines[pid]
+            ]
+        for proc in candidates:
+            if proc.is_running():
+                return proc
+            with self._lock:
+                self._forget(proc.pid)
+        return None
+
+    def match(self, service_names: List[str]) -> Dict[str, Optional[psutil.Process]]:
+        """Match every service name against the index."""
+        return {name: self.find(name) for name in service_names}
+
+    def __len__(self) -> int:
+        return len(self._processes)
@@ -0,0 +1,196 @@
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.sql import Select
+from ..utils.database import engine
+from ..utils.models import ServiceMetrics, NodeMetrics, MetricRollup, RollupWatermark
+from ..utils.timeseries import ROLLUP_TIERS, ROLLUP_METRICS, to_epoch, from_epoch, bucket_expression, weighted_avg
+
+# Raw metrics table and series column for each series type
+SOURCES: Dict[str, Tuple[Any, Any]] = {
+    'service': (ServiceMetrics, ServiceMetrics.service_name),
+    'node': (NodeMetrics, NodeMetrics.node_id)
+}
+
+# Buckets rolled up per transaction while catching up on history
+MAX_BUCKETS_PER_BATCH = 10000
+
+class RollupManager:
+    """Background job maintaining rollup tiers of the raw metrics tables.
+
+    Each tier holds per-series min/max/avg/count at a fixed resolution. The
+    finest tier is computed from the raw rows and every coarser tier from the
+    tier below it. Only buckets that closed since the tier's watermark are
+    processed, so each run costs the same however much history exists.
+
+    A bucket only counts as closed ``grace`` seconds after it ends, so samples
+    still queued in the write buffer reach it in time. Samples that arrive
+    behind the watermark anyway, e.g. from remote ingest or a replayed agent
+    spool, are merged into the rolled-up buckets by the write buffer (see
+    ``merge_late_samples``).
+    """
+
+    def __init__(self, interval: int = 60, tiers: Sequence[int] = ROLLUP_TIERS, bind=None,
+                 grace: float = 30.0):
+        self.interval = interval
+        self.tiers = sorted(tiers)
+        self.grace = grace
+        self.bind = bind or engine
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    def _get_watermark(self, conn, series_type: str, resolution: int) -> Optional[float]:
+        watermark = conn.execute(
+            select(RollupWatermark.watermark).where(
+                RollupWatermark.series_type == series_type,
+                RollupWatermark.resolution == resolution
+            )
+        ).scalar()
+        return to_epoch(watermark) if watermark is not None else None
+
+    def _set_watermark(self, conn, series_type: str, resolution: int, watermark: float):
+        result = conn.execute(
+            update(RollupWatermark).where(
+                RollupWatermark.series_type == series_type,
+                RollupWatermark.resolution == resolution
+            ).values(watermark=from_epoch(watermark))
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(RollupWatermark).values(
+                series_type=series_type, resolution=resolution, watermark=from_epoch(watermark)
+            ))
+
+    def _first_sample(self, conn, series_type: str, source_resolution: Optional[int]) -> Optional[float]:
+        """Get the epoch time of the oldest data the tier would be built from."""
+        if source_resolution is None:
+            model, _ = SOURCES[series_type]
+            first = conn.execute(select(func.min(model.timestamp))).scalar()
+        else:
+            first = conn.execute(
+                select(func.min(MetricRollup.bucket)).where(
+                    MetricRollup.series_type == series_type,
+                    MetricRollup.resolution == source_resolution
+                )
+            ).scalar()
+        return to_epoch(first) if first is not None else None
+
+    def _raw_statement(self, series_type: str, resolution: int, start: float, end: float,
+                       dialect_name: str) -> Select:
+        """Aggregate raw rows in [start, end) into buckets of the finest tier."""
+        model, series_column = SOURCES[series_type]
+        bucket = bucket_expression(model.timestamp, resolution, dialect_name).label('bucket')
+        columns = [series_column.label('series'), bucket, func.count(model.id).label('count')]
+        for metric in ROLLUP_METRICS:
+            column = getattr(model, metric)
+            columns += [
+                func.min(column).label(f'{metric}_min'),
+                func.max(column).label(f'{metric}_max'),
+                func.avg(column).label(f'{metric}_avg'),
+                func.count(column).label(f'{metric}_count')
+            ]
+        return select(*columns).where(
+            model.timestamp >= from_epoch(start),
+            model.timestamp < from_epoch(end)
+        ).group_by(series_column, bucket)
+
+    def _cascade_statement(self, series_type: str, resolution: int, source_resolution: int,
+                           start: float, end: float, dialect_name: str) -> Select:
+        """Combine buckets of a finer tier in [start, end) into coarser buckets."""
+        bucket = bucket_expression(MetricRollup.bucket, resolution, dialect_name).label('bucket')
+        total = func.sum(MetricRollup.count)
+        columns = [MetricRollup.series, bucket, total.label('count')]
+        for metric in ROLLUP_METRICS:
+            count = getattr(MetricRollup, f'{metric}_count')
+            columns += [
+                func.min(getattr(MetricRollup, f'{metric}_min')).label(f'{metric}_min'),
+                func.max(getattr(MetricRollup, f'{metric}_max')).label(f'{metric}_max'),
+                weighted_avg(getattr(MetricRollup, f'{metric}_avg'), count).label(f'{metric}_avg'),
+                func.sum(count).label(f'{metric}_count')
+            ]
+        return select(*columns).where(
+            MetricRollup.series_type == series_type,
+            MetricRollup.resolution == source_resolution,
+            MetricRollup.bucket >= from_epoch(start),
+            MetricRollup.bucket < from_epoch(end)
+        ).group_by(MetricRollup.series, bucket)
+
+    def _roll_up(self, series_type: str, resolution: int, source_resolution: Optional[int],
+                 now: float) -> int:
+        """Roll up every closed bucket of one tier past its watermark."""
+        dialect_name = self.bind.dialect.name
+        closed_until = (now - self.grace) // resolution * resolution
+        with self.bind.connect() as conn:
+            if source_resolution is not None:
+                # A coarser bucket is only closed once the finer tier covers it
+                source_watermark = self._get_watermark(conn, series_type, source_resolution)
+                if source_watermark is None:
+                    return 0
+                closed_until = min(closed_until, source_watermark // resolution * resolution)
+            watermark = self._get_watermark(conn, series_type, resolution)
+            if watermark is None:
+                first = self._first_sample(conn, series_type, source_resolution)
+                if first is None:
+                    return 0
+                watermark = first // resolution * resolution
+
+        written = 0
+        while watermark < closed_until:
+            batch_end = min(closed_until, watermark + resolution * MAX_BUCKETS_PER_BATCH)
+            if source_resolution is None:
+                statement = self._raw_statement(
+                    series_type, resolution, watermark, batch_end, dialect_name
+                )
+            else:
+                statement = self._cascade_statement(
+                    series_type, resolution, source_resolution, watermark, batch_end, dialect_name
+                )
+            with self.bind.begin() as conn:
+                rows = [
+                    dict(row, series_type=series_type, resolution=resolution,
+                         bucket=from_epoch(row['bucket']))
+                    for row in conn.execute(statement).mappings()
+                ]
+                if rows:
+                    conn.execute(insert(MetricRollup), rows)
+                self._set_watermark(conn, series_type, resolution, batch_end)
+            written += len(rows)
+            watermark = batch_end
+        return written
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Roll up all tiers once. Returns the number of rollup rows written."""
+        now_epoch = to_epoch(now or datetime.now(timezone.utc))
+        written = 0
+        for series_type in SOURCES:
+            source_resolution = None
+            for resolution in self.tiers:
+                written += self._roll_up(series_type, resolution, source_resolution, now_epoch)
+                source_resolution = resolution
+        return written
+
+    def _rollup_loop(self):
+        """Background rollup loop."""
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error rolling up metrics: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Start the background rollup job."""
+        if not self.running:
+            self.running = True
+            self._stop_event.clear()
+            self.thread = threading.Thread(target=self._rollup_loop)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        """Stop the background rollup job."""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join()
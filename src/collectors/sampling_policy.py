@@ -0,0 +1,142 @@
+from typing import Any, Dict, Optional, Tuple
+from .hot_window import METRICS
+
+# Key of additional_metrics counting the samples suppressed before a stored one
+SUPPRESSED_KEY = '_suppressed'
+
+class Deadband:
+    """Change below which a metric counts as unchanged, absolute or relative to the old value."""
+
+    def __init__(self, value: float, relative: bool = False):
+        self.value = value
+        self.relative = relative
+
+    def exceeded(self, old: Optional[float], new: Optional[float], scale: float = 1.0) -> bool:
+        """Check whether new differs from old by more than the deadband, after scaling the change."""
+        if old is None or new is None:
+            return old is not new
+        limit = self.value * abs(old) if self.relative else self.value
+        return abs(new - old) * scale > limit
+
+def parse_deadbands(spec: str) -> Dict[str, Deadband]:
+    """Parse ``metric=value`` pairs, comma-separated; a value ending in % is relative."""
+    deadbands = {}
+    for item in spec.split(','):
+        if not item:
+            continue
+        name, _, value = item.partition('=')
+        if name not in METRICS:
+            raise ValueError(f'Unknown metric for deadband: {name}')
+        if value.endswith('%'):
+            deadbands[name] = Deadband(float(value[:-1]) / 100, relative=True)
+        else:
+            deadbands[name] = Deadband(float(value))
+    return deadbands
+
+class SeriesState:
+    """What the policy remembers about one series."""
+
+    def __init__(self, record: Dict[str, Any]):
+        # Last stored sample, and last sample whether stored or not
+        self.stored = record
+        self.previous = record
+        self.suppressed = 0
+        self.factor = 1.0
+
+class SamplingPolicy:
+    """Decides which samples are stored and how often each series is sampled.
+
+    With deadbands, a sample is stored only if one of the metrics moved past
+    its deadband since the last stored sample, the inventory changed, or
+    ``heartbeat`` seconds have passed. Metrics without a deadband are not
+    compared: their values are stored along with a sample stored for any of
+    those reasons. The next stored sample carries the number of samples
+    suppressed before it under ``additional_metrics['_suppressed']``, so
+    readers can tell a gap of unchanged values from missing data.
+
+    With ``adaptive`` and deadbands, the interval of a series is halved, down to
+    1/``speedup`` of the collector's interval, after a sample in which a metric
+    with a deadband changed faster than its deadband per interval, and doubled
+    otherwise, up to ``backoff`` times the interval but never past the
+    heartbeat.
+    """
+
+    def __init__(self, deadbands: Optional[Dict[str, Deadband]] = None, heartbeat: float = 600.0,
+                 adaptive: bool = False, speedup: float = 4.0, backoff: float = 4.0):
+        self.deadbands = deadbands or {}
+        self.heartbeat = heartbeat
+        self.adaptive = adaptive
+        self.min_factor = 1 / speedup
+        self.max_factor = backoff
+        self._series: Dict[Tuple[str, str], SeriesState] = {}
+
+    def _changed(self, old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+        """Check whether any metric with a deadband moved past it between two samples."""
+        return any(
+            deadband.exceeded(old[name], new[name]) for name, deadband in self.deadbands.items()
+        )
+
+    def _changing(self, previous: Dict[str, Any], record: Dict[str, Any], interval: float) -> bool:
+        """Check whether a metric with a deadband changed faster than its deadband per interval."""
+        elapsed = (record['timestamp'] - previous['timestamp']).total_seconds()
+        if elapsed <= 0:
+            return False
+        # Changes are compared per collector interval, whatever the current sampling rate
+        scale = interval / elapsed
+        return any(
+            deadband.exceeded(previous[name], record[name], scale)
+            for name, deadband in self.deadbands.items()
+        )
+
+    def filter(self, kind: str, series: str, record: Dict[str, Any],
+               interval: float) -> Optional[Dict[str, Any]]:
+        """Get the record to store for a sample, or None if it is suppressed.
+
+        interval is the collector's configured interval in seconds.
+        """
+        if not self.deadbands:
+            return record
+        key = (kind, series)
+        state = self._series.get(key)
+        if state is None:
+            self._series[key] = SeriesState(record)
+            return record
+        if self.adaptive:
+            if self._changing(state.previous, record, interval):
+                state.factor = max(state.factor / 2, self.min_factor)
+            else:
+                state.factor = min(state.factor * 2, self.max_factor)
+        state.previous = record
+
+        stored = state.stored
+        elapsed = (record['timestamp'] - stored['timestamp']).total_seconds()
+        if (elapsed < self.heartbeat and record.get('inventory') == stored.get('inventory')
+                and not self._changed(stored, record)):
+            state.suppressed += 1
+            return None
+        if state.suppressed:
+            record = dict(record, additional_metrics=dict(
+                record.get('additional_metrics') or {}, **{SUPPRESSED_KEY: state.suppressed}
+            ))
+            state.suppressed = 0
+        state.stored = record
+        return record
+
+    def interval(self, kind: str, series: str, interval: float) -> float:
+        """Get the current sampling interval of a series from its collector's interval."""
+        state = self._series.get((kind, series))
+        if state is None or state.factor == 1.0:
+            return interval
+        if state.factor > 1.0:
+            # Backing off never stretches gaps past the heartbeat
+            return max(min(interval * state.factor, self.heartbeat), interval)
+        return interval * state.factor
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of series tracked and how many are sampled faster or slower than configured."""
+        factors = [state.factor for state in self._series.values()]
+        return {
+            'series': len(factors),
+            'sampled_faster': sum(1 for factor in factors if factor < 1.0),
+            'sampled_slower': sum(1 for factor in factors if factor > 1.0)
+        }
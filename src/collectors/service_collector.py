@@ -1,27 +1,40 @@
 import psutil
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base_collector import BaseCollector
+from .process_index import ProcessIndex
+from .system_snapshot import SystemSnapshot
 
 class ServiceCollector(BaseCollector):
     """Collector for Open Horizon service metrics."""
     
-    def __init__(self, service_name: str):
-        super().__init__()
+    def __init__(self, service_name: str, process_index: Optional[ProcessIndex] = None,
+                 interval: Optional[float] = None):
+        super().__init__(interval)
         self.service_name = service_name
+        self.name = service_name
+        # A shared index is refreshed by its owner once per cycle; a private
+        # one is refreshed here whenever the process has to be looked up.
+        self._owns_index = process_index is None
+        self.process_index = process_index or ProcessIndex()
+        self.process = None
         self._find_service_process()
 
     def _find_service_process(self) -> None:
         """Find the process for the Open Horizon service."""
-        self.process = None
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+        if self._owns_index:
+            self.process_index.refresh()
+        self.attach_process(self.process_index.find(self.service_name))
+
+    def attach_process(self, process: Optional[psutil.Process]) -> None:
+        """Use the given process handle for subsequent collections."""
+        if process is not None and process is not self.process:
             try:
-                if self.service_name in ' '.join(proc.info['cmdline'] or []):
-                    self.process = proc
-                    break
+                self.cpu_sampler.prime(process)
             except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+                process = None
+        self.process = process
 
-    def collect_metrics(self) -> Dict[str, Any]:
+    def collect_metrics(self, snapshot: Optional[SystemSnapshot] = None) -> Dict[str, Any]:
         """Collect metrics for the service."""
         if not self.process:
             self._find_service_process()
@@ -32,25 +45,31 @@ class ServiceCollector(BaseCollector):
                 }
 
         try:
+            snapshot = self._take_snapshot(snapshot)
             with self.process.oneshot():
                 metrics = {
                     'service_name': self.service_name,
-                    'cpu_usage': self.process.cpu_percent(),
+                    'timestamp': snapshot.timestamp,
+                    'cpu_usage': self.cpu_sampler.process_percent(self.process),
                     'memory_usage': self.process.memory_percent(),
-                    'network_in': self._calculate_network_rates()['in'],
-                    'network_out': self._calculate_network_rates()['out'],
-                    'disk_usage': self._get_disk_usage(),
+                    'network_in': snapshot.network_rates['in'],
+                    'network_out': snapshot.network_rates['out'],
+                    'disk_usage': snapshot.disk.percent,
                     'additional_metrics': {
                         'num_threads': self.process.num_threads(),
                         'num_fds': self.process.num_fds() if hasattr(self.process, 'num_fds') else None,
-                        'create_time': self.process.create_time(),
                         'status': self.process.status()
+                    },
+                    # Static facts, stored once in the inventory rather than on every row
+                    'inventory': {
+                        'create_time': self.process.create_time()
                     }
                 }
                 return metrics
         except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self.cpu_sampler.forget(self.process.pid)
             self.process = None
             return {
                 'service_name': self.service_name,
                 'error': 'Failed to collect metrics'
-            } 
\ No newline at end of file
+            }
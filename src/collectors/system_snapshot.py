@@ -0,0 +1,42 @@
+import psutil
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from .cpu_sampler import host_cpu_percent
+
+class SystemSnapshot:
+    """Host-wide readings taken once per collection cycle.
+
+    Every collector in a cycle reads memory, disk, network and CPU figures from
+    the same snapshot, so the number of host syscalls stays constant however
+    many services are configured. Rates are computed against the previous
+    snapshot, which gives every collector the same, correct interval.
+    """
+
+    def __init__(self, previous: Optional['SystemSnapshot'] = None):
+        self.taken_at = time.monotonic()
+        self.timestamp = datetime.now(timezone.utc)
+        self.cpu_times = psutil.cpu_times()
+        self.cpu_count = psutil.cpu_count()
+        self.cpu_freq = psutil.cpu_freq()
+        self.memory = psutil.virtual_memory()
+        self.disk = psutil.disk_usage('/')
+        self.net_io = psutil.net_io_counters()
+        self.boot_time = psutil.boot_time()
+
+        if previous is None:
+            self.cpu_usage = 0.0
+            self.network_rates = {'in': 0.0, 'out': 0.0}
+        else:
+            self.cpu_usage = host_cpu_percent(previous.cpu_times, self.cpu_times)
+            self.network_rates = self._network_rates(previous)
+
+    def _network_rates(self, previous: 'SystemSnapshot') -> Dict[str, float]:
+        """Calculate network I/O rates since the previous snapshot."""
+        time_diff = self.taken_at - previous.taken_at
+        if time_diff <= 0:
+            return {'in': 0.0, 'out': 0.0}
+        return {
+            'in': (self.net_io.bytes_recv - previous.net_io.bytes_recv) / time_diff,
+            'out': (self.net_io.bytes_sent - previous.net_io.bytes_sent) / time_diff
+        }
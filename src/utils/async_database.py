@@ -0,0 +1,44 @@
+import os
+from typing import Any, Dict
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .database import DATABASE_URL, SQL_ECHO
+
+# Async drivers replacing the synchronous ones of DATABASE_URL
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg'
+}
+
+def async_database_url(url: str) -> str:
+    """Get the async driver URL for a synchronous database URL."""
+    scheme, separator, rest = url.partition('://')
+    dialect = scheme.split('+')[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {dialect}; set ASYNC_DATABASE_URL')
+    return ASYNC_DRIVERS[dialect] + separator + rest
+
+def pool_options(url: str) -> Dict[str, Any]:
+    """Get the connection pool settings for an async database URL.
+
+    aiosqlite opens a new connection, and thread, per checkout by default;
+    file databases get a pool like every other backend. In-memory databases
+    keep their single shared connection.
+    """
+    if url.startswith('sqlite') and ':memory:' in url:
+        return {}
+    options: Dict[str, Any] = {
+        'pool_size': int(os.getenv('ASYNC_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('ASYNC_POOL_OVERFLOW', '20'))
+    }
+    if url.startswith('sqlite'):
+        options['poolclass'] = AsyncAdaptedQueuePool
+    return options
+
+# Same database as the synchronous engine unless overridden
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL') or async_database_url(DATABASE_URL)
+
+# Queries waiting for a connection yield to the event loop instead of blocking
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=SQL_ECHO, **pool_options(ASYNC_DATABASE_URL))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
@@ -0,0 +1,85 @@
+import json
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from .gorilla import BitReader, BitWriter, encode_integers, decode_integers, encode_floats, decode_floats
+
+# Float columns of a chunk, in stream order
+CHUNK_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage', 'network_in', 'network_out')
+
+# Columns stored as compressed JSON after the bit streams
+CHUNK_EXTRAS = ('additional_metrics', 'inventory_id')
+
+# Bit streams of a chunk, in order; each starts on a byte boundary
+STREAMS = ('timestamp', 'id') + CHUNK_METRICS
+
+# Format version, sample count and the length in bytes of every stream
+HEADER = struct.Struct('>BI' + 'I' * len(STREAMS))
+VERSION = 1
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAIVE_EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+def to_micros(value: datetime) -> int:
+    """Convert a datetime to integer epoch microseconds, treating naive values as UTC."""
+    return (value - (NAIVE_EPOCH if value.tzinfo is None else EPOCH)) // MICROSECOND
+
+def from_micros(value: int, aware: bool = True) -> datetime:
+    """Convert epoch microseconds to a UTC datetime, naive unless aware."""
+    return (EPOCH if aware else NAIVE_EPOCH) + value * MICROSECOND
+
+def encode_chunk(rows: Sequence[Dict[str, Any]]) -> bytes:
+    """Encode samples of one series, oldest first, into a chunk.
+
+    Every row needs ``id`` and ``timestamp``; missing metrics and extras are
+    stored as None. Timestamps keep their full microsecond precision. Each
+    column is a separate bit stream, so readers decode only the columns
+    they need.
+    """
+    streams = []
+    for name in STREAMS:
+        writer = BitWriter()
+        if name == 'timestamp':
+            encode_integers(writer, [to_micros(row['timestamp']) for row in rows])
+        elif name == 'id':
+            encode_integers(writer, [row['id'] for row in rows])
+        else:
+            encode_floats(writer, [row.get(name) for row in rows])
+        streams.append(writer.getvalue())
+    extras = {}
+    for name in CHUNK_EXTRAS:
+        values = [row.get(name) for row in rows]
+        if any(value is not None for value in values):
+            extras[name] = values
+    packed = zlib.compress(json.dumps(extras, separators=(',', ':')).encode())
+    header = HEADER.pack(VERSION, len(rows), *[len(stream) for stream in streams])
+    return header + b''.join(streams) + packed
+
+def decode_chunk(data: bytes, columns: Optional[Iterable[str]] = None) -> Dict[str, List[Any]]:
+    """Decode a chunk to one list per column, timestamps as epoch microseconds.
+
+    The timestamp and id are always decoded; other columns only if they are
+    in columns (default: all).
+    """
+    version, count, *lengths = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f'Unsupported chunk version: {version}')
+    wanted = set(STREAMS + CHUNK_EXTRAS if columns is None else columns) | {'timestamp', 'id'}
+    decoded: Dict[str, List[Any]] = {}
+    offset = HEADER.size
+    for name, length in zip(STREAMS, lengths):
+        if name in wanted:
+            reader = BitReader(data[offset:offset + length])
+            if name in ('timestamp', 'id'):
+                decoded[name] = decode_integers(reader, count)
+            else:
+                decoded[name] = decode_floats(reader, count)
+        offset += length
+    if wanted & set(CHUNK_EXTRAS):
+        extras = json.loads(zlib.decompress(data[offset:]))
+        for name in CHUNK_EXTRAS:
+            if name in wanted:
+                decoded[name] = extras.get(name) or [None] * count
+    return decoded
@@ -13,8 +13,11 @@ os.makedirs(data_dir, exist_ok=True)
 # Get database URL from environment variable or use SQLite as default
 DATABASE_URL = os.getenv('DATABASE_URL', f'sqlite:///{os.path.join(data_dir, "metrics.db")}')
 
-# Create SQLAlchemy engine with echo=True for debugging
-engine = create_engine(DATABASE_URL, echo=True)
+# Log every SQL statement only when asked to; logging is costly on hot paths
+SQL_ECHO = os.getenv('SQL_ECHO', 'false').lower() in ('1', 'true', 'yes')
+
+# Create SQLAlchemy engine
+engine = create_engine(DATABASE_URL, echo=SQL_ECHO)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,186 @@
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+# Bit widths of the delta-of-delta buckets. A zero delta-of-delta takes one
+# bit; any other value is zigzag encoded into the first bucket it fits, after
+# a prefix of one 1 bit per bucket index.
+DOD_BUCKETS = (7, 12, 20, 32, 64)
+
+DOUBLE = struct.Struct('>d')
+UINT64 = struct.Struct('>Q')
+
+# Bit pattern standing for a missing value: a quiet NaN other than Python's
+MISSING = 0x7ff8000000000001
+
+class BitWriter:
+    """Append-only stream of bits, most significant bit first."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._bits = 0
+        self._count = 0
+
+    def write(self, value: int, width: int) -> None:
+        """Append the low width bits of value."""
+        self._bits = (self._bits << width) | (value & ((1 << width) - 1))
+        self._count += width
+        while self._count >= 8:
+            self._count -= 8
+            self._buffer.append((self._bits >> self._count) & 0xff)
+        self._bits &= (1 << self._count) - 1
+
+    def getvalue(self) -> bytes:
+        """Get the bytes written so far, padding the last one with zero bits."""
+        if self._count:
+            return bytes(self._buffer) + bytes([(self._bits << (8 - self._count)) & 0xff])
+        return bytes(self._buffer)
+
+class BitReader:
+    """Reads the bits of a BitWriter stream back, in order.
+
+    The stream is expanded once into ``bits``, a string of '0' and '1'
+    characters, so each read is a string slice and an int() call. The
+    decoders below read ``bits`` directly and advance ``position``.
+    """
+
+    def __init__(self, data: bytes):
+        self.bits = bin(int.from_bytes(data, 'big'))[2:].zfill(len(data) * 8) if data else ''
+        self.position = 0
+
+    def read(self, width: int) -> int:
+        """Read the next width bits as an unsigned integer."""
+        start = self.position
+        end = start + width
+        if end > len(self.bits):
+            raise ValueError('Read past the end of the bit stream')
+        self.position = end
+        return int(self.bits[start:end], 2)
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+def encode_integers(writer: BitWriter, values: Sequence[int]) -> None:
+    """Write non-negative integers as the first value and delta-of-deltas.
+
+    Regularly spaced values, such as timestamps of a fixed collection
+    interval or consecutive ids, cost one bit each.
+    """
+    if not values:
+        return
+    writer.write(values[0], 64)
+    previous, delta = values[0], 0
+    for value in values[1:]:
+        new_delta = value - previous
+        dod = _zigzag(new_delta - delta)
+        if dod == 0:
+            writer.write(0, 1)
+        else:
+            for index, width in enumerate(DOD_BUCKETS):
+                if dod < (1 << width):
+                    last = index == len(DOD_BUCKETS) - 1
+                    # index + 1 one bits, terminated by a zero except for the last bucket
+                    writer.write(((1 << (index + 1)) - 1) << (0 if last else 1), index + 1 + (not last))
+                    writer.write(dod, width)
+                    break
+            else:
+                raise ValueError(f'Delta-of-delta too large to encode: {new_delta - delta}')
+        previous, delta = value, new_delta
+
+def decode_integers(reader: BitReader, count: int) -> List[int]:
+    """Read count integers written by encode_integers."""
+    if not count:
+        return []
+    bits, position = reader.bits, reader.position
+    last_bucket = len(DOD_BUCKETS) - 1
+    try:
+        values = [int(bits[position:position + 64], 2)]
+        position += 64
+        delta = 0
+        for _ in range(count - 1):
+            index = -1
+            while index < last_bucket:
+                bit = bits[position]
+                position += 1
+                if bit == '0':
+                    break
+                index += 1
+            if index >= 0:
+                width = DOD_BUCKETS[index]
+                delta += _unzigzag(int(bits[position:position + width], 2))
+                position += width
+            values.append(values[-1] + delta)
+    except (IndexError, ValueError) as e:
+        raise ValueError('Corrupt integer stream') from e
+    reader.position = position
+    return values
+
+def encode_floats(writer: BitWriter, values: Sequence[Optional[float]]) -> None:
+    """Write floats XOR-ed with their predecessor, storing only the meaningful bits.
+
+    A repeated value costs one bit and a slowly changing one a few more than
+    its changed mantissa bits. None is stored as the MISSING bit pattern.
+    """
+    if not values:
+        return
+    words = [MISSING if value is None else UINT64.unpack(DOUBLE.pack(value))[0] for value in values]
+    writer.write(words[0], 64)
+    previous = words[0]
+    window = None
+    for word in words[1:]:
+        xor = word ^ previous
+        previous = word
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        leading = 64 - xor.bit_length()
+        trailing = (xor & -xor).bit_length() - 1
+        if window is not None and leading >= window[0] and trailing >= window[1]:
+            # The changed bits fit in the previous window: reuse its position
+            writer.write(0b10, 2)
+            writer.write(xor >> window[1], 64 - window[0] - window[1])
+        else:
+            significant = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 6)
+            writer.write(significant - 1, 6)
+            writer.write(xor >> trailing, significant)
+            window = (leading, trailing)
+
+def decode_floats(reader: BitReader, count: int) -> List[Optional[float]]:
+    """Read count floats written by encode_floats."""
+    if not count:
+        return []
+    bits, position = reader.bits, reader.position
+    try:
+        words = [int(bits[position:position + 64], 2)]
+        position += 64
+        window: Optional[Tuple[int, int]] = None
+        for _ in range(count - 1):
+            if bits[position] == '0':
+                position += 1
+                words.append(words[-1])
+                continue
+            if bits[position + 1] == '1':
+                leading = int(bits[position + 2:position + 8], 2)
+                window = (leading, 64 - leading - int(bits[position + 8:position + 14], 2) - 1)
+                position += 14
+            elif window is None:
+                raise ValueError('Float window used before it was set')
+            else:
+                position += 2
+            leading, trailing = window
+            width = 64 - leading - trailing
+            words.append(words[-1] ^ (int(bits[position:position + width], 2) << trailing))
+            position += width
+    except (IndexError, ValueError) as e:
+        raise ValueError('Corrupt float stream') from e
+    reader.position = position
+    values: List[Optional[float]] = list(struct.unpack(f'>{count}d', struct.pack(f'>{count}Q', *words)))
+    if MISSING in words:
+        for index, word in enumerate(words):
+            if word == MISSING:
+                values[index] = None
+    return values
@@ -0,0 +1,109 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+# Bucket upper bounds for durations in seconds and for row counts
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max.
+
+    Recording a value is a bisect and a few additions, cheap enough for every
+    request and collection. Percentiles are estimated as the upper bound of
+    the bucket they fall in.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """Estimate a percentile (0-1) from the bucket counts."""
+        if not self.count or self.max is None:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'min': self.min,
+            'max': self.max,
+            'mean': round(self.total / self.count, 6) if self.count else 0.0,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99)
+        }
+
+class StatsRegistry:
+    """Process-wide registry of named counters and histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._histograms: Dict[str, Histogram] = {}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add amount to a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DURATION_BUCKETS) -> None:
+        """Record a value in a histogram, creating it with the given buckets."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    def observe_count(self, name: str, value: int) -> None:
+        """Record a row or item count in a histogram."""
+        self.observe(name, value, COUNT_BUCKETS)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Record the duration of the with block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get every counter and histogram summary, sorted by name."""
+        with self._lock:
+            return {
+                'counters': dict(sorted(self._counters.items())),
+                'histograms': {
+                    name: histogram.snapshot()
+                    for name, histogram in sorted(self._histograms.items())
+                }
+            }
+
+# Shared registry for the collectors, write path and API
+stats = StatsRegistry()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import SeriesInventory
+
+# Column holding the series name, by record kind
+SERIES_KEYS = {
+    'service': 'service_name',
+    'node': 'node_id'
+}
+
+# Facts kept in the inventory instead of on every metric row, by record kind
+INVENTORY_FACTS = {
+    'service': ('create_time',),
+    'node': ('cpu_count', 'memory_total', 'disk_total', 'boot_time')
+}
+
+# Dialects with an INSERT ... ON CONFLICT DO NOTHING construct
+INSERT_DIALECTS: Dict[str, Callable[..., Any]] = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+InventoryKey = Tuple[str, str, str]
+
+def fingerprint(facts: Dict[str, Any]) -> str:
+    """Get a stable digest of a set of facts."""
+    return hashlib.sha1(json.dumps(facts, sort_keys=True, default=str).encode()).hexdigest()
+
+class Inventory:
+    """Maps the static facts of each series to their ``series_inventory`` row.
+
+    Ids are remembered in memory, so a row is only read or inserted the first
+    time a series reports a given set of facts, e.g. after a node reboots or
+    a service restarts.
+    """
+
+    def __init__(self):
+        self._ids: Dict[InventoryKey, int] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, conn, kind: str, series: str, digest: str,
+                facts: Dict[str, Any], timestamp) -> int:
+        """Get the id of an inventory row, inserting it if it is new."""
+        table = SeriesInventory.__table__
+        values = {
+            'series_type': kind,
+            'series': series,
+            'fingerprint': digest,
+            'facts': facts,
+            'first_seen': timestamp
+        }
+        dialect_insert = INSERT_DIALECTS.get(conn.dialect.name)
+        if dialect_insert is not None:
+            # Another process may insert the same facts concurrently
+            conn.execute(dialect_insert(table).values(values).on_conflict_do_nothing())
+        existing = conn.execute(
+            select(table.c.id).where(
+                table.c.series_type == kind,
+                table.c.series == series,
+                table.c.fingerprint == digest
+            )
+        ).scalar()
+        if existing is None:
+            existing = conn.execute(insert(table).values(values)).inserted_primary_key[0]
+        return existing
+
+    def resolve(self, conn, kind: str, records: List[Dict[str, Any]]) -> Dict[InventoryKey, int]:
+        """Set ``inventory_id`` on every record from its ``inventory`` facts.
+
+        Records without facts get None. Returns the ids looked up in the
+        database; pass them to ``remember`` once the transaction commits, so
+        a rolled back insert is never cached.
+        """
+        found: Dict[InventoryKey, int] = {}
+        for record in records:
+            facts = record.get('inventory')
+            if not facts:
+                record['inventory_id'] = None
+                continue
+            series = record[SERIES_KEYS[kind]]
+            key = (kind, series, fingerprint(facts))
+            inventory_id = self._ids.get(key) or found.get(key)
+            if inventory_id is None:
+                inventory_id = found[key] = self._lookup(
+                    conn, kind, series, key[2], facts, record['timestamp']
+                )
+            record['inventory_id'] = inventory_id
+        return found
+
+    def remember(self, ids: Dict[InventoryKey, int]) -> None:
+        """Cache ids returned by ``resolve`` after their transaction committed."""
+        with self._lock:
+            self._ids.update(ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+def split_facts(kind: str, additional_metrics: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Separate the inventory facts from the rest of a row's additional metrics."""
+    if not additional_metrics:
+        return {}, additional_metrics
+    names = INVENTORY_FACTS[kind]
+    facts = {name: additional_metrics[name] for name in names if name in additional_metrics}
+    rest = {name: value for name, value in additional_metrics.items() if name not in names}
+    return facts, rest
+
+# Shared inventory used by the write buffer
+inventory = Inventory()
@@ -0,0 +1,97 @@
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import select, insert, delete
+from .models import MetricRollup, RollupWatermark
+from .timeseries import ROLLUP_METRICS, to_epoch, from_epoch
+
+# Column holding the series name, by record kind
+SERIES_KEYS = {
+    'service': 'service_name',
+    'node': 'node_id'
+}
+
+def _summarise(records: List[Dict[str, Any]], kind: str,
+               resolution: int) -> Dict[Tuple[str, float], Dict[str, Any]]:
+    """Summarise records into one partial rollup row per series and bucket."""
+    buckets: Dict[Tuple[str, float], Dict[str, Any]] = {}
+    for record in records:
+        series = record[SERIES_KEYS[kind]]
+        bucket = to_epoch(record['timestamp']) // resolution * resolution
+        row = buckets.get((series, bucket))
+        if row is None:
+            row = buckets[(series, bucket)] = {'count': 0}
+            for metric in ROLLUP_METRICS:
+                row.update({f'{metric}_min': None, f'{metric}_max': None,
+                            f'{metric}_avg': None, f'{metric}_count': 0})
+        row['count'] += 1
+        for metric in ROLLUP_METRICS:
+            value = record.get(metric)
+            if value is not None:
+                _merge_metric(row, metric, value, value, value, 1)
+    return buckets
+
+def _merge_metric(row: Dict[str, Any], metric: str, low: float, high: float,
+                  avg: float, count: int) -> None:
+    """Fold the min, max and average of count values into a rollup row."""
+    total = row[f'{metric}_count'] + count
+    if row[f'{metric}_count']:
+        row[f'{metric}_min'] = min(row[f'{metric}_min'], low)
+        row[f'{metric}_max'] = max(row[f'{metric}_max'], high)
+        row[f'{metric}_avg'] = (row[f'{metric}_avg'] * row[f'{metric}_count'] + avg * count) / total
+    else:
+        row[f'{metric}_min'], row[f'{metric}_max'], row[f'{metric}_avg'] = low, high, avg
+    row[f'{metric}_count'] = total
+
+def merge_late_samples(conn, kind: str, records: List[Dict[str, Any]]) -> int:
+    """Merge records behind the rollup watermarks into the buckets already rolled up.
+
+    Every tier whose watermark is past a record gets the record folded into
+    its bucket, creating the bucket if it had no samples. Min, max, count and
+    the average weighted by non-null values merge exactly, so the result is
+    the same as rolling the bucket up again. Returns the number of late
+    records.
+    """
+    watermarks = {
+        resolution: to_epoch(watermark)
+        for resolution, watermark in conn.execute(
+            select(RollupWatermark.resolution, RollupWatermark.watermark)
+            .where(RollupWatermark.series_type == kind)
+        )
+    }
+    if not watermarks:
+        return 0
+    # Coarser tiers are built from finer ones, so the finest has the newest watermark
+    newest = max(watermarks.values())
+    late = [record for record in records if to_epoch(record['timestamp']) < newest]
+
+    for resolution, watermark in watermarks.items():
+        behind = [record for record in late if to_epoch(record['timestamp']) < watermark]
+        if not behind:
+            continue
+        buckets = _summarise(behind, kind, resolution)
+        existing = conn.execute(
+            select(MetricRollup.__table__).where(
+                MetricRollup.series_type == kind,
+                MetricRollup.resolution == resolution,
+                MetricRollup.series.in_({series for series, _ in buckets}),
+                MetricRollup.bucket >= from_epoch(min(bucket for _, bucket in buckets)),
+                MetricRollup.bucket <= from_epoch(max(bucket for _, bucket in buckets))
+            )
+        ).mappings().all()
+        replaced = []
+        for row in existing:
+            partial = buckets.get((row['series'], to_epoch(row['bucket'])))
+            if partial is None:
+                continue
+            replaced.append(row['id'])
+            partial['count'] += row['count']
+            for metric in ROLLUP_METRICS:
+                if row[f'{metric}_count']:
+                    _merge_metric(partial, metric, row[f'{metric}_min'], row[f'{metric}_max'],
+                                  row[f'{metric}_avg'], row[f'{metric}_count'])
+        if replaced:
+            conn.execute(delete(MetricRollup).where(MetricRollup.id.in_(replaced)))
+        conn.execute(insert(MetricRollup), [
+            dict(row, series_type=kind, series=series, resolution=resolution, bucket=from_epoch(bucket))
+            for (series, bucket), row in buckets.items()
+        ])
+    return len(late)
@@ -0,0 +1,94 @@
+import os
+import threading
+from typing import Callable, Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+class LeaderElection:
+    """Elects one process on the host to run the background jobs.
+
+    Every process that serves the application (e.g. each gunicorn worker)
+    tries to take an exclusive, non-blocking ``flock`` on ``lock_path``. The
+    one that gets it calls ``on_elected`` once and keeps the lock for its
+    lifetime; the others retry every ``retry_interval`` seconds. The kernel
+    releases the lock when its holder exits or crashes, so a surviving
+    process takes over within one retry interval.
+
+    Where ``fcntl`` is unavailable the process is always the leader.
+    """
+
+    def __init__(self, lock_path: str, on_elected: Callable[[], None],
+                 retry_interval: float = 5.0):
+        self.lock_path = lock_path
+        self.on_elected = on_elected
+        self.retry_interval = retry_interval
+        self.is_leader = False
+        self._file: Optional[TextIO] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def try_acquire(self) -> bool:
+        """Try once to become the leader, calling on_elected if it succeeds."""
+        if self.is_leader:
+            return True
+        if fcntl is not None:
+            if self._file is None:
+                directory = os.path.dirname(os.path.abspath(self.lock_path))
+                os.makedirs(directory, exist_ok=True)
+                self._file = open(self.lock_path, 'a+')
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+            # Record the holder for operators; the lock itself is what counts
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.write(f'{os.getpid()}\n')
+            self._file.flush()
+
+        self.is_leader = True
+        print(f"Process {os.getpid()} elected to run metrics collection")
+        self.on_elected()
+        return True
+
+    def _election_loop(self):
+        """Background loop retrying until elected or stopped."""
+        while not self._stop_event.is_set():
+            try:
+                if self.try_acquire():
+                    return
+            except Exception as e:
+                print(f"Error in leader election: {str(e)}")
+            self._stop_event.wait(self.retry_interval)
+
+    def start(self):
+        """Start competing for leadership in the background."""
+        if self._thread is None and not self.is_leader:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._election_loop)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop competing and give up leadership if held."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            if fcntl is not None and self.is_leader:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self.is_leader = False
+
+    def holder(self) -> Optional[int]:
+        """Get the PID recorded by the current leader, if any."""
+        try:
+            with open(self.lock_path) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
@@ -1,31 +1,156 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index, LargeBinary
 from sqlalchemy.sql import func
 from .database import Base
 
+def utcnow() -> datetime:
+    """Get the current time in UTC."""
+    return datetime.now(timezone.utc)
+
 class ServiceMetrics(Base):
     """Model for storing service metrics."""
     __tablename__ = "service_metrics"
+    __table_args__ = (
+        Index('ix_service_metrics_series_timestamp', 'service_name', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    service_name = Column(String, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    service_name = Column(String)
+    timestamp = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), index=True)
     cpu_usage = Column(Float)
     memory_usage = Column(Float)
     network_in = Column(Float)
     network_out = Column(Float)
     disk_usage = Column(Float)
     additional_metrics = Column(JSON)
+    inventory_id = Column(Integer)
 
 class NodeMetrics(Base):
     """Model for storing node metrics."""
     __tablename__ = "node_metrics"
+    __table_args__ = (
+        Index('ix_node_metrics_series_timestamp', 'node_id', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    node_id = Column(String, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    node_id = Column(String)
+    timestamp = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), index=True)
     cpu_usage = Column(Float)
     memory_usage = Column(Float)
     disk_usage = Column(Float)
     network_in = Column(Float)
     network_out = Column(Float)
-    additional_metrics = Column(JSON) 
\ No newline at end of file
+    additional_metrics = Column(JSON)
+    inventory_id = Column(Integer)
+
+class MetricRollup(Base):
+    """Model for metrics pre-aggregated into fixed-resolution buckets.
+
+    One row per series and bucket, holding the sample count and the min, max,
+    average and number of non-null values of every metric over the bucket.
+    """
+    __tablename__ = "metric_rollups"
+    __table_args__ = (
+        Index('ix_metric_rollups_series_bucket', 'series_type', 'series', 'resolution', 'bucket', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    series_type = Column(String, nullable=False)
+    series = Column(String, nullable=False)
+    resolution = Column(Integer, nullable=False)
+    bucket = Column(DateTime(timezone=True), nullable=False)
+    count = Column(Integer, nullable=False)
+    cpu_usage_min = Column(Float)
+    cpu_usage_max = Column(Float)
+    cpu_usage_avg = Column(Float)
+    cpu_usage_count = Column(Integer)
+    memory_usage_min = Column(Float)
+    memory_usage_max = Column(Float)
+    memory_usage_avg = Column(Float)
+    memory_usage_count = Column(Integer)
+    disk_usage_min = Column(Float)
+    disk_usage_max = Column(Float)
+    disk_usage_avg = Column(Float)
+    disk_usage_count = Column(Integer)
+    network_in_min = Column(Float)
+    network_in_max = Column(Float)
+    network_in_avg = Column(Float)
+    network_in_count = Column(Integer)
+    network_out_min = Column(Float)
+    network_out_max = Column(Float)
+    network_out_avg = Column(Float)
+    network_out_count = Column(Integer)
+
+class RollupWatermark(Base):
+    """Model for the end of the last bucket rolled up per series type and tier."""
+    __tablename__ = "rollup_watermarks"
+
+    series_type = Column(String, primary_key=True)
+    resolution = Column(Integer, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+
+class SeriesCatalog(Base):
+    """Model for the catalog of known series, maintained as samples are written.
+
+    One row per service or node with when it was first and last seen, how
+    many samples it has and its latest values, so listing series does not
+    have to scan the metrics tables. ``last_checked`` is the newest sample
+    collected, including samples the sampling policy did not store.
+    """
+    __tablename__ = "series_catalog"
+    __table_args__ = (
+        Index('ix_series_catalog_type_last_seen', 'series_type', 'last_seen'),
+    )
+
+    series_type = Column(String, primary_key=True)
+    series = Column(String, primary_key=True)
+    first_seen = Column(DateTime(timezone=True), nullable=False)
+    last_seen = Column(DateTime(timezone=True), nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)
+    last_checked = Column(DateTime(timezone=True))
+    cpu_usage = Column(Float)
+    memory_usage = Column(Float)
+    disk_usage = Column(Float)
+    network_in = Column(Float)
+    network_out = Column(Float)
+
+class SeriesInventory(Base):
+    """Model for the static facts of a service or node.
+
+    Facts that rarely change, such as a node's CPU count and memory size or
+    a service's process start time, are stored once per distinct set of
+    values and referenced from metric rows by ``inventory_id``.
+    """
+    __tablename__ = "series_inventory"
+    __table_args__ = (
+        Index('ix_series_inventory_series_fingerprint', 'series_type', 'series', 'fingerprint', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    series_type = Column(String, nullable=False)
+    series = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    facts = Column(JSON, nullable=False)
+    first_seen = Column(DateTime(timezone=True), nullable=False)
+
+class MetricChunk(Base):
+    """Model for samples of one series sealed into a compressed chunk.
+
+    Once a time window has closed, the chunk sealer moves its raw rows here:
+    timestamps and ids are delta-of-delta encoded and metric values XOR
+    encoded (see ``src.utils.chunks``). ``start_time`` and ``end_time`` are
+    the first and last sample in the chunk, so queries only decode chunks
+    that overlap their range.
+    """
+    __tablename__ = "metric_chunks"
+    __table_args__ = (
+        Index('ix_metric_chunks_series_end_time', 'series_type', 'series', 'end_time'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    series_type = Column(String, nullable=False)
+    series = Column(String, nullable=False)
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    end_time = Column(DateTime(timezone=True), nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
@@ -0,0 +1,120 @@
+from typing import Any, Callable, Dict, List
+from sqlalchemy import bindparam, case, event, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .database import SessionLocal
+from .models import ServiceMetrics, NodeMetrics, SeriesCatalog
+
+# Column holding the series name, by record kind
+SERIES_KEYS = {
+    'service': 'service_name',
+    'node': 'node_id'
+}
+
+# Latest values kept in the catalog for every series
+CATALOG_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage', 'network_in', 'network_out')
+
+# Dialects with an INSERT ... ON CONFLICT DO UPDATE construct
+UPSERT_DIALECTS: Dict[str, Callable[..., Any]] = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+def catalog_rows(kind: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Summarise a batch of records into one catalog row per series."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        series = record[SERIES_KEYS[kind]]
+        timestamp = record['timestamp']
+        row = rows.get(series)
+        if row is None:
+            row = rows[series] = {
+                'series_type': kind,
+                'series': series,
+                'first_seen': timestamp,
+                'last_seen': timestamp,
+                'last_checked': timestamp,
+                'sample_count': 0
+            }
+        row['sample_count'] += 1
+        row['first_seen'] = min(row['first_seen'], timestamp)
+        if timestamp >= row['last_seen']:
+            row['last_seen'] = row['last_checked'] = timestamp
+            row.update({metric: record.get(metric) for metric in CATALOG_METRICS})
+    return list(rows.values())
+
+def upsert_statement(dialect_name: str):
+    """Build the upsert merging catalog rows into existing ones.
+
+    Counts are added up, first and last seen widened, and the latest values
+    only replaced by a batch whose newest sample is at least as new.
+    """
+    table = SeriesCatalog.__table__
+    statement = UPSERT_DIALECTS[dialect_name](table)
+    excluded = statement.excluded
+    newer = excluded.last_seen >= table.c.last_seen
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.series_type, table.c.series],
+        set_={
+            'first_seen': case(
+                (excluded.first_seen < table.c.first_seen, excluded.first_seen),
+                else_=table.c.first_seen
+            ),
+            'last_seen': case((newer, excluded.last_seen), else_=table.c.last_seen),
+            'last_checked': case(
+                (or_(table.c.last_checked.is_(None), excluded.last_checked > table.c.last_checked),
+                 excluded.last_checked),
+                else_=table.c.last_checked
+            ),
+            'sample_count': table.c.sample_count + excluded.sample_count,
+            **{
+                metric: case((newer, excluded[metric]), else_=table.c[metric])
+                for metric in CATALOG_METRICS
+            }
+        }
+    )
+
+def update_catalog(conn, kind: str, records: List[Dict[str, Any]]) -> None:
+    """Upsert the catalog rows of a batch of records on the given connection."""
+    if not records:
+        return
+    dialect_name = conn.dialect.name
+    if dialect_name not in UPSERT_DIALECTS:
+        print(f"Series catalog not maintained: no upsert support for {dialect_name}")
+        return
+    conn.execute(upsert_statement(dialect_name), catalog_rows(kind, records))
+
+def touch_catalog(conn, kind: str, checked: Dict[str, Any]) -> None:
+    """Move ``last_checked`` forward for series with samples collected but not stored.
+
+    checked maps series names to the timestamp of their newest such sample.
+    Series not in the catalog yet are left out.
+    """
+    if not checked:
+        return
+    table = SeriesCatalog.__table__
+    conn.execute(
+        update(table).where(
+            table.c.series_type == kind,
+            table.c.series == bindparam('touched_series'),
+            or_(table.c.last_checked.is_(None), table.c.last_checked < bindparam('touched_at'))
+        ).values(last_checked=bindparam('touched_at')),
+        [{'touched_series': series, 'touched_at': timestamp} for series, timestamp in checked.items()]
+    )
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _update_catalog_after_flush(session, flush_context):
+    """Keep the catalog up to date for metrics added through the ORM."""
+    by_kind: Dict[str, List[Dict[str, Any]]] = {}
+    for instance in session.new:
+        if isinstance(instance, ServiceMetrics):
+            kind = 'service'
+        elif isinstance(instance, NodeMetrics):
+            kind = 'node'
+        else:
+            continue
+        by_kind.setdefault(kind, []).append({
+            column: getattr(instance, column)
+            for column in (SERIES_KEYS[kind], 'timestamp') + CATALOG_METRICS
+        })
+    for kind, records in by_kind.items():
+        update_catalog(session.connection(), kind, records)
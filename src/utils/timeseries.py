@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+def to_epoch(value: datetime) -> float:
+    """Convert a datetime to epoch seconds, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def from_epoch(value: float) -> datetime:
+    """Convert epoch seconds to a UTC datetime."""
+    return datetime.fromtimestamp(value, timezone.utc)
+
+def bucket_expression(column, step: int, dialect_name: str):
+    """Truncate a timestamp column to the epoch second of its step-wide bucket."""
+    # Imported here so the collectors can use this module without SQLAlchemy
+    from sqlalchemy import func, cast, Integer
+    if dialect_name == 'sqlite':
+        seconds = cast(func.strftime('%s', column), Integer)
+        return (seconds // step) * step
+    epoch = func.date_part('epoch', column)
+    return cast(func.floor(epoch / step) * step, Integer)
+
+def weighted_avg(avg_column, count_column):
+    """Combine bucket averages weighted by the number of values behind each one."""
+    from sqlalchemy import func
+    return func.sum(avg_column * count_column) / func.nullif(func.sum(count_column), 0)
+
+# Resolutions in seconds of the rollup tiers, finest first
+ROLLUP_TIERS = (60, 3600, 86400)
+
+# Metrics summarised in every rollup bucket
+ROLLUP_METRICS = ['cpu_usage', 'memory_usage', 'disk_usage', 'network_in', 'network_out']
+
+# Aggregation functions that can be answered from rollup tiers
+ROLLUP_FUNCTIONS = ('avg', 'min', 'max', 'count')
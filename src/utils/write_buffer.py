@@ -0,0 +1,217 @@
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from .database import engine
+from .models import ServiceMetrics, NodeMetrics
+from .series_catalog import update_catalog, touch_catalog
+from .inventory import inventory
+from .late_samples import merge_late_samples
+from .instrumentation import stats
+
+# Tables that records can be written to, keyed by record kind
+TABLES = {
+    'service': ServiceMetrics.__table__,
+    'node': NodeMetrics.__table__
+}
+
+class WriteBuffer:
+    """Bounded write-behind queue for metric records.
+
+    Collectors push plain dict records; a background flusher writes them with
+    one Core ``insert()`` executemany per table once the queue reaches
+    ``flush_size`` records or its oldest record is ``max_age`` seconds old.
+    When the queue already holds ``max_size`` records new ones are rejected,
+    so a slow database cannot grow memory without bound. The series catalog
+    is upserted, the static facts of each record resolved to an inventory
+    row, and samples older than the rollup watermarks merged into the rollup
+    buckets, in the same transaction as the samples. Samples that were
+    collected but not stored only move their series' ``last_checked``
+    forward, at most one update per series per flush.
+    """
+
+    def __init__(self, max_size: int = 10000, flush_size: int = 500, max_age: float = 5.0,
+                 bind=None):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.max_age = max_age
+        self.bind = bind or engine
+        self._queue: Deque[Tuple[str, Dict[str, Any], float]] = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._listeners: List[Callable[[str, List[Dict[str, Any]]], None]] = []
+        # Newest unstored sample per (kind, series), and when the first was touched
+        self._touched: Dict[Tuple[str, str], datetime] = {}
+        self._touched_since: Optional[float] = None
+        self._running = False
+        self._thread = None
+
+        self.dropped = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def push(self, kind: str, record: Dict[str, Any]) -> bool:
+        """Queue one record. Returns False if the queue is full."""
+        return self.push_many(kind, [record])
+
+    def push_many(self, kind: str, records: List[Dict[str, Any]]) -> bool:
+        """Queue a batch of records, all or nothing. Returns False if they do not fit."""
+        if kind not in TABLES:
+            raise ValueError(f'Unknown record kind: {kind}')
+        now = time.monotonic()
+        with self._condition:
+            if len(self._queue) + len(records) > self.max_size:
+                self.dropped += len(records)
+                return False
+            self._queue.extend((kind, record, now) for record in records)
+            if len(self._queue) >= self.flush_size:
+                self._condition.notify()
+        return True
+
+    def touch(self, kind: str, series: str, timestamp: datetime) -> None:
+        """Record that a sample of a series was collected but not stored."""
+        with self._condition:
+            if self._touched.get((kind, series), timestamp) <= timestamp:
+                self._touched[(kind, series)] = timestamp
+            if self._touched_since is None:
+                self._touched_since = time.monotonic()
+
+    def has_room(self, count: int = 1) -> bool:
+        """Check whether count more records would currently fit."""
+        return len(self._queue) + count <= self.max_size
+
+    def add_listener(self, callback: Callable[[str, List[Dict[str, Any]]], None]) -> None:
+        """Call callback(kind, records) after every successful write, with ``id`` set on each record."""
+        self._listeners.append(callback)
+
+    def flush(self) -> int:
+        """Write every queued record to the database. Returns the rows written."""
+        with self._flush_lock:
+            with self._condition:
+                batch = list(self._queue)
+                self._queue.clear()
+                touched, self._touched, self._touched_since = self._touched, {}, None
+            if not batch and not touched:
+                return 0
+
+            by_kind: Dict[str, List[Dict[str, Any]]] = {}
+            for kind, record, _ in batch:
+                by_kind.setdefault(kind, []).append(record)
+            touched_by_kind: Dict[str, Dict[str, datetime]] = {}
+            for (kind, series), timestamp in touched.items():
+                touched_by_kind.setdefault(kind, {})[series] = timestamp
+
+            started = time.perf_counter()
+            inventory_ids = {}
+            written_ids: Dict[str, List[int]] = {}
+            try:
+                with self.bind.begin() as conn:
+                    for kind, records in by_kind.items():
+                        inventory_ids.update(inventory.resolve(conn, kind, records))
+                        table = TABLES[kind]
+                        written_ids[kind] = list(conn.execute(
+                            insert(table).returning(table.c.id, sort_by_parameter_order=True), records
+                        ).scalars())
+                        update_catalog(conn, kind, records)
+                        late = merge_late_samples(conn, kind, records)
+                        if late:
+                            stats.increment('write_buffer.late_samples', late)
+                    for kind, series_touched in touched_by_kind.items():
+                        touch_catalog(conn, kind, series_touched)
+            except Exception as e:
+                print(f"Error flushing metrics: {str(e)}")
+                stats.increment('write_buffer.flush_errors')
+                self._requeue(batch)
+                for (kind, series), timestamp in touched.items():
+                    self.touch(kind, series, timestamp)
+                return 0
+            elapsed = time.perf_counter() - started
+            inventory.remember(inventory_ids)
+            # Listeners see the ids the rows were written with
+            for kind, records in by_kind.items():
+                for record, row_id in zip(records, written_ids[kind]):
+                    record['id'] = row_id
+
+            self.flushes += 1
+            self.rows_flushed += len(batch)
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.total_flush_seconds += elapsed
+            stats.observe('write_buffer.flush_seconds', elapsed)
+            stats.observe_count('write_buffer.rows_per_flush', len(batch))
+
+            for kind, records in by_kind.items():
+                for listener in self._listeners:
+                    try:
+                        listener(kind, records)
+                    except Exception as e:
+                        print(f"Error in write listener: {str(e)}")
+            return len(batch)
+
+    def _requeue(self, batch: List[Tuple[str, Dict[str, Any], float]]) -> None:
+        """Put a failed batch back at the front of the queue if it still fits."""
+        with self._condition:
+            room = max(self.max_size - len(self._queue), 0)
+            kept = batch[:room]
+            self.dropped += len(batch) - len(kept)
+            self._queue.extendleft(reversed(kept))
+
+    def _oldest_age(self) -> Optional[float]:
+        since = [self._queue[0][2]] if self._queue else []
+        if self._touched_since is not None:
+            since.append(self._touched_since)
+        if not since:
+            return None
+        return time.monotonic() - min(since)
+
+    def _flush_loop(self):
+        """Background loop flushing on queue size or record age."""
+        while self._running:
+            with self._condition:
+                while self._running:
+                    age = self._oldest_age()
+                    if len(self._queue) >= self.flush_size or (age is not None and age >= self.max_age):
+                        break
+                    self._condition.wait(self.max_age if age is None else self.max_age - age)
+            self.flush()
+
+    def start(self):
+        """Start the background flusher."""
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._flush_loop)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background flusher and write whatever is still queued."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and flush statistics."""
+        age = self._oldest_age()
+        return {
+            'queue_depth': len(self._queue),
+            'max_size': self.max_size,
+            'oldest_record_age_seconds': round(age, 3) if age is not None else None,
+            'dropped': self.dropped,
+            'flushes': self.flushes,
+            'rows_flushed': self.rows_flushed,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 3),
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 3),
+            'avg_flush_ms': round(self.total_flush_seconds / self.flushes * 1000, 3) if self.flushes else 0.0
+        }
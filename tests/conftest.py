@@ -0,0 +1,4 @@
+import os
+
+# Tests drive collection themselves; keep the app from starting it on import
+os.environ.setdefault('COLLECTION_ENABLED', 'false')
@@ -0,0 +1,122 @@
+import gzip
+import json
+import threading
+import pytest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from src.agent.spool import Spool
+from src.agent.shipper import Shipper
+
+def sample(value):
+    return {'node_id': 'edge', 'timestamp': datetime(2024, 2, 20, tzinfo=timezone.utc), 'cpu_usage': value}
+
+@pytest.fixture
+def ingest_server():
+    """Run a stub ingest endpoint answering with the queued status codes."""
+    received = []
+    statuses = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            status = statuses.pop(0) if statuses else 202
+            if status == 202:
+                received.extend(json.loads(line) for line in gzip.decompress(body).splitlines())
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/api/ingest', received, statuses
+    server.shutdown()
+
+def test_spool_resumes_from_acknowledged_offset(tmp_path):
+    """Test acknowledged samples are not read again after a restart."""
+    path = str(tmp_path / 'spool.ndjson')
+    spool = Spool(path)
+    for value in range(3):
+        assert spool.push('node', sample(float(value)))
+    body, end = spool.read_batch(2)
+    assert [json.loads(line)['cpu_usage'] for line in body.splitlines()] == [0.0, 1.0]
+    spool.ack(end)
+    spool.stop()
+
+    # A crash mid-write leaves a partial line, which is discarded on restart
+    with open(path, 'ab') as f:
+        f.write(b'{"type":"no')
+    spool = Spool(path)
+    body, _ = spool.read_batch(10)
+    assert [json.loads(line)['cpu_usage'] for line in body.splitlines()] == [2.0]
+    assert json.loads(body)['type'] == 'node'
+
+def test_spool_is_size_capped(tmp_path):
+    """Test a full spool reclaims acknowledged space and then drops new samples."""
+    spool = Spool(str(tmp_path / 'spool.ndjson'), max_bytes=300)
+    pushed = 0
+    while spool.push('node', sample(float(pushed))):
+        pushed += 1
+    assert spool.dropped == 1
+
+    _, end = spool.read_batch(1)
+    spool.ack(end)
+    assert spool.push('node', sample(99.0))
+    body, _ = spool.read_batch(pushed)
+    assert json.loads(body.splitlines()[-1])['cpu_usage'] == 99.0
+
+def test_shipper_backs_off_and_resumes(tmp_path, ingest_server):
+    """Test batches are only acknowledged once the central instance accepts them."""
+    url, received, statuses = ingest_server
+    spool = Spool(str(tmp_path / 'spool.ndjson'))
+    for value in range(5):
+        spool.push('node', sample(float(value)))
+    shipper = Shipper(spool, url, batch_size=3, interval=5)
+
+    statuses.append(503)
+    assert shipper.ship_once() > 0
+    assert received == [] and shipper.failures == 1
+
+    assert shipper.ship_once() == 0.0
+    assert shipper.ship_once() == 0.0
+    assert shipper.ship_once() == 5
+    assert [item['cpu_usage'] for item in received] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert shipper.backoff == 0.0
+    assert len(spool) == 0
+
+    # Unreachable instances back off exponentially up to the cap
+    shipper = Shipper(spool, 'http://127.0.0.1:9/api/ingest', max_backoff=4, timeout=1)
+    spool.push('node', sample(5.0))
+    for _ in range(5):
+        shipper.ship_once()
+    assert shipper.backoff == 4
+    assert len(spool) > 0
+
+def test_shipper_isolates_refused_samples(tmp_path, ingest_server):
+    """Test refused batches are split until only the refused samples are set aside."""
+    url, received, statuses = ingest_server
+    spool = Spool(str(tmp_path / 'spool.ndjson'))
+    for value in range(6):
+        spool.push('node', sample(float(value)))
+    shipper = Shipper(spool, url, batch_size=4, interval=5)
+
+    # [0-3] refused, [0, 1] accepted, [2, 3] refused, [2] refused, [3] accepted
+    statuses.extend([400, 202, 400, 400, 202])
+    while shipper.ship_once() == 0.0:
+        pass
+    assert [item['cpu_usage'] for item in received] == [0.0, 1.0, 3.0, 4.0, 5.0]
+    assert shipper.samples_rejected == 1
+    with open(spool.rejected_path) as f:
+        assert [json.loads(line)['cpu_usage'] for line in f] == [2.0]
+    # Full batches resume once the refused batch is dealt with
+    assert shipper._split == 0
+
+    # A single sample over the size limit does not block the spool
+    spool.push('node', sample(6.0))
+    shipper = Shipper(spool, url, batch_size=1)
+    statuses.append(413)
+    assert shipper.ship_once() == 0.0
+    assert len(spool) == 0 and shipper.samples_rejected == 1
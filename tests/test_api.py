@@ -1,8 +1,21 @@
+import gzip
+import io
+import json
+import time
 import pytest
+import msgpack
+from array import array
 from datetime import datetime, timedelta
-from app import app
+from app import app, start_background_jobs, leader_election, collection_manager, rollup_manager
 from src.utils.database import Base, engine, SessionLocal
-from src.utils.models import ServiceMetrics, NodeMetrics
+from sqlalchemy import func
+from src.utils.models import ServiceMetrics, NodeMetrics, MetricRollup
+from src.api.cache import query_cache
+from src.utils.inventory import inventory
+from src.utils.write_buffer import WriteBuffer
+from src.collectors.rollup_manager import RollupManager
+from src.collectors.chunk_sealer import ChunkSealer
+from src.utils.leader import LeaderElection
 
 @pytest.fixture(scope="function")
 def client():
@@ -17,6 +30,8 @@ def db_session():
     # Drop all tables and recreate them
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    query_cache.clear()
+    inventory.clear()
     
     db = SessionLocal()
     try:
@@ -107,4 +122,576 @@ def test_metrics_not_found(client, sample_metrics):
 
     response = client.get('/api/nodes/nonexistent/metrics')
     assert response.status_code == 404
-    assert response.json['error'] == 'No metrics found for node nonexistent' 
\ No newline at end of file
+    assert response.json['error'] == 'No metrics found for node nonexistent' 
+def test_keyset_pagination(client, db_session):
+    """Test paging through a series with the X-Next-Cursor header."""
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    for minute in range(5):
+        db_session.add(ServiceMetrics(
+            service_name="paged_service",
+            timestamp=base + timedelta(minutes=minute),
+            cpu_usage=float(minute)
+        ))
+    db_session.commit()
+
+    seen = []
+    url = '/api/services/paged_service/metrics?limit=2'
+    response = client.get(url)
+    while True:
+        assert response.status_code == 200
+        seen.extend(row['cpu_usage'] for row in response.json)
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        response = client.get(f'{url}&after={cursor}')
+        if response.status_code == 404:
+            break
+
+    assert seen == [4.0, 3.0, 2.0, 1.0, 0.0]
+
+def test_invalid_cursor(client, sample_metrics):
+    """Test a malformed cursor is rejected."""
+    response = client.get('/api/services/test_service/metrics?after=not-a-cursor')
+    assert response.status_code == 400
+
+def test_aggregate_metrics(client, db_session):
+    """Test metrics are bucketed in the database."""
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    for second in range(0, 240, 30):
+        db_session.add(NodeMetrics(
+            node_id="agg_node",
+            timestamp=base + timedelta(seconds=second),
+            cpu_usage=float(second)
+        ))
+    db_session.commit()
+
+    response = client.get(
+        '/api/nodes/agg_node/metrics/aggregate?step=60&fn=avg,max,last,count&metrics=cpu_usage'
+        '&start_time=2024-02-20T12:00:00&end_time=2024-02-20T12:05:00'
+    )
+    assert response.status_code == 200
+    assert response.headers['X-Step'] == '60'
+    data = response.json
+    assert len(data) == 4
+    assert data[0]['timestamp'].startswith('2024-02-20T12:00:00')
+    assert data[0]['cpu_usage_avg'] == 15.0
+    assert data[0]['cpu_usage_max'] == 30.0
+    assert data[0]['cpu_usage_last'] == 30.0
+    assert data[0]['count'] == 2
+
+    # A range that would need more than max_points buckets widens the step
+    response = client.get(
+        '/api/nodes/agg_node/metrics/aggregate?step=1&max_points=2&metrics=cpu_usage'
+        '&start_time=2024-02-20T12:00:00&end_time=2024-02-20T12:04:00'
+    )
+    assert response.headers['X-Step'] == '120'
+    assert [point['cpu_usage'] for point in response.json] == [45.0, 165.0]
+
+    response = client.get('/api/nodes/agg_node/metrics/aggregate?fn=median')
+    assert response.status_code == 400
+
+def test_aggregate_from_rollup_tiers(client, db_session):
+    """Test rollup tiers give the same buckets as aggregating raw rows."""
+    base = datetime(2024, 2, 20, 0, 0, 0)
+    for minute in range(0, 180, 2):
+        db_session.add(ServiceMetrics(
+            service_name="rolled_service",
+            timestamp=base + timedelta(minutes=minute),
+            cpu_usage=float(minute % 7),
+            memory_usage=50.0
+        ))
+    db_session.commit()
+
+    url = ('/api/services/rolled_service/metrics/aggregate?step=3600&fn=avg,min,max,count'
+           '&metrics=cpu_usage&start_time=2024-02-20T00:00:00&end_time=2024-02-20T03:00:00')
+    raw = client.get(url).json
+
+    manager = RollupManager(tiers=(60, 3600))
+    assert manager.run_once(now=base + timedelta(hours=5)) > 0
+    # Only buckets closed since the watermark are processed
+    assert manager.run_once(now=base + timedelta(hours=5)) == 0
+    assert db_session.query(MetricRollup).filter(MetricRollup.resolution == 3600).count() == 3
+
+    rolled = client.get(url).json
+    assert len(rolled) == len(raw) == 3
+    for expected, actual in zip(raw, rolled):
+        assert actual['count'] == expected['count']
+        assert actual['cpu_usage_min'] == expected['cpu_usage_min']
+        assert actual['cpu_usage_max'] == expected['cpu_usage_max']
+        assert abs(actual['cpu_usage_avg'] - expected['cpu_usage_avg']) < 1e-9
+
+def test_late_samples_reach_rollups(client, db_session):
+    """Test samples written behind the rollup watermark are merged into the tiers."""
+    base = datetime(2024, 2, 21, 0, 0, 0)
+    for second in range(0, 7200, 30):
+        db_session.add(ServiceMetrics(
+            service_name="late_service",
+            timestamp=base + timedelta(seconds=second),
+            # Every third sample has no CPU value; averages must not count it
+            cpu_usage=None if second // 30 % 3 == 0 else float(second % 7),
+            memory_usage=10.0
+        ))
+    db_session.commit()
+    RollupManager(tiers=(60, 3600)).run_once(now=base + timedelta(hours=3))
+
+    buffer = WriteBuffer(max_age=60)
+    for second, cpu_usage in ((15, 50.0), (45, None), (3615, 90.0), (7500, 5.0)):
+        buffer.push('service', {
+            'service_name': 'late_service',
+            'timestamp': base + timedelta(seconds=second),
+            'cpu_usage': cpu_usage,
+            'memory_usage': 10.0,
+            'disk_usage': None,
+            'network_in': None,
+            'network_out': None,
+            'additional_metrics': None,
+            'inventory': None
+        })
+    assert buffer.flush() == 4
+    assert db_session.query(func.sum(MetricRollup.count)).filter(MetricRollup.resolution == 3600).scalar() == 243
+
+    url = ('/api/services/late_service/metrics/aggregate?step=3600&metrics=cpu_usage'
+           '&start_time=2024-02-21T00:00:00&end_time=2024-02-21T02:00:00&fn=avg,min,max,count')
+    rolled = client.get(url).json
+    # Asking for last as well reads every raw row
+    raw = client.get(url + ',last').json
+    assert len(rolled) == len(raw) == 2
+    for expected, actual in zip(raw, rolled):
+        assert actual['count'] == expected['count']
+        assert actual['cpu_usage_min'] == expected['cpu_usage_min']
+        assert actual['cpu_usage_max'] == expected['cpu_usage_max']
+        assert abs(actual['cpu_usage_avg'] - expected['cpu_usage_avg']) < 1e-9
+    assert rolled[1]['cpu_usage_max'] == 90.0
+
+def test_metrics_field_projection(client, sample_metrics):
+    """Test only the requested columns and the timestamp are returned."""
+    response = client.get('/api/services/test_service/metrics?fields=cpu_usage,memory_usage')
+    assert response.status_code == 200
+    assert set(response.json[0]) == {'timestamp', 'cpu_usage', 'memory_usage'}
+    assert response.json[0]['cpu_usage'] == 50.0
+
+    response = client.get('/api/nodes/test_node/metrics')
+    assert response.json[0]['additional_metrics'] == {"test": "data"}
+
+    response = client.get('/api/nodes/test_node/metrics?fields=bogus')
+    assert response.status_code == 400
+
+def test_columnar_response_formats(client, sample_metrics):
+    """Test columnar JSON and msgpack are negotiated from the Accept header."""
+    url = '/api/services/test_service/metrics?fields=cpu_usage'
+    response = client.get(url, headers={'Accept': 'application/vnd.openhorizon.columns+json'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.openhorizon.columns+json'
+    assert set(response.json) == {'timestamp', 'cpu_usage'}
+    assert response.json['cpu_usage'] == [50.0]
+
+    response = client.get(url, headers={'Accept': 'application/msgpack'})
+    assert response.mimetype == 'application/msgpack'
+    columns = msgpack.unpackb(response.data)
+    assert array('d', columns['cpu_usage']).tolist() == [50.0]
+    assert array('d', columns['timestamp'])[0] > 0
+
+    response = client.get(url + '&format=columns')
+    assert response.json['cpu_usage'] == [50.0]
+
+    response = client.get(url + '&format=xml')
+    assert response.status_code == 400
+
+def test_batch_query(client, db_session):
+    """Test several targets are answered by one request."""
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    for minute in range(4):
+        for node in ("node_a", "node_b"):
+            db_session.add(NodeMetrics(
+                node_id=node,
+                timestamp=base + timedelta(minutes=minute),
+                cpu_usage=float(minute),
+                memory_usage=10.0 * minute
+            ))
+    db_session.commit()
+
+    window = {'start_time': '2024-02-20T12:00:00', 'end_time': '2024-02-20T12:03:00'}
+    response = client.post('/api/query', json={'targets': [
+        dict(window, refId='A', type='node', series='node_a', metric='cpu_usage', step=120),
+        dict(window, refId='B', type='node', series='node_b', metric='memory_usage', step=120),
+        dict(window, refId='C', type='node', series='node_b', metric='cpu_usage', limit=2),
+        {'refId': 'D', 'type': 'cluster', 'series': 'x'}
+    ]})
+    assert response.status_code == 200
+    results = {result['refId']: result for result in response.json['results']}
+
+    assert results['A']['step'] == 120
+    assert [point['cpu_usage'] for point in results['A']['points']] == [0.5, 2.5]
+    assert [point['memory_usage'] for point in results['B']['points']] == [5.0, 25.0]
+    assert [point['cpu_usage'] for point in results['C']['points']] == [2.0, 3.0]
+    assert 'error' in results['D']
+
+    response = client.post('/api/query', json={'targets': 'A'})
+    assert response.status_code == 400
+
+    response = client.post('/api/query?format=columns', json={'targets': [
+        dict(window, refId='A', type='node', series='node_a', metric='cpu_usage', step=120)
+    ]})
+    assert response.json['results'][0]['columns']['cpu_usage'] == [0.5, 2.5]
+
+def test_streaming_ndjson(client, db_session):
+    """Test every matching row is streamed as newline-delimited JSON."""
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    for minute in range(150):
+        db_session.add(NodeMetrics(node_id="node_a", timestamp=base + timedelta(minutes=minute),
+                                   cpu_usage=float(minute)))
+    db_session.commit()
+
+    response = client.get('/api/nodes/node_a/metrics?stream=true&fields=cpu_usage')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert len(lines) == 150
+    assert lines[0]['cpu_usage'] == 149.0
+
+    response = client.get('/api/nodes/node_a/metrics?limit=5',
+                          headers={'Accept': 'application/x-ndjson'})
+    assert len(response.data.decode().splitlines()) == 5
+
+    response = client.get('/api/nodes/missing/metrics?stream=true')
+    assert response.status_code == 404
+
+def test_query_cache_invalidation(client, db_session):
+    """Test repeated queries are cached until a sample of the series is written, by any process."""
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    db_session.add(NodeMetrics(node_id="node_a", timestamp=base, cpu_usage=1.0))
+    db_session.commit()
+    open_url = '/api/nodes/node_a/metrics?fields=cpu_usage'
+    closed_url = open_url + '&end_time=2024-02-20T12:00:30'
+
+    hits = query_cache.hits
+    for _ in range(2):
+        assert client.get(open_url).json[0]['cpu_usage'] == 1.0
+        assert client.get(closed_url).json[0]['cpu_usage'] == 1.0
+    assert query_cache.hits == hits + 2
+
+    # A late sample written where this process's write buffer does not see it
+    db_session.add(NodeMetrics(node_id="node_a", timestamp=base + timedelta(seconds=20), cpu_usage=2.0))
+    db_session.commit()
+    assert [row['cpu_usage'] for row in client.get(closed_url).json] == [2.0, 1.0]
+    assert [row['cpu_usage'] for row in client.get(open_url).json] == [2.0, 1.0]
+    assert query_cache.hits == hits + 2
+
+    # Writes seen by this process drop the entries they could change right away
+    query_cache.on_write('node', [{'node_id': 'node_a', 'timestamp': base + timedelta(minutes=5)}])
+    assert query_cache.stats()['invalidations'] == 1
+    assert client.get(closed_url).json[0]['cpu_usage'] == 2.0
+    assert query_cache.hits == hits + 3
+
+def test_query_bounds_are_exact(client, db_session):
+    """Test cached results never hold rows or buckets outside the requested range."""
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    for second in range(0, 300, 10):
+        db_session.add(NodeMetrics(node_id="bounded_node", timestamp=base + timedelta(seconds=second),
+                                   cpu_usage=float(second)))
+    db_session.commit()
+    start, end = base + timedelta(seconds=25), base + timedelta(seconds=155)
+    url = ('/api/nodes/bounded_node/metrics?fields=timestamp,cpu_usage'
+           '&start_time=2024-02-20T12:00:25&end_time=2024-02-20T12:02:35')
+
+    # Two passes: the second is answered from the cache
+    for _ in range(2):
+        rows = client.get(url + '&limit=1000').json
+        assert [row['cpu_usage'] for row in rows] == [float(s) for s in range(150, 20, -10)]
+        assert client.get(url + '&limit=5').json == rows[:5]
+        assert client.get(url + '&limit=5&offset=2').json == rows[2:7]
+
+        points = client.get(
+            '/api/nodes/bounded_node/metrics/aggregate?step=30&fn=max&metrics=cpu_usage'
+            '&start_time=2024-02-20T12:00:25&end_time=2024-02-20T12:02:35'
+        ).json
+        buckets = [datetime.fromisoformat(point['timestamp']).replace(tzinfo=None) for point in points]
+        assert all(start - timedelta(seconds=30) < bucket <= end for bucket in buckets)
+        assert buckets[0] == base and buckets[-1] == base + timedelta(seconds=150)
+
+def test_hot_window_queries(client, db_session):
+    """Test recent queries and the latest sample are served from memory."""
+    hot_window = app.extensions['hot_window']
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    for minute in range(3):
+        hot_window.append('node', {'node_id': 'hot_node', 'timestamp': base + timedelta(minutes=minute),
+                                   'cpu_usage': float(minute), 'additional_metrics': {'load': minute}})
+
+    # Nothing is in the database, so these can only come from memory
+    response = client.get('/api/nodes/hot_node/metrics/latest')
+    assert response.status_code == 200
+    assert response.json['cpu_usage'] == 2.0
+    assert response.json['node_id'] == 'hot_node'
+
+    response = client.get('/api/nodes/hot_node/metrics?fields=cpu_usage&start_time=2024-02-20T12:00:00')
+    assert [row['cpu_usage'] for row in response.json] == [2.0, 1.0, 0.0]
+
+    # Samples are not served with ids before the write buffer has written them
+    response = client.get('/api/nodes/hot_node/metrics?start_time=2024-02-20T12:00:00')
+    assert response.status_code == 404
+    hot_window.on_write('node', [
+        {'node_id': 'hot_node', 'timestamp': base + timedelta(minutes=minute), 'id': minute + 1}
+        for minute in range(3)
+    ])
+    response = client.get('/api/nodes/hot_node/metrics?start_time=2024-02-20T12:00:00')
+    assert [(row['id'], row['cpu_usage']) for row in response.json] == [(3, 2.0), (2, 1.0), (1, 0.0)]
+    assert response.json[0]['additional_metrics'] == {'load': 2}
+
+    # Fields that are not kept in memory fall back to the database
+    response = client.get('/api/nodes/hot_node/metrics?fields=cpu_usage,inventory&start_time=2024-02-20T12:00:00')
+    assert response.status_code == 404
+
+    response = client.get('/api/nodes/cold_node/metrics/latest')
+    assert response.status_code == 404
+
+def test_latest_falls_back_to_database(client, sample_metrics):
+    """Test a worker without the series in its hot window reads the newest row."""
+    response = client.get('/api/services/test_service/metrics/latest')
+    assert response.status_code == 200
+    assert response.json['service_name'] == 'test_service'
+    assert response.json['cpu_usage'] == 50.0
+    assert 'additional_metrics' not in response.json
+
+def test_conditional_get(client, sample_metrics, db_session):
+    """Test unchanged responses are answered with 304 Not Modified."""
+    url = '/api/nodes/test_node/metrics?fields=cpu_usage'
+    response = client.get(url)
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    response = client.get(url, headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+    # Other query parameters get their own validator
+    response = client.get(url + '&limit=5', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+    db_session.add(NodeMetrics(node_id="test_node", timestamp=datetime.utcnow() + timedelta(minutes=1),
+                               cpu_usage=1.0))
+    db_session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+    # A late sample changes the body of a range that ended before the newest sample
+    url = '/api/nodes/test_node/metrics?fields=cpu_usage&end_time=' + sample_metrics[1].timestamp.isoformat()
+    etag = client.get(url).headers['ETag']
+    db_session.add(NodeMetrics(node_id="test_node", timestamp=sample_metrics[1].timestamp - timedelta(minutes=1),
+                               cpu_usage=2.0))
+    db_session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.json) == 2
+
+def test_series_catalog(client, db_session):
+    """Test the list endpoints read the catalog maintained at ingest."""
+    now = datetime.utcnow()
+    for minutes_ago, cpu in ((120, 1.0), (90, 2.0)):
+        db_session.add(NodeMetrics(node_id="old_node", timestamp=now - timedelta(minutes=minutes_ago),
+                                   cpu_usage=cpu))
+    db_session.add(NodeMetrics(node_id="new_node", timestamp=now, cpu_usage=3.0))
+    db_session.commit()
+
+    response = client.get('/api/nodes')
+    assert response.status_code == 200
+    nodes = {node['node_id']: node for node in response.json}
+    assert set(nodes) == {'old_node', 'new_node'}
+    assert nodes['old_node']['sample_count'] == 2
+    assert nodes['old_node']['cpu_usage'] == 2.0
+    assert nodes['old_node']['last_checked'] == nodes['old_node']['last_seen']
+
+    response = client.get('/api/nodes?seen_within=3600')
+    assert [node['node_id'] for node in response.json] == ['new_node']
+
+def test_ingest(client, db_session, monkeypatch):
+    """Test remote samples are validated as a batch and queued for bulk insertion."""
+    write_buffer = app.extensions['write_buffer']
+    samples = [
+        {'type': 'node', 'node_id': 'edge_1', 'timestamp': '2024-02-20T12:00:00Z', 'cpu_usage': 10},
+        {'type': 'node', 'node_id': 'edge_1', 'timestamp': 1708430460, 'cpu_usage': 20.5},
+        {'type': 'service', 'service_name': 'edge_service', 'memory_usage': 30.0}
+    ]
+    body = gzip.compress('\n'.join(json.dumps(sample) for sample in samples).encode())
+    headers = {'Content-Type': 'application/x-ndjson', 'Content-Encoding': 'gzip'}
+    response = client.post('/api/ingest', data=body, headers=headers)
+    assert response.status_code == 202
+    assert response.json['accepted'] == 3
+
+    write_buffer.flush()
+    assert db_session.query(NodeMetrics).filter(NodeMetrics.node_id == 'edge_1').count() == 2
+    assert db_session.query(ServiceMetrics).filter(ServiceMetrics.service_name == 'edge_service').count() == 1
+
+    # msgpack bodies are accepted as well
+    body = msgpack.packb([{'type': 'node', 'node_id': 'edge_2', 'cpu_usage': 1.0}])
+    response = client.post('/api/ingest', data=body, headers={'Content-Type': 'application/msgpack'})
+    assert response.status_code == 202
+
+    # One invalid sample rejects the whole batch
+    body = json.dumps(samples[0]) + '\n' + json.dumps({'type': 'node', 'node_id': 'edge_1', 'cpu_usage': 'high'})
+    response = client.post('/api/ingest', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 400
+    assert 'Sample 2' in response.json['error']
+    body = json.dumps({'type': 'node', 'node_id': 'edge_1', 'timestamp': ''})
+    response = client.post('/api/ingest', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 400
+    assert 'timestamp' in response.json['error']
+
+    # Offsets are converted to UTC before the sample is stored
+    body = json.dumps({'type': 'node', 'node_id': 'edge_3', 'timestamp': '2024-01-01T00:00:00+05:00'})
+    response = client.post('/api/ingest', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 202
+    write_buffer.flush()
+    stored = db_session.query(NodeMetrics).filter(NodeMetrics.node_id == 'edge_3').one()
+    assert stored.timestamp.replace(tzinfo=None) == datetime(2023, 12, 31, 19, 0, 0)
+
+    monkeypatch.setattr(write_buffer, 'has_room', lambda count=1: False)
+    response = client.post('/api/ingest', data=json.dumps(samples[0]), headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+def test_ingest_body_limit(client, db_session, monkeypatch):
+    """Test oversized ingest bodies are refused with 413 before being read."""
+    monkeypatch.setattr('src.api.MAX_INGEST_BYTES', 16)
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 17)
+    write_buffer = app.extensions['write_buffer']
+    write_buffer.flush()
+    body = json.dumps({'type': 'node', 'node_id': 'edge_1', 'cpu_usage': 10}).encode()
+    response = client.post('/api/ingest', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 413
+    assert '16 bytes' in response.json['error']
+
+    # Chunked bodies, which the server terminates, are cut off while being read
+    response = client.post('/api/ingest', input_stream=io.BytesIO(body),
+                           headers={'Content-Type': 'application/x-ndjson', 'Transfer-Encoding': 'chunked'},
+                           environ_overrides={'wsgi.input_terminated': True})
+    assert response.status_code == 413
+    assert len(write_buffer) == 0
+
+def test_series_inventory(client, db_session):
+    """Test static facts are joined back in on request, including legacy ingest samples."""
+    samples = [
+        {'type': 'node', 'node_id': 'edge_1', 'timestamp': '2024-02-20T12:00:00Z', 'cpu_usage': 10,
+         'inventory': {'cpu_count': 4}},
+        {'type': 'node', 'node_id': 'edge_1', 'timestamp': '2024-02-20T12:01:00Z', 'cpu_usage': 20,
+         'additional_metrics': {'cpu_count': 4, 'cpu_freq': 2.0}}
+    ]
+    body = '\n'.join(json.dumps(sample) for sample in samples)
+    response = client.post('/api/ingest', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 202
+    app.extensions['write_buffer'].flush()
+
+    response = client.get('/api/nodes/edge_1/metrics?fields=cpu_usage,inventory')
+    assert response.status_code == 200
+    assert [row['inventory'] for row in response.json] == [{'cpu_count': 4}, {'cpu_count': 4}]
+
+    # Facts are only joined in when asked for
+    response = client.get('/api/nodes/edge_1/metrics')
+    assert 'inventory' not in response.json[0] and 'inventory_id' not in response.json[0]
+    assert response.json[0]['additional_metrics'] == {'cpu_freq': 2.0}
+
+def test_stats_endpoint(client, sample_metrics):
+    """Test API latency and row counts are reported per endpoint."""
+    client.get('/api/nodes/test_node/metrics')
+    response = client.get('/stats')
+    assert response.status_code == 200
+    histograms = response.json['metrics']['histograms']
+    endpoint = 'api.GET /api/nodes/<string:node_id>/metrics'
+    assert histograms[f'{endpoint}.latency_seconds']['count'] >= 1
+    assert histograms[f'{endpoint}.rows']['max'] >= 1
+    assert response.json['metrics']['counters'][f'{endpoint}.status_2xx'] >= 1
+
+def test_background_jobs_without_leadership(tmp_path, monkeypatch):
+    """Test a worker that loses the election flushes writes but does not collect until it takes over."""
+    lock_path = str(tmp_path / 'collector.lock')
+    monkeypatch.setattr(leader_election, 'lock_path', lock_path)
+    monkeypatch.setattr(leader_election, 'retry_interval', 0.01)
+    started = []
+    monkeypatch.setattr(collection_manager, 'start', lambda: started.append('collection'))
+    monkeypatch.setattr(rollup_manager, 'start', lambda: started.append('rollup'))
+    write_buffer = app.extensions['write_buffer']
+    holder = LeaderElection(lock_path, lambda: None)
+    assert holder.try_acquire()
+    try:
+        start_background_jobs()
+        time.sleep(0.1)
+        assert not leader_election.is_leader
+        assert started == []
+        assert write_buffer._running
+
+        # The worker takes over once the leader exits
+        holder.stop()
+        deadline = time.monotonic() + 2
+        while not leader_election.is_leader and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert leader_election.is_leader
+        assert started == ['collection', 'rollup']
+    finally:
+        holder.stop()
+        leader_election.stop()
+        write_buffer.stop()
+
+def test_request_sessions_closed(client, sample_metrics):
+    """Test every request returns its database connection to the pool."""
+    for _ in range(20):
+        assert client.get('/api/nodes/test_node/metrics').status_code == 200
+        assert client.get('/api/services').status_code == 200
+        assert engine.pool.checkedout() == 0
+
+def test_sealed_chunks_read_like_rows(client, db_session):
+    """Test pages, cursors and aggregates are the same before and after sealing."""
+    base = datetime(2024, 2, 20, 0, 0, 0)
+    for minute in range(0, 240, 3):
+        db_session.add(ServiceMetrics(
+            service_name="chunked_service",
+            timestamp=base + timedelta(minutes=minute),
+            cpu_usage=float(minute % 13),
+            memory_usage=30.0 + minute / 7,
+            additional_metrics={'minute': minute}
+        ))
+    db_session.commit()
+
+    urls = [
+        '/api/services/chunked_service/metrics?limit=25&offset=10',
+        '/api/services/chunked_service/metrics?limit=30&fields=cpu_usage'
+        '&start_time=2024-02-20T00:30:00&end_time=2024-02-20T02:30:00',
+        '/api/services/chunked_service/metrics/latest',
+        '/api/services/chunked_service/metrics/aggregate?step=1800&fn=avg,max,last'
+        '&metrics=cpu_usage&start_time=2024-02-20T00:00:00&end_time=2024-02-20T04:00:00'
+    ]
+
+    def snapshot():
+        query_cache.clear()
+        pages = [client.get(url).json for url in urls]
+        # Follow cursors across the whole series
+        rows, cursor = [], None
+        while True:
+            url = '/api/services/chunked_service/metrics?limit=17'
+            page = client.get(url + (f'&after={cursor}' if cursor else ''))
+            rows.extend(page.json)
+            cursor = page.headers.get('X-Next-Cursor')
+            if not cursor:
+                return pages, rows
+
+    RollupManager(tiers=(60,)).run_once(now=base + timedelta(hours=5))
+    before = snapshot()
+    assert ChunkSealer(duration=3600).run_once(now=base + timedelta(hours=5)) > 0
+
+    # A late row lands inside a sealed window and is merged in from the raw table
+    db_session.add(ServiceMetrics(service_name="chunked_service", cpu_usage=99.0,
+                                  timestamp=base + timedelta(minutes=31, seconds=30)))
+    db_session.commit()
+    after = snapshot()
+    assert len(after[1]) == len(before[1]) + 1
+    late = [row for row in after[1] if row['cpu_usage'] == 99.0]
+    assert len(late) == 1
+    assert [row for row in after[1] if row is not late[0]] == before[1]
+
+    db_session.query(ServiceMetrics).filter(ServiceMetrics.cpu_usage == 99.0).delete()
+    db_session.commit()
+    assert snapshot() == before
+
+    # A series whose rows are all sealed still gets validators
+    etag = client.get(urls[0]).headers['ETag']
+    assert client.get(urls[0], headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from app import app as flask_app
+from src.api.asgi import app
+from src.api.cache import query_cache
+from src.utils.async_database import async_engine
+from src.utils.database import Base, engine, SessionLocal
+from src.utils.models import ServiceMetrics, NodeMetrics
+
+def request(method, path, query=None, headers=None, body=b''):
+    """Run one request through the ASGI app. Returns the status, headers and body."""
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': urlencode(query or {}).encode(),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    }
+    messages = []
+    pending = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        # The client stays connected until the response is complete
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await app(scope, receive, send)
+        # Pooled connections belong to this event loop
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    start = messages[0]
+    response_headers = {name.decode(): value.decode() for name, value in start['headers']}
+    return start['status'], response_headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+@pytest.fixture(scope="function")
+def series():
+    """Create a fresh database with a few samples of one service and one node."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    query_cache.clear()
+    base = datetime(2024, 2, 20, 12, 0, 0)
+    db = SessionLocal()
+    for minute in range(5):
+        db.add(ServiceMetrics(service_name='svc', timestamp=base + timedelta(minutes=minute),
+                              cpu_usage=float(minute), memory_usage=50.0, network_in=1.0,
+                              network_out=2.0, disk_usage=70.0))
+        db.add(NodeMetrics(node_id='node', timestamp=base + timedelta(minutes=minute),
+                           cpu_usage=10.0 * minute, memory_usage=40.0, disk_usage=60.0,
+                           network_in=3.0, network_out=4.0))
+    db.commit()
+    db.close()
+    yield base
+    Base.metadata.drop_all(bind=engine)
+
+def test_asgi_matches_flask(series):
+    """Test the async endpoints answer exactly like the Flask ones."""
+    client = flask_app.test_client()
+    cases = [
+        ('/api/services/svc/metrics', {'limit': 2, 'fields': 'cpu_usage'}),
+        ('/api/nodes/node/metrics', {'start_time': '2024-02-20T12:01:00'}),
+        ('/api/services/svc/metrics/aggregate', {
+            'start_time': '2024-02-20T12:00:00', 'end_time': '2024-02-20T12:05:00',
+            'step': 120, 'fn': 'avg,max', 'metrics': 'cpu_usage'
+        }),
+        ('/api/nodes/node/metrics/latest', {})
+    ]
+    for path, query in cases:
+        status, headers, body = request('GET', path, query)
+        expected = client.get(path, query_string=query)
+        assert status == expected.status_code == 200
+        assert json.loads(body) == expected.json
+        assert headers.get('x-next-cursor') == expected.headers.get('X-Next-Cursor')
+
+    status, headers, body = request('GET', '/api/services/svc/metrics', {'limit': 2, 'after': headers.get('x-next-cursor', '')})
+    assert status == 200
+
+    status, _, body = request('GET', '/api/services')
+    assert [entry['service_name'] for entry in json.loads(body)] == ['svc']
+    assert json.loads(body)[0]['sample_count'] == 5
+
+def test_asgi_batch_and_formats(series):
+    """Test batch queries, columnar responses and streaming."""
+    targets = [
+        {'refId': 'A', 'type': 'node', 'series': 'node', 'metric': 'cpu_usage', 'fn': 'max', 'step': 300,
+         'start_time': '2024-02-20T12:00:00', 'end_time': '2024-02-20T12:05:00'},
+        {'refId': 'B', 'type': 'bogus', 'series': 'x'}
+    ]
+    status, _, body = request('POST', '/api/query', body=json.dumps({'targets': targets}).encode())
+    results = json.loads(body)['results']
+    assert status == 200
+    assert [point['cpu_usage'] for point in results[0]['points']] == [40.0]
+    assert 'error' in results[1]
+    assert results == flask_app.test_client().post('/api/query', json={'targets': targets}).json['results']
+
+    status, headers, body = request('GET', '/api/services/svc/metrics', {'fields': 'cpu_usage', 'format': 'columns'})
+    assert headers['content-type'] == 'application/vnd.openhorizon.columns+json'
+    assert json.loads(body)['cpu_usage'] == [4.0, 3.0, 2.0, 1.0, 0.0]
+
+    status, headers, body = request('GET', '/api/services/svc/metrics', {'stream': 'true', 'fields': 'cpu_usage'})
+    assert headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line)['cpu_usage'] for line in body.splitlines()] == [4.0, 3.0, 2.0, 1.0, 0.0]
+
+def test_asgi_errors_and_conditional_get(series):
+    """Test error responses and 304 Not Modified."""
+    status, _, body = request('GET', '/api/services/missing/metrics')
+    assert status == 404
+    assert json.loads(body) == {'error': 'No metrics found for service missing'}
+
+    status, _, body = request('GET', '/api/services/svc/metrics', {'fields': 'bogus'})
+    assert status == 400
+    status, _, _ = request('GET', '/api/services/svc/metrics', {'limit': 'abc'})
+    assert status == 400
+    status, _, _ = request('DELETE', '/api/services')
+    assert status == 405
+
+    status, headers, _ = request('GET', '/api/services/svc/metrics')
+    status, _, body = request('GET', '/api/services/svc/metrics', headers={'If-None-Match': headers['etag']})
+    assert status == 304 and body == b''
+
+def test_asgi_cors_and_lifespan(series, monkeypatch):
+    """Test CORS headers and that the query cache is sized on startup, not at import."""
+    status, headers, _ = request('GET', '/api/services', headers={'Origin': 'http://grafana:3000'})
+    assert status == 200 and headers['access-control-allow-origin'] == '*'
+    status, headers, _ = request('OPTIONS', '/api/query', headers={
+        'Origin': 'http://grafana:3000', 'Access-Control-Request-Method': 'POST'
+    })
+    assert status == 200 and 'POST' in headers['access-control-allow-methods']
+
+    sizes = (query_cache.max_entries, query_cache.snap_seconds)
+    monkeypatch.setenv('QUERY_CACHE_SIZE', '7')
+    messages = [{'type': 'lifespan.shutdown'}, {'type': 'lifespan.startup'}]
+    sent = []
+
+    async def receive():
+        return messages.pop()
+
+    async def send(message):
+        sent.append(message['type'])
+
+    try:
+        asyncio.run(app({'type': 'lifespan', 'asgi': {'version': '3.0'}}, receive, send))
+        assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        assert query_cache.max_entries == 7
+    finally:
+        query_cache.configure(*sizes)
@@ -1,14 +1,33 @@
+import os
+import threading
 import pytest
+import psutil
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from src.collectors.cpu_sampler import CpuSampler, host_cpu_percent
+from src.collectors.process_index import ProcessIndex
+from src.collectors.system_snapshot import SystemSnapshot
 from src.collectors.service_collector import ServiceCollector
 from src.collectors.node_collector import NodeCollector
 from src.collectors.collection_manager import CollectionManager
-from src.utils.database import Base, engine
-from src.utils.models import ServiceMetrics, NodeMetrics
+from src.collectors.chunk_sealer import ChunkSealer
+from src.collectors.hot_window import HotWindow
+from src.collectors.rollup_manager import RollupManager
+from src.collectors.sampling_policy import SamplingPolicy, parse_deadbands
+from src.utils.chunks import encode_chunk, decode_chunk, to_micros
+from src.utils.database import Base, engine, SessionLocal
+from src.utils.models import ServiceMetrics, NodeMetrics, SeriesCatalog, SeriesInventory, MetricChunk
+from src.utils.inventory import inventory
+from src.utils.instrumentation import StatsRegistry
+from src.utils.leader import LeaderElection
+from src.utils.write_buffer import WriteBuffer
 
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test."""
     Base.metadata.create_all(engine)
+    inventory.clear()
     yield
     Base.metadata.drop_all(engine)
 
@@ -35,6 +54,114 @@ def test_node_collector():
     assert 'network_in' in metrics
     assert 'network_out' in metrics
     assert 'additional_metrics' in metrics
+    assert 'cpu_count' in metrics['inventory']
+    assert 'cpu_count' not in metrics['additional_metrics']
+
+def test_host_cpu_percent_from_deltas():
+    """Test host CPU usage is computed from cpu_times() deltas."""
+    cpu_times = namedtuple('scputimes', ['user', 'system', 'idle', 'iowait'])
+    previous = cpu_times(user=10.0, system=5.0, idle=80.0, iowait=5.0)
+    current = cpu_times(user=40.0, system=15.0, idle=130.0, iowait=15.0)
+
+    # 40s busy out of 100s elapsed
+    assert host_cpu_percent(previous, current) == 40.0
+    assert host_cpu_percent(current, current) == 0.0
+
+def test_cpu_sampler_does_not_block(monkeypatch):
+    """Test collectors never fall back to the sleeping psutil.cpu_percent."""
+    def blocking_cpu_percent(*args, **kwargs):
+        raise AssertionError('cpu_percent should not be called')
+    monkeypatch.setattr(psutil, 'cpu_percent', blocking_cpu_percent)
+
+    collector = NodeCollector()
+    metrics = collector.collect_metrics()
+    assert 'error' not in metrics
+    assert 0.0 <= metrics['cpu_usage'] <= 100.0
+
+    sampler = CpuSampler()
+    process = psutil.Process()
+    assert sampler.process_percent(process) == 0.0
+    assert sampler.process_percent(process) >= 0.0
+
+def test_process_index_refreshes_incrementally(monkeypatch):
+    """Test the process index only inspects PIDs it has not seen before."""
+    index = ProcessIndex()
+    index.refresh()
+    assert len(index) > 0
+    current = psutil.Process()
+
+    def unexpected_process(pid):
+        raise AssertionError(f'PID {pid} should already be indexed')
+    with monkeypatch.context() as m:
+        m.setattr(psutil, 'pids', lambda: list(index._processes))
+        m.setattr(psutil, 'Process', unexpected_process)
+        index.refresh()
+
+    matches = index.match([' '.join(current.cmdline()), 'no-such-service'])
+    assert matches[' '.join(current.cmdline())].pid == current.pid
+    assert matches['no-such-service'] is None
+
+def test_collection_manager_shares_process_index():
+    """Test service collectors are handed processes from one shared index."""
+    manager = CollectionManager(["service_a", "service_b"], collection_interval=1)
+    for collector in manager.service_collectors:
+        assert collector.process_index is manager.process_index
+
+def test_system_snapshot_network_rates():
+    """Test network rates are computed once against the previous snapshot."""
+    previous = SystemSnapshot()
+    snapshot = SystemSnapshot(previous)
+    assert SystemSnapshot().network_rates == {'in': 0.0, 'out': 0.0}
+    assert snapshot.network_rates['in'] >= 0.0
+    assert snapshot.network_rates['out'] >= 0.0
+    assert snapshot.boot_time == previous.boot_time
+
+def test_collection_cycle_reads_host_once(db_session, monkeypatch):
+    """Test host-wide reads stay constant as services are added."""
+    manager = CollectionManager([f"service_{i}" for i in range(5)], collection_interval=1)
+    proc = psutil.Process()
+    for collector in manager.service_collectors:
+        collector.attach_process(proc)
+
+    calls = {'virtual_memory': 0, 'disk_usage': 0, 'net_io_counters': 0}
+    for name in calls:
+        def counting(*args, _name=name, _original=getattr(psutil, name), **kwargs):
+            calls[_name] += 1
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(psutil, name, counting)
+
+    manager._collect_and_store_metrics()
+    assert calls == {'virtual_memory': 1, 'disk_usage': 1, 'net_io_counters': 1}
+
+def test_collection_schedule_is_drift_free():
+    """Test collection times land on interval boundaries of the monotonic clock."""
+    manager = CollectionManager([], collection_interval=10)
+    assert manager._next_boundary(100.0, 10) == 110.0
+    # A slow cycle skips to the next boundary instead of shifting the schedule
+    assert manager._next_boundary(113.7, 10) == 120.0
+    manager.node_collector.interval = 30
+    assert manager._interval_for(manager.node_collector) == 30
+    assert CollectionManager([], intervals={'node': 5}).node_collector.interval == 5
+
+def test_hung_collector_does_not_stall_cycle():
+    """Test a collector exceeding its timeout does not block the others."""
+    release = threading.Event()
+
+    class HungCollector(NodeCollector):
+        def collect_metrics(self, snapshot=None):
+            release.wait(5)
+            return super().collect_metrics(snapshot)
+
+    manager = CollectionManager([], collection_interval=1, collector_timeout=0.2)
+    hung = HungCollector()
+    hung.name = 'hung'
+    try:
+        results = manager._collect_metrics([hung, manager.node_collector])
+        assert len(results) == 1
+        assert results[0]['node_id'] == manager.node_collector.node_id
+        assert hung in manager._in_flight
+    finally:
+        release.set()
 
 def test_collection_manager(db_session):
     """Test metrics collection manager."""
@@ -61,4 +188,298 @@ def test_collection_manager(db_session):
         assert len(service_metrics) >= 0
         assert len(node_metrics) > 0
     finally:
-        db.close() 
\ No newline at end of file
+        db.close() 
+def test_write_buffer_bulk_inserts(db_session):
+    """Test queued records are written in bulk on flush."""
+    buffer = WriteBuffer(max_size=3, flush_size=2, max_age=60)
+    record = {
+        'node_id': 'buffered_node',
+        'timestamp': datetime.now(timezone.utc),
+        'cpu_usage': 1.0,
+        'memory_usage': 2.0,
+        'disk_usage': 3.0,
+        'network_in': 4.0,
+        'network_out': 5.0,
+        'additional_metrics': {}
+    }
+    assert buffer.push('node', record)
+    assert buffer.push_many('node', [record, record])
+    # The queue is bounded; a full queue rejects new records
+    assert not buffer.push('node', record)
+    assert buffer.stats()['queue_depth'] == 3
+    assert buffer.stats()['dropped'] == 1
+
+    assert buffer.flush() == 3
+    stats = buffer.stats()
+    assert stats['queue_depth'] == 0
+    assert stats['rows_flushed'] == 3
+    assert stats['flushes'] == 1
+
+    db = SessionLocal()
+    try:
+        assert db.query(NodeMetrics).filter(NodeMetrics.node_id == 'buffered_node').count() == 3
+        # The series catalog is upserted in the same transaction
+        assert db.get(SeriesCatalog, ('node', 'buffered_node')).sample_count == 3
+    finally:
+        db.close()
+
+def test_write_buffer_inventory(db_session):
+    """Test static facts are stored once per distinct value and referenced by id."""
+    buffer = WriteBuffer(max_size=10, flush_size=10, max_age=60)
+
+    def record(node_id, facts):
+        return {
+            'node_id': node_id,
+            'timestamp': datetime.now(timezone.utc),
+            'cpu_usage': 1.0,
+            'memory_usage': 2.0,
+            'disk_usage': 3.0,
+            'network_in': 4.0,
+            'network_out': 5.0,
+            'additional_metrics': {'cpu_freq': 2.0},
+            'inventory': facts
+        }
+
+    facts = {'cpu_count': 4, 'memory_total': 1024}
+    for cpu_count in (4, 4, 8):
+        buffer.push('node', record('inventoried_node', dict(facts, cpu_count=cpu_count)))
+    buffer.push('node', record('bare_node', None))
+    assert buffer.flush() == 4
+    # Known facts are resolved from memory on later flushes
+    buffer.push('node', record('inventoried_node', facts))
+    assert buffer.flush() == 1
+
+    db = SessionLocal()
+    try:
+        rows = db.query(SeriesInventory).order_by(SeriesInventory.id).all()
+        assert [row.facts['cpu_count'] for row in rows] == [4, 8]
+        ids = [row.inventory_id for row in db.query(NodeMetrics).order_by(NodeMetrics.id)]
+        assert ids == [rows[0].id, rows[0].id, rows[1].id, None, rows[0].id]
+    finally:
+        db.close()
+
+def test_hot_window_ring():
+    """Test the hot window keeps only the newest samples of each series."""
+    window = HotWindow(capacity=3)
+    base = datetime(2024, 2, 20, 12, 0, tzinfo=timezone.utc)
+    for minute in range(5):
+        window.append('node', {
+            'node_id': 'ring_node',
+            'timestamp': base + timedelta(minutes=minute),
+            'cpu_usage': float(minute),
+            'memory_usage': None
+        })
+
+    latest = window.latest('node', 'ring_node')
+    assert latest.cpu_usage == 4.0
+    assert latest.memory_usage is None
+    assert latest.timestamp == base + timedelta(minutes=4)
+
+    rows = window.window('node', 'ring_node', base + timedelta(minutes=2))
+    assert [row.cpu_usage for row in rows] == [4.0, 3.0, 2.0]
+    # Older samples were overwritten, so the window cannot answer for them
+    assert window.window('node', 'ring_node', base) is None
+    assert window.latest('node', 'unknown') is None
+
+    # Written samples learn their database id
+    assert latest.id is None
+    window.on_write('node', [{'node_id': 'ring_node', 'timestamp': base + timedelta(minutes=4), 'id': 9}])
+    assert window.latest('node', 'ring_node').id == 9
+
+def test_stats_histogram():
+    """Test histograms summarise observations from their buckets."""
+    registry = StatsRegistry()
+    for value in (0.002, 0.002, 0.002, 0.2):
+        registry.observe('cycle_seconds', value)
+    registry.increment('errors')
+    with registry.timer('block_seconds'):
+        pass
+
+    snapshot = registry.snapshot()
+    cycle = snapshot['histograms']['cycle_seconds']
+    assert cycle['count'] == 4
+    assert cycle['max'] == 0.2
+    assert cycle['p50'] == 0.0025
+    assert cycle['p99'] == 0.25
+    assert snapshot['histograms']['block_seconds']['count'] == 1
+    assert snapshot['counters'] == {'errors': 1}
+
+def test_leader_election(tmp_path):
+    """Test only one process holds the collection lock and another takes over."""
+    lock_path = str(tmp_path / 'collector.lock')
+    elected = []
+    first = LeaderElection(lock_path, lambda: elected.append('first'))
+    second = LeaderElection(lock_path, lambda: elected.append('second'))
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert first.try_acquire()
+    assert elected == ['first']
+    assert first.holder() == os.getpid()
+
+    # Releasing the lock, as the kernel does when the leader exits, hands it over
+    first.stop()
+    assert second.try_acquire()
+    assert elected == ['first', 'second']
+    second.stop()
+
+def test_chunk_codec_round_trip():
+    """Test chunks decode to the rows they were encoded from."""
+    base = datetime(2024, 2, 20, 0, 0, 0)
+    offsets = [0, 15, 30, 45, 61, 75, 75, 3600, 3601]
+    rows = [{
+        'id': 10 + index * (3 if index > 4 else 1),
+        'timestamp': base + timedelta(seconds=seconds, microseconds=index),
+        'cpu_usage': [1.5, 1.5, -0.0, float('inf'), None, 2.25, 1e-300, 99.9, 1.5][index],
+        'memory_usage': 40.0 + index / 3,
+        'additional_metrics': {'threads': index} if index % 2 else None
+    } for index, seconds in enumerate(offsets)]
+
+    decoded = decode_chunk(encode_chunk(rows))
+    assert decoded['timestamp'] == [to_micros(row['timestamp']) for row in rows]
+    assert decoded['id'] == [row['id'] for row in rows]
+    assert [str(value) for value in decoded['cpu_usage']] == [str(row['cpu_usage']) for row in rows]
+    assert decoded['memory_usage'] == [row['memory_usage'] for row in rows]
+    assert decoded['disk_usage'] == [None] * len(rows)
+    assert decoded['additional_metrics'] == [row['additional_metrics'] for row in rows]
+    assert decoded['inventory_id'] == [None] * len(rows)
+
+    # Only the requested columns are decoded
+    assert set(decode_chunk(encode_chunk(rows), ['cpu_usage'])) == {'timestamp', 'id', 'cpu_usage'}
+
+def test_chunk_sealer(db_session):
+    """Test closed windows behind the rollup watermark are moved into chunks."""
+    base = datetime(2024, 2, 20, 0, 0, 0)
+    with Session(engine) as db:
+        for minute in range(0, 300, 5):
+            for name in ('sealed_a', 'sealed_b'):
+                db.add(ServiceMetrics(service_name=name, timestamp=base + timedelta(minutes=minute),
+                                      cpu_usage=float(minute % 11), memory_usage=50.0))
+        db.commit()
+
+    sealer = ChunkSealer(duration=3600)
+    # Nothing is sealed before it has been rolled up
+    assert sealer.run_once(now=base + timedelta(hours=6)) == 0
+
+    RollupManager(tiers=(60,)).run_once(now=base + timedelta(hours=3, minutes=1))
+    assert sealer.run_once(now=base + timedelta(hours=6)) == 2 * 36
+    with Session(engine) as db:
+        assert db.query(MetricChunk).count() == 2 * 3
+        assert db.query(ServiceMetrics).count() == 2 * 24
+        first = db.query(MetricChunk).order_by(MetricChunk.id).first()
+        assert first.sample_count == 12
+        assert first.end_time.replace(tzinfo=None) == base + timedelta(minutes=55)
+    assert sealer.stats()['rows_sealed'] == 72
+    assert sealer.run_once(now=base + timedelta(hours=6)) == 0
+
+def test_sampling_policy_deadbands():
+    """Test samples within every deadband are suppressed until the heartbeat and counted."""
+    deadbands = parse_deadbands('cpu_usage=2,memory_usage=1,disk_usage=0.5,network_in=10%,network_out=10%')
+    assert deadbands['network_in'].relative and deadbands['network_in'].value == 0.1
+    with pytest.raises(ValueError):
+        parse_deadbands('load=1')
+
+    policy = SamplingPolicy(deadbands, heartbeat=300)
+    base = datetime(2024, 2, 20, 0, 0, 0)
+
+    def sample(minute, cpu=10.0, network_in=1000.0, inventory=None):
+        return {
+            'node_id': 'steady_node', 'timestamp': base + timedelta(minutes=minute),
+            'cpu_usage': cpu, 'memory_usage': 40.0, 'disk_usage': 70.0,
+            'network_in': network_in, 'network_out': 0.0,
+            'additional_metrics': {'cpu_freq': 2.0}, 'inventory': inventory
+        }
+
+    stored = [
+        policy.filter('node', 'steady_node', record, 60)
+        for record in [
+            sample(0), sample(1, cpu=11.5), sample(2, network_in=1090.0),
+            sample(3, cpu=13.0),                      # moved past 2 from the stored 10.0
+            sample(4), sample(5, inventory={'cpu_count': 8})
+        ] + [sample(minute, inventory={'cpu_count': 8}) for minute in range(6, 11)]
+    ]
+    kept = [record for record in stored if record is not None]
+    assert [record['timestamp'].minute for record in kept] == [0, 3, 4, 5, 10]
+    assert kept[1]['additional_metrics'] == {'cpu_freq': 2.0, '_suppressed': 2}
+    assert '_suppressed' not in kept[2]['additional_metrics']
+    # Four suppressed samples, then the heartbeat stores an unchanged one
+    assert kept[4]['additional_metrics']['_suppressed'] == 4
+    # Metrics without a deadband never cause a sample to be stored, but are stored with one
+    policy = SamplingPolicy(parse_deadbands('cpu_usage=2'), heartbeat=300)
+    assert policy.filter('node', 'steady_node', sample(0), 60) is not None
+    assert policy.filter('node', 'steady_node', sample(1, network_in=5000.0), 60) is None
+    assert policy.filter('node', 'steady_node', sample(2, cpu=20.0, network_in=6000.0), 60)['network_in'] == 6000.0
+    # Without deadbands every sample is stored unchanged
+    record = sample(0)
+    assert SamplingPolicy().filter('node', 'steady_node', record, 60) is record
+
+def test_sampling_policy_adaptive_interval():
+    """Test intervals shrink while a metric changes quickly and back off while stable."""
+    policy = SamplingPolicy(parse_deadbands('cpu_usage=5'), heartbeat=180, adaptive=True)
+    base = datetime(2024, 2, 20, 0, 0, 0)
+    seconds = 0.0
+
+    def step(cpu):
+        nonlocal seconds
+        record = {
+            'service_name': 'bursty', 'timestamp': base + timedelta(seconds=seconds),
+            'cpu_usage': cpu, 'memory_usage': 1.0, 'disk_usage': 1.0,
+            'network_in': 1.0, 'network_out': 1.0, 'additional_metrics': {}
+        }
+        policy.filter('service', 'bursty', record, 60)
+        interval = policy.interval('service', 'bursty', 60)
+        seconds += interval
+        return interval
+
+    assert step(10.0) == 60
+    # 3 per 30 s is 6 per configured interval, past the deadband of 5
+    assert [step(cpu) for cpu in (20.0, 30.0, 33.0, 34.5)] == [30, 15, 15, 15]
+    assert policy.stats()['sampled_faster'] == 1
+    # Stable values back off, up to the heartbeat
+    assert [step(34.5) for _ in range(5)] == [30, 60, 120, 180, 180]
+    assert policy.stats()['sampled_slower'] == 1
+
+def test_collection_manager_suppresses_samples(db_session):
+    """Test suppressed samples reach neither the hot window nor the write buffer, only the catalog."""
+    class ListBuffer:
+        def __init__(self):
+            self.records = []
+            self.touched = []
+
+        def push(self, kind, record):
+            self.records.append(record)
+            return True
+
+        def touch(self, kind, series, timestamp):
+            self.touched.append(timestamp)
+
+    buffer = ListBuffer()
+    policy = SamplingPolicy(parse_deadbands('cpu_usage=1,memory_usage=1,disk_usage=1,network_in=1,network_out=1'))
+    manager = CollectionManager([], write_buffer=buffer, sampling_policy=policy)
+    node_id = manager.node_collector.node_id
+    base = datetime.now(timezone.utc)
+    results = [{
+        'node_id': node_id, 'timestamp': base + timedelta(seconds=index),
+        'cpu_usage': 5.0, 'memory_usage': 5.0, 'disk_usage': 5.0, 'network_in': 5.0,
+        'network_out': 5.0 + index, 'additional_metrics': {}, 'inventory': None
+    } for index in range(3)]
+    manager._store_metrics(results)
+    assert [record['network_out'] for record in buffer.records] == [5.0, 7.0]
+    assert buffer.records[1]['additional_metrics'] == {'_suppressed': 1}
+    assert buffer.touched == [results[1]['timestamp']]
+    assert len(manager.hot_window.window('node', node_id, base)) == 2
+
+    # The catalog tells a series whose values hold from one that stopped reporting
+    write_buffer = WriteBuffer(max_age=60)
+    manager = CollectionManager([], write_buffer=write_buffer, sampling_policy=SamplingPolicy(policy.deadbands))
+    manager._store_metrics([dict(results[0], timestamp=base + timedelta(seconds=index)) for index in range(3)])
+    assert write_buffer.flush() == 1
+    manager._store_metrics([dict(results[0], timestamp=base + timedelta(seconds=3))])
+    assert write_buffer.flush() == 0
+    db = SessionLocal()
+    try:
+        entry = db.get(SeriesCatalog, ('node', node_id))
+        assert entry.last_seen.replace(tzinfo=None) == base.replace(tzinfo=None)
+        assert entry.last_checked.replace(tzinfo=None) == (base + timedelta(seconds=3)).replace(tzinfo=None)
+    finally:
+        db.close()